@@ -0,0 +1,133 @@
+"""
+So sánh cách lấy nội dung: _extract_content cũ, 'legacy' và 'density'
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_content
+    python -m benchmarks.bench_content --pages 1000 --parser lxml selectolax
+
+Tốc độ đo trên trang tin của bộ trang benchmark (corpus.generate_corpus) và
+trang nhiễu (corpus.noisy_news_page); chất lượng đo trên trang nhiễu, nơi biết
+trước nội dung đúng. Chỉ tính thời gian của _extract_content (HTML đã được
+parse và gom phần tử sẵn), lặp lại nhiều lần để lấy thời gian nhỏ nhất.
+
+    precision: tỉ lệ từ lấy được thuộc nội dung đúng (thấp = lẫn menu, quảng cáo...)
+    recall: tỉ lệ từ của nội dung đúng lấy được
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from benchmarks.corpus import generate_corpus, noisy_news_page
+from config import DEFAULT_SELECTORS
+from extraction_plan import ExtractionPlan
+
+MODES = ('cũ', 'legacy', 'density')
+
+
+def old_extract_content(plan, matches):
+    """_extract_content trước khi có content_engine: nối chuỗi bằng += rồi làm sạch bằng hai regex"""
+    content = ""
+    for nodes in matches['content']:
+        if nodes:
+            for node in nodes:
+                text = plan._text(node)
+                if text:
+                    content += text + " "
+            break
+
+    if not content:
+        if matches['article'] is not None:
+            content = plan._text(matches['article'])
+        elif matches['main'] is not None:
+            content = plan._text(matches['main'])
+        else:
+            for div in matches['content_divs']:
+                text = plan._text(div)
+                if len(text) > len(content):
+                    content = text
+
+    if not content:
+        return ""
+    text = re.sub(r'\n+', ' ', content)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def scores(extracted, expected):
+    """(precision, recall) theo túi từ"""
+    got, want = Counter(extracted.lower().split()), Counter(expected.lower().split())
+    common = sum((got & want).values())
+    precision = common / sum(got.values()) if got else 0.0
+    recall = common / sum(want.values()) if want else 1.0
+    return precision, recall
+
+
+def prepare(pages, backend):
+    """Parse và gom phần tử sẵn cho từng chế độ (mỗi plan cần chỉ mục selector riêng)"""
+    prepared = {}
+    for mode in MODES:
+        plan = ExtractionPlan(DEFAULT_SELECTORS['title'], DEFAULT_SELECTORS['content'], backend,
+                              content_engine='legacy' if mode == 'cũ' else mode)
+        documents = []
+        for html in pages:
+            document = plan.parse(html)
+            matches = plan._collect_selectolax(document) if backend == 'selectolax' else plan._collect_soup(document)
+            # Giữ document để node của selectolax không bị giải phóng
+            documents.append((document, matches))
+        prepared[mode] = (plan, documents)
+    return prepared
+
+
+def run(plan, documents, mode):
+    if mode == 'cũ':
+        return [old_extract_content(plan, matches) for _, matches in documents]
+    return [plan._extract_content(matches) for _, matches in documents]
+
+
+def measure(prepared, repeat):
+    """Số trang/giây của từng chế độ, lấy lần nhanh nhất"""
+    rates = {}
+    for mode, (plan, documents) in prepared.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(plan, documents, mode)
+            best = min(best, time.perf_counter() - start)
+        rates[mode] = len(documents) / best
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=400, help='Số trang mỗi bộ')
+    parser.add_argument('--parser', nargs='+', default=['html.parser', 'lxml'],
+                        help='Các backend cần đo: html.parser, lxml, html5lib, selectolax')
+    parser.add_argument('--repeat', type=int, default=5, help='Số lần lặp khi đo tốc độ')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    news = list(generate_corpus(news=args.pages, listing=0, huge=0, malformed=0, seed=args.seed).values())
+    rng = random.Random(args.seed)
+    noisy = [noisy_news_page(rng, i) for i in range(args.pages)]
+    noisy_pages = [html for html, _ in noisy]
+
+    print(f"{'parser':<12} {'chế độ':<8} {'tin (trang/s)':>14} {'nhiễu (trang/s)':>16} "
+          f"{'precision':>10} {'recall':>8} {'F1':>6}")
+    for backend in args.parser:
+        news_rates = measure(prepare(news, backend), args.repeat)
+        prepared = prepare(noisy_pages, backend)
+        noisy_rates = measure(prepared, args.repeat)
+        for mode in MODES:
+            plan, documents = prepared[mode]
+            results = [scores(text, expected) for text, (_, expected) in zip(run(plan, documents, mode), noisy)]
+            precision = sum(p for p, _ in results) / len(results)
+            recall = sum(r for _, r in results) / len(results)
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            print(f"{backend:<12} {mode:<8} {news_rates[mode]:>14.0f} {noisy_rates[mode]:>16.0f} "
+                  f"{precision:>10.3f} {recall:>8.3f} {f1:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
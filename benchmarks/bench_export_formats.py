@@ -0,0 +1,73 @@
+"""
+So sánh ghi/đọc kết quả cào giữa Excel, CSV và Parquet
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_export_formats --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from data_manager import DataManager
+
+
+def generate_records(rows):
+    """Tạo bản ghi giả lập có cột content dài và danh sách images"""
+    for i in range(rows):
+        yield {
+            'url': f"https://example.com/bai-viet/{i}",
+            'title': f"Tiêu đề bài viết số {i}",
+            'content': f"Nội dung bài viết {i}. " * 40,
+            'date': '2024-01-01T08:00:00',
+            'images': [f"https://example.com/anh/{i}-{k}.jpg" for k in range(i % 5)],
+            'timestamp': '2024-01-01 08:00:00'
+        }
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:32s} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Số bản ghi')
+    parser.add_argument('--skip-excel', action='store_true', help='Bỏ qua Excel (rất chậm với nhiều dòng)')
+    args = parser.parse_args()
+
+    dm = DataManager()
+    records = list(generate_records(args.rows))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {fmt: os.path.join(tmp, f"ket_qua.{fmt}") for fmt in ('xlsx', 'csv', 'parquet')}
+
+        if not args.skip_excel:
+            print("Excel")
+            timed("ghi (save_to_excel)", lambda: dm.save_to_excel(records, paths['xlsx']))
+            timed("đọc toàn bộ (load_from_excel)", lambda: dm.load_from_excel(paths['xlsx']))
+
+        print("CSV")
+        timed("ghi (export_to_csv)", lambda: dm.export_to_csv(records, paths['csv']))
+        timed("đọc toàn bộ (read_csv)", lambda: pd.read_csv(paths['csv']))
+        timed("đọc url, title (read_csv)", lambda: pd.read_csv(paths['csv'], usecols=['url', 'title']))
+
+        print("Parquet")
+        timed("ghi (save_to_parquet)", lambda: dm.save_to_parquet(iter(records), paths['parquet']))
+        timed("đọc toàn bộ (load_from_parquet)", lambda: dm.load_from_parquet(paths['parquet']))
+        timed("đọc url, title theo phần", lambda: sum(
+            len(chunk) for chunk in dm.iter_parquet(paths['parquet'], columns=['url', 'title'])
+        ))
+
+        print("Kích thước file")
+        for fmt, path in paths.items():
+            if os.path.exists(path):
+                print(f"  {fmt:8s} {os.path.getsize(path) / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
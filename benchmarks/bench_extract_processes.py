@@ -0,0 +1,75 @@
+"""
+Đo tốc độ cào khi trích xuất trong thread tải trang so với pool nhiều tiến trình
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_extract_processes --news 2000 --processes 0 1 2 4 8
+
+Server phục vụ bộ trang chạy trong tiến trình riêng để không tranh GIL với
+tiến trình đang đo.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from web_scraper import WebScraper
+
+
+def _serve(args, queue):
+    from benchmarks.corpus import generate_corpus
+    from benchmarks.local_server import LocalServer
+
+    corpus = generate_corpus(news=args['news'], listing=args['listing'], huge=0, malformed=0)
+    with LocalServer(corpus) as server:
+        queue.put((server.url(''), list(corpus)))
+        # Phục vụ đến khi tiến trình chính kết thúc tiến trình này
+        threading.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--news', type=int, default=2000, help='Số trang tin tức')
+    parser.add_argument('--listing', type=int, default=100, help='Số trang danh sách sản phẩm')
+    parser.add_argument('--workers', type=int, default=64, help='Số thread tải trang')
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=[0] + [n for n in (1, 2, 4, 8, 16, 32) if n <= (os.cpu_count() or 1)],
+                        help='Các số tiến trình cần đo (0 = trích xuất trong thread tải trang)')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=({'news': args.news, 'listing': args.listing}, queue),
+                                     daemon=True)
+    server.start()
+    base_url, paths = queue.get()
+    urls = [base_url + path for path in paths]
+
+    try:
+        baseline = None
+        for processes in args.processes:
+            scraper = WebScraper(extract_processes=processes)
+            try:
+                if processes:
+                    # Khởi động tiến trình con trước khi đo
+                    scraper.scrape_url(urls[0], 'h1', 'article')
+                start = time.perf_counter()
+                ok = sum(1 for _, data in scraper.scrape_many(
+                    urls, 'h1, .title', '.content, article',
+                    max_workers=args.workers, per_host_concurrency=args.workers, delay=0
+                ) if data)
+                elapsed = time.perf_counter() - start
+            finally:
+                scraper.close()
+
+            rate = len(urls) / elapsed
+            baseline = baseline or rate
+            label = 'trong thread' if processes == 0 else f"{processes} tiến trình"
+            print(f"{label:14s} {ok:6d} trang  {elapsed:7.2f} s  {rate:8.1f} trang/s  x{rate / baseline:.2f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
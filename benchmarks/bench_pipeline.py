@@ -0,0 +1,279 @@
+"""
+Benchmark toàn bộ đường cào (scrape_url) và xuất file trên bộ trang giả lập
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --news 1000 --parser lxml --json ket_qua.json
+    python -m benchmarks.bench_pipeline --compare HEAD~1 HEAD
+
+Bộ trang (benchmarks/corpus.py) được phục vụ qua server HTTP cục bộ. Mỗi giai
+đoạn (cào, ghi Excel, CSV, Parquet, ghi Excel theo luồng) chạy trong một tiến
+trình con riêng để đo đúng RSS đỉnh của giai đoạn đó. Với --compare, mã của
+từng commit được lấy ra bằng git worktree và chạy cùng bộ trang, cùng server.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+PHASES = ('scrape', 'excel', 'csv', 'parquet', 'stream_xlsx')
+FIELD_STAGES = ('parse', 'collect', '_extract_title', '_extract_content', '_extract_date',
+                '_extract_images', '_clean_text')
+
+
+def peak_rss_mb():
+    """RSS đỉnh của tiến trình hiện tại (MB), None nếu không đo được"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# Tiến trình con: chạy một giai đoạn với mã nguồn nằm đầu PYTHONPATH
+
+def run_scrape(base_url, paths, records_path, parser_backend):
+    """Cào tuần tự từng trang bằng scrape_url, ghi bản ghi ra JSON Lines"""
+    from config import DEFAULT_SELECTORS
+    from web_scraper import WebScraper
+
+    try:
+        from run_profiler import RunProfiler
+        profiler = RunProfiler(keep_urls=False)
+        scraper = WebScraper(parser_backend=parser_backend, profiler=profiler)
+    except (ImportError, TypeError):
+        # Commit cũ chưa có profiler hoặc chưa chọn được parser
+        profiler = None
+        scraper = WebScraper()
+
+    ok = 0
+    start = time.perf_counter()
+    with open(records_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            record = scraper.scrape_url(base_url + path, DEFAULT_SELECTORS['title'], DEFAULT_SELECTORS['content'])
+            if record:
+                ok += 1
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    seconds = time.perf_counter() - start
+
+    result = {'pages': len(paths), 'ok': ok, 'seconds': seconds, 'pages_per_sec': len(paths) / seconds}
+    if profiler is not None:
+        stages = profiler.report()['stages']
+        result['stages'] = {
+            name: {'ms_per_page': stages[name]['total'] * 1000 / len(paths), 'p95_ms': stages[name]['p95'] * 1000}
+            for name in stages
+        }
+    return result
+
+
+def run_export(phase, records_path, workdir):
+    """Ghi các bản ghi đã cào ra file theo định dạng của giai đoạn"""
+    from data_manager import DataManager
+
+    with open(records_path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    rss_before = peak_rss_mb()
+
+    dm = DataManager()
+    exporters = {
+        'excel': ('save_to_excel', 'xlsx', lambda func, filename: func(records, filename)),
+        'csv': ('export_to_csv', 'csv', lambda func, filename: func(records, filename)),
+        'parquet': ('save_to_parquet', 'parquet', lambda func, filename: func(iter(records), filename)),
+        'stream_xlsx': ('stream_to_file', 'xlsx', lambda func, filename: func(iter(records), filename)),
+    }
+    method, ext, call = exporters[phase]
+    func = getattr(dm, method, None)
+    if func is None:
+        return {'skipped': f"DataManager.{method} không có ở commit này"}
+
+    filename = os.path.join(workdir, f"{phase}.{ext}")
+    start = time.perf_counter()
+    call(func, filename)
+    seconds = time.perf_counter() - start
+    return {
+        'rows': len(records),
+        'seconds': seconds,
+        'rows_per_sec': len(records) / seconds,
+        'rss_before_mb': rss_before,
+        'file_mb': os.path.getsize(filename) / 1024 / 1024
+    }
+
+
+def child_main(args):
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    records_path = os.path.join(args.workdir, 'records.jsonl')
+    if args.phase == 'scrape':
+        with open(os.path.join(args.workdir, 'paths.json'), encoding='utf-8') as f:
+            paths = json.load(f)
+        result = run_scrape(args.base_url, paths, records_path, args.parser)
+    else:
+        result = run_export(args.phase, records_path, args.workdir)
+    result['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+# ---------------------------------------------------------------------------
+# Tiến trình chính: dựng bộ trang, server và chạy các giai đoạn
+
+def run_phases(source_root, base_url, paths, parser_backend, repeat):
+    """
+    Chạy mọi giai đoạn với mã nguồn ở source_root
+
+    Returns:
+        dict: Giai đoạn -> kết quả (lần chạy nhanh nhất trong `repeat` lần)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([source_root, ROOT]))
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, 'paths.json'), 'w', encoding='utf-8') as f:
+            json.dump(paths, f)
+
+        for phase in PHASES:
+            best = None
+            for _ in range(repeat):
+                completed = subprocess.run(
+                    [sys.executable, os.path.join(HERE, 'bench_pipeline.py'), '--phase', phase,
+                     '--workdir', workdir, '--base-url', base_url, '--parser', parser_backend],
+                    cwd=source_root, env=env, capture_output=True, text=True
+                )
+                if completed.returncode != 0:
+                    best = {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr else 'lỗi'}
+                    break
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                if best is None or result.get('seconds', 0) < best.get('seconds', 0):
+                    best = result
+            results[phase] = best
+            if phase == 'scrape' and 'error' in best:
+                break
+    return results
+
+
+def summary_rows(results):
+    """Dòng (chỉ số, giá trị) để in hoặc so sánh"""
+    rows = []
+    scrape = results.get('scrape', {})
+    if 'seconds' in scrape:
+        rows.append(('scrape: trang/giây', scrape['pages_per_sec']))
+        rows.append(('scrape: tổng thời gian (s)', scrape['seconds']))
+        rows.append(('scrape: trang thành công', scrape['ok']))
+        rows.append(('scrape: RSS đỉnh (MB)', scrape['peak_rss_mb']))
+        stages = scrape.get('stages', {})
+        for name in ('connect', 'transfer') + FIELD_STAGES:
+            if name in stages:
+                rows.append((f"scrape: {name} (ms/trang)", stages[name]['ms_per_page']))
+    for phase in PHASES[1:]:
+        result = results.get(phase, {})
+        if 'seconds' in result:
+            rows.append((f"{phase}: thời gian (s)", result['seconds']))
+            rows.append((f"{phase}: RSS đỉnh (MB)", result['peak_rss_mb']))
+        elif result:
+            rows.append((f"{phase}", 'bỏ qua' if 'skipped' in result else 'lỗi'))
+    return rows
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def print_results(results):
+    for name, value in summary_rows(results):
+        print(f"  {name:36s} {_format(value):>12s}")
+
+
+def print_comparison(label_a, results_a, label_b, results_b):
+    rows_a = dict(summary_rows(results_a))
+    rows_b = dict(summary_rows(results_b))
+    # Giữ thứ tự chỉ số, kể cả chỉ số chỉ có ở một commit (ví dụ commit cũ chưa có profiler)
+    names = list(rows_a) + [name for name in rows_b if name not in rows_a]
+    print(f"  {'Chỉ số':36s} {label_a[:12]:>12s} {label_b[:12]:>12s} {'Thay đổi':>10s}")
+    for name in names:
+        value_a, value_b = rows_a.get(name, ''), rows_b.get(name, '')
+        change = ''
+        if isinstance(value_a, (int, float)) and isinstance(value_b, (int, float)) and value_a:
+            change = f"{(value_b - value_a) / value_a * 100:+.1f}%"
+        print(f"  {name:36s} {_format(value_a):>12s} {_format(value_b):>12s} {change:>10s}")
+
+
+def checkout(ref, workdir):
+    """Lấy mã nguồn của commit vào thư mục tạm bằng git worktree"""
+    path = os.path.join(workdir, ref.replace('/', '_').replace('~', '_').replace('^', '_'))
+    subprocess.run(['git', 'worktree', 'add', '--detach', path, ref], cwd=ROOT, check=True,
+                   capture_output=True)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--news', type=int, default=300, help='Số trang tin tức')
+    parser.add_argument('--listing', type=int, default=40, help='Số trang danh sách sản phẩm')
+    parser.add_argument('--huge', type=int, default=4, help='Số trang DOM rất lớn')
+    parser.add_argument('--malformed', type=int, default=60, help='Số trang HTML hỏng')
+    parser.add_argument('--seed', type=int, default=0, help='Seed sinh bộ trang')
+    parser.add_argument('--parser', default='html.parser', help='Backend parser')
+    parser.add_argument('--repeat', type=int, default=1, help='Chạy mỗi giai đoạn N lần, lấy lần nhanh nhất')
+    parser.add_argument('--compare', nargs=2, metavar=('REF_A', 'REF_B'), help='So sánh hai commit')
+    parser.add_argument('--json', metavar='FILE', help='Ghi kết quả ra file JSON')
+    # Tham số nội bộ của tiến trình con
+    parser.add_argument('--phase', choices=PHASES, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        child_main(args)
+        return
+
+    sys.path.insert(0, ROOT)
+    from benchmarks.corpus import generate_corpus
+    from benchmarks.local_server import LocalServer
+
+    corpus = generate_corpus(args.news, args.listing, args.huge, args.malformed, args.seed)
+    paths = list(corpus)
+    print(f"Bộ trang: {len(paths)} trang, {sum(len(p.encode('utf-8')) for p in corpus.values()) / 1024 / 1024:.1f} MB")
+
+    with LocalServer(corpus) as server:
+        base_url = server.url('')
+        if not args.compare:
+            results = {'working tree': run_phases(ROOT, base_url, paths, args.parser, args.repeat)}
+            print_results(results['working tree'])
+        else:
+            results = {}
+            with tempfile.TemporaryDirectory() as workdir:
+                checkouts = []
+                try:
+                    for ref in args.compare:
+                        checkouts.append(checkout(ref, workdir))
+                        print(f"Đang chạy {ref}...")
+                        results[ref] = run_phases(checkouts[-1], base_url, paths, args.parser, args.repeat)
+                finally:
+                    for path in checkouts:
+                        subprocess.run(['git', 'worktree', 'remove', '--force', path], cwd=ROOT,
+                                       capture_output=True)
+            print_comparison(args.compare[0], results[args.compare[0]], args.compare[1], results[args.compare[1]])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+So sánh lấy sản phẩm bằng find_element từng phần tử với một script trong trang
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_selenium_extract --items 200 --repeat 5
+"""
+import argparse
+import time
+
+from benchmarks.local_server import LocalServer
+from browser_pool import create_chrome_driver
+from selenium_crawler import COLLECTORS, extract_products
+
+
+def build_listing_page(items):
+    """Tạo trang danh sách sản phẩm giả lập, một số sản phẩm thiếu giá hoặc chỉ có .price"""
+    boxes = []
+    for i in range(items):
+        if i % 10 == 0:
+            price = ''
+        elif i % 5 == 0:
+            price = f'<span class="price">{i * 1000:,}đ</span>'
+        else:
+            price = f'<span class="special-price">{i * 1000:,}đ</span>'
+        boxes.append(
+            f'<div class="product-box"><a class="product-name" href="/p/{i}">Sản phẩm {i}</a>{price}</div>'
+        )
+    return f"<html><head><title>Danh sách</title></head><body>{''.join(boxes)}</body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=200, help='Số sản phẩm trên trang')
+    parser.add_argument('--repeat', type=int, default=5, help='Số lần lặp mỗi chế độ')
+    args = parser.parse_args()
+
+    with LocalServer({'/listing': build_listing_page(args.items)}) as server:
+        url = server.url('/listing')
+        driver = create_chrome_driver(headless=True)
+        try:
+            baseline = None
+            for mode, collect in COLLECTORS.items():
+                results = extract_products(driver, url, '.product-box', '.product-name', '.special-price', mode=mode)
+                if baseline is None:
+                    baseline = results
+                elif results != baseline:
+                    print(f"CẢNH BÁO: kết quả chế độ '{mode}' khác chế độ đầu tiên")
+
+                # Chỉ tính thời gian lấy dữ liệu trên trang đã tải xong
+                durations = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    collect(driver, '.product-box', '.product-name', '.special-price')
+                    durations.append(time.perf_counter() - start)
+
+                print(f"{mode:8s} {len(results)} sản phẩm: tốt nhất {min(durations) * 1000:.1f} ms, "
+                      f"trung bình {sum(durations) / len(durations) * 1000:.1f} ms")
+        finally:
+            driver.quit()
+
+
+if __name__ == '__main__':
+    main()
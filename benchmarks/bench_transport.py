@@ -0,0 +1,80 @@
+"""
+So sánh thông lượng cào giữa Session mặc định và transport đã tinh chỉnh
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_transport --pages 2000 --per-host 16
+
+Server cục bộ phục vụ trang HTML thường kèm một số file PDF và trang rất
+lớn. Session mặc định dùng pool 10 kết nối mỗi host và tải mọi thứ; transport
+mới giữ pool theo per_host_concurrency và bỏ qua PDF, trang quá lớn.
+"""
+import argparse
+import logging
+import time
+
+import requests
+
+from benchmarks.local_server import LocalServer
+from config import REQUEST_CONFIG, TRANSPORT_CONFIG
+from run_profiler import RunProfiler
+from web_scraper import WebScraper
+
+PAGE = (
+    "<html><head><title>Bài {i}</title></head><body><h1>Tiêu đề {i}</h1>"
+    "<article>{text}</article><img src='/anh/{i}.jpg'></body></html>"
+)
+
+
+def build_pages(pages, pdf_every, huge_every, huge_bytes):
+    corpus = {}
+    for i in range(pages):
+        if pdf_every and i % pdf_every == 0:
+            corpus[f"/tai-lieu/{i}.pdf"] = (b"%PDF-1.4 " + b"0" * 2 * 1024 * 1024, 'application/pdf')
+        elif huge_every and i % huge_every == 1:
+            corpus[f"/lon/{i}"] = PAGE.format(i=i, text="x" * huge_bytes)
+        else:
+            corpus[f"/bai-viet/{i}"] = PAGE.format(i=i, text=f"Nội dung bài viết {i}. " * 50)
+    return corpus
+
+
+def run(server, paths, per_host, tuned):
+    scraper = WebScraper(profiler=RunProfiler(keep_urls=False))
+    limits = (TRANSPORT_CONFIG['max_body_bytes'], TRANSPORT_CONFIG['allowed_content_types'])
+    if not tuned:
+        session = requests.Session()
+        session.headers['User-Agent'] = REQUEST_CONFIG['user_agent']
+        scraper.session = session
+        scraper._pool_maxsize = float('inf')
+        TRANSPORT_CONFIG['max_body_bytes'] = TRANSPORT_CONFIG['allowed_content_types'] = None
+    try:
+        start = time.perf_counter()
+        ok = sum(1 for _, data in scraper.scrape_many(
+            [server.url(path) for path in paths], 'h1', 'article',
+            max_workers=per_host, per_host_concurrency=per_host, delay=0
+        ) if data)
+        elapsed = time.perf_counter() - start
+    finally:
+        TRANSPORT_CONFIG['max_body_bytes'], TRANSPORT_CONFIG['allowed_content_types'] = limits
+    return ok, elapsed, scraper.profiler.bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000, help='Số trang')
+    parser.add_argument('--per-host', type=int, default=16, help='Số request đồng thời tới server')
+    parser.add_argument('--pdf-every', type=int, default=50, help='Cứ N trang có một file PDF (0 = không có)')
+    parser.add_argument('--huge-every', type=int, default=200, help='Cứ N trang có một trang rất lớn (0 = không có)')
+    parser.add_argument('--huge-mb', type=int, default=20, help='Kích thước trang rất lớn (MB)')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    pages = build_pages(args.pages, args.pdf_every, args.huge_every, args.huge_mb * 1024 * 1024)
+    with LocalServer(pages) as server:
+        for label, tuned in (('Session mặc định', False), ('Transport tinh chỉnh', True)):
+            ok, elapsed, received = run(server, list(pages), args.per_host, tuned)
+            print(f"{label:22s} {ok:6d} trang  {elapsed:7.2f} s  {len(pages) / elapsed:8.1f} URL/s  "
+                  f"{received / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
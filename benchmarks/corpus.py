@@ -0,0 +1,207 @@
+"""
+Bộ trang HTML giả lập cho benchmark, sinh lại giống hệt nhau với cùng seed
+
+Gồm bốn loại trang:
+    news: trang tin khớp DEFAULT_SELECTORS hoặc chỉ khớp các bước dự phòng
+        (thẻ <title>, h1, og:title, article, main, div có class content...)
+    listing: trang danh sách .product-box như trang Selenium cào
+    huge: DOM rất lớn và lồng sâu
+    malformed: HTML hỏng (thẻ không đóng, đóng sai thứ tự, thuộc tính không có ngoặc)
+
+noisy_news_page sinh thêm trang tin có khối phụ (chia sẻ, quảng cáo, tin liên
+quan, bình luận, script) nằm ngay trong khối nội dung, kèm nội dung đúng để đo
+chất lượng trích xuất; không thuộc generate_corpus.
+"""
+import random
+
+WORDS = (
+    "thị trường giá vàng hôm nay tăng mạnh sau phiên giao dịch người dân đổ xô "
+    "mua bán ngân hàng lãi suất điều chỉnh chính sách mới doanh nghiệp xuất khẩu "
+    "công nghệ điện thoại ra mắt sản phẩm thành phố giao thông thời tiết mưa lớn"
+).split()
+
+# Cách đặt tiêu đề / nội dung / ngày đăng; một số chỉ khớp bước dự phòng
+TITLE_STYLES = (
+    '<h1>{text}</h1>',
+    '<div class="title">{text}</div>',
+    '<h2 class="post-title">{text}</h2>',
+    '',  # chỉ còn <title> và og:title
+)
+CONTENT_STYLES = (
+    '<div class="content">{body}</div>',
+    '<div class="post-content">{body}</div>',
+    '<article>{body}</article>',
+    '<div class="entry-content">{body}</div>',
+    '<main>{body}</main>',  # dự phòng: main
+    '<div class="box-article-detail">{body}</div>',  # dự phòng: div có class chứa "article"
+)
+DATE_STYLES = (
+    '<time datetime="2024-0{m}-1{d}T08:00:00">1{d}/0{m}/2024</time>',
+    '<span class="date">1{d}/0{m}/2024</span>',
+    '<span class="published">1{d}/0{m}/2024</span>',
+    '',  # chỉ có meta article:published_time
+)
+
+
+def _sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _paragraphs(rng, count):
+    return ''.join(
+        f"<p>{_sentence(rng, rng.randint(8, 25))}\n  {_sentence(rng)}</p>\n" for _ in range(count)
+    )
+
+
+def _images(rng, i, count):
+    tags = []
+    for k in range(count):
+        if k % 3 == 2:
+            tags.append(f'<img data-src="/anh/{i}-{k}.jpg" alt="">')
+        else:
+            tags.append(f'<img src="/anh/{i}-{k}.jpg" alt="ảnh {k}">')
+    return ''.join(tags)
+
+
+def news_page(rng, i):
+    """Trang tin tức với vị trí tiêu đề, nội dung, ngày đăng thay đổi theo i"""
+    title = f"Bài viết số {i}: {_sentence(rng, 6)}"
+    m, d = i % 9 + 1, i % 9
+    head_meta = ''
+    if i % 4 == 3:
+        head_meta += f'<meta property="og:title" content="{title}">'
+    if i % 4 == 3 or i % 7 == 0:
+        head_meta += f'<meta property="article:published_time" content="2024-0{m}-1{d}T08:00:00">'
+
+    body = _images(rng, i, rng.randint(0, 8)) + _paragraphs(rng, rng.randint(3, 30))
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title} - Báo mẫu</title>{head_meta}"
+        f"<style>.content {{ color: #333; }}</style>"
+        f"<script>window.dataLayer = [{{'page': {i}}}];</script></head><body>"
+        f"<nav><ul>{''.join(f'<li><a href=/muc/{k}>Mục {k}</a></li>' for k in range(12))}</ul></nav>"
+        f"{TITLE_STYLES[i % len(TITLE_STYLES)].format(text=title)}"
+        f"{DATE_STYLES[i % len(DATE_STYLES)].format(m=m, d=d)}"
+        f"{CONTENT_STYLES[i % len(CONTENT_STYLES)].format(body=body)}"
+        f"<aside class='related'>{_paragraphs(rng, 3)}</aside>"
+        f"<footer>{_sentence(rng)}</footer></body></html>"
+    )
+
+
+def listing_page(rng, i, items=120):
+    """Trang danh sách sản phẩm, một số sản phẩm thiếu giá hoặc chỉ có .price"""
+    boxes = []
+    for k in range(items):
+        if k % 10 == 0:
+            price = ''
+        elif k % 5 == 0:
+            price = f'<span class="price">{k * 1000:,}đ</span>'
+        else:
+            price = f'<span class="special-price">{k * 1000:,}đ</span>'
+        boxes.append(
+            f'<div class="product-box"><a class="product-name" href="/p/{i}-{k}">Sản phẩm {i}-{k}</a>'
+            f'<img data-src="/anh/sp-{i}-{k}.jpg">{price}</div>'
+        )
+    return (
+        f"<html><head><title>Danh mục {i}</title></head><body><h1>Danh mục {i}</h1>"
+        f"<div class='product-list'>{''.join(boxes)}</div></body></html>"
+    )
+
+
+# Khối chứa bài viết của trang nhiễu; {body} là nội dung và khối phụ
+NOISY_LAYOUTS = (
+    '<article>{body}</article>',
+    '<main>{body}</main>',
+    '<div class="content">{body}</div>',
+    '<div class="wrapper"><div class="col-left">{body}</div></div>',  # không có article/main
+)
+
+
+def noisy_news_page(rng, i):
+    """
+    Trang tin có khối phụ nằm trong khối nội dung
+
+    Returns:
+        tuple: (HTML, nội dung đúng: các đoạn văn của bài cách nhau bằng dấu cách)
+    """
+    sentences = [_sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(4, 20))]
+    related = ''.join(f'<li><a href="/tin/{k}">{_sentence(rng, 8)}</a></li>' for k in range(6))
+    comments = ''.join(f'<div class="comment-item"><p>{_sentence(rng, 15)}</p></div>' for _ in range(3))
+    middle = len(sentences) // 2
+    body = (
+        f'<div class="share-buttons"><a href="#">Chia sẻ Facebook</a> <a href="#">Zalo</a></div>'
+        f'<script>googletag.cmd.push(function() {{ display("ad-{i}"); }});</script>'
+        + ''.join(f'<p>{text}</p>\n' for text in sentences[:middle])
+        + f'<div class="ads"><p>Quảng cáo: {_sentence(rng, 12)}</p></div>'
+        + ''.join(f'<p>{text}</p>\n' for text in sentences[middle:])
+        + f'<div class="related-news"><h3>Tin liên quan</h3><ul>{related}</ul></div>'
+        f'<div id="comments"><h3>Bình luận</h3>{comments}</div>'
+    )
+    html = (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Bài nhiễu {i}</title>"
+        f"<script>window.dataLayer = [];</script></head><body>"
+        f"<header><nav>{''.join(f'<a href=/muc/{k}>Mục {k}</a>' for k in range(10))}</nav></header>"
+        f"<h1>Bài nhiễu {i}</h1>"
+        f"{NOISY_LAYOUTS[i % len(NOISY_LAYOUTS)].format(body=body)}"
+        f"<div class='sidebar'><p>{_sentence(rng, 20)}</p></div>"
+        f"<footer><p>{_sentence(rng, 20)}</p></footer></body></html>"
+    )
+    return html, ' '.join(sentences)
+
+
+def huge_page(rng, i, sections=2000, depth=12):
+    """DOM lớn (hàng chục nghìn phần tử) và lồng sâu"""
+    parts = []
+    for s in range(sections):
+        opening = ''.join(f'<div class="wrap-{level}">' for level in range(depth))
+        closing = '</div>' * depth
+        parts.append(
+            f"{opening}<span class='meta'>{s}</span>{_paragraphs(rng, 3)}"
+            f"<ul>{''.join(f'<li>{w}</li>' for w in rng.sample(WORDS, 10))}</ul>{closing}"
+        )
+    return (
+        f"<html><head><title>Trang lớn {i}</title></head><body><h1>Trang lớn {i}</h1>"
+        f"<article>{''.join(parts)}</article></body></html>"
+    )
+
+
+def malformed_page(rng, i):
+    """HTML hỏng kiểu thường gặp trên trang thật"""
+    variants = (
+        # Thẻ không đóng và thiếu html/body
+        f"<title>Lỗi {i}<h1>Tiêu đề hỏng {i}<div class=content><p>{_sentence(rng)}<p>{_sentence(rng)}",
+        # Đóng sai thứ tự, thẻ đóng thừa
+        f"<html><body><h1>Bài {i}</h2><div class='post-content'><b><i>{_sentence(rng)}</b></i>"
+        f"</div></div></span><p>{_sentence(rng)}</body></html></html>",
+        # Thuộc tính không có ngoặc, thẻ lạ, comment không đóng ở cuối
+        f"<html><head><meta property=og:title content=Tiêu_đề_{i}></head><body>"
+        f"<article data-x=1 class=entry-content><custom-tag>{_sentence(rng)}</custom-tag>"
+        f"<img src=/anh/{i}.jpg><p>{_sentence(rng)}</article><!-- chưa đóng",
+        # Nội dung nằm trong bảng lồng nhau không đóng
+        f"<table><tr><td><h1>Bảng {i}<td><table><tr><td class=content>{_sentence(rng)}"
+        f"<tr><td>{_sentence(rng)}</table>",
+    )
+    return variants[i % len(variants)]
+
+
+GENERATORS = {
+    'news': news_page,
+    'listing': listing_page,
+    'huge': huge_page,
+    'malformed': malformed_page,
+}
+
+
+def generate_corpus(news=300, listing=40, huge=4, malformed=60, seed=0):
+    """
+    Sinh bộ trang giả lập
+
+    Returns:
+        dict: Đường dẫn (ví dụ '/news/12') -> HTML
+    """
+    rng = random.Random(seed)
+    counts = {'news': news, 'listing': listing, 'huge': huge, 'malformed': malformed}
+    corpus = {}
+    for kind, count in counts.items():
+        for i in range(count):
+            corpus[f"/{kind}/{i}"] = GENERATORS[kind](rng, i)
+    return corpus
@@ -0,0 +1,70 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client ngắt kết nối giữa chừng (ví dụ bỏ qua file quá lớn) là bình thường
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class LocalServer:
+    """
+    Server HTTP tĩnh chạy trong thread nền, dùng cho benchmark
+
+    Args:
+        pages (dict): Đường dẫn -> nội dung (bytes hoặc str) hoặc tuple
+            (nội dung, content-type)
+    """
+
+    def __init__(self, pages):
+        self.pages = {}
+        for path, page in pages.items():
+            if not isinstance(page, tuple):
+                page = (page, 'text/html; charset=utf-8')
+            body, content_type = page
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            self.pages[path] = (body, content_type)
+
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Header và body được ghi riêng; tắt Nagle để keep-alive không bị trễ 40 ms mỗi phản hồi
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                page = pages.get(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                body, content_type = page
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _QuietServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, path):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
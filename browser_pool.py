@@ -0,0 +1,198 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from config import SELENIUM_CONFIG
+
+
+def create_chrome_driver(headless=None):
+    """Tạo một trình duyệt Chrome (undetected_chromedriver) với cấu hình mặc định"""
+    import undetected_chromedriver as uc
+
+    if headless is None:
+        headless = SELENIUM_CONFIG['headless']
+
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return uc.Chrome(options=options)
+
+
+class BrowserPool:
+    """
+    Nhóm trình duyệt dùng lại giữa các URL
+
+    Giữ tối đa `size` trình duyệt, cho các worker mượn qua `lease()`. Một
+    trình duyệt được thay mới sau `max_pages` trang hoặc khi bị crash.
+    `driver_factory` cho phép thay Chrome bằng driver khác, ví dụ khi kiểm thử
+    với server HTTP tĩnh cục bộ.
+    """
+
+    def __init__(self, size=None, max_pages=None, driver_factory=None):
+        self.size = size or SELENIUM_CONFIG['pool_size']
+        self.max_pages = max_pages or SELENIUM_CONFIG['max_pages_per_driver']
+        self.driver_factory = driver_factory or create_chrome_driver
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._closed = False
+        # None là chỗ trống, trình duyệt sẽ được tạo khi có worker mượn
+        self._idle = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def warm_up(self):
+        """Khởi động trước toàn bộ trình duyệt, song song"""
+        slots = []
+        while True:
+            try:
+                slots.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        def start(index):
+            if slots[index] is None:
+                try:
+                    slots[index] = self._new_driver()
+                except Exception as e:
+                    self.logger.error(f"Không khởi động được trình duyệt: {str(e)}")
+
+        threads = [threading.Thread(target=start, args=(i,)) for i in range(len(slots))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for driver in slots:
+            self._idle.put(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Mượn một trình duyệt trong pool
+
+        Args:
+            timeout (float): Thời gian chờ tối đa khi pool đang bận (giây)
+
+        Yields:
+            WebDriver: Trình duyệt, được trả lại pool khi thoát khỏi khối with
+        """
+        if self._closed:
+            raise RuntimeError("BrowserPool đã đóng")
+
+        driver = self._idle.get(timeout=timeout)
+        try:
+            if driver is None:
+                driver = self._new_driver()
+        except Exception:
+            self._idle.put(None)
+            raise
+
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_alive(driver)
+            raise
+        finally:
+            self._release(driver, broken)
+
+    def map(self, urls, func, stop_event=None):
+        """
+        Chạy func(driver, url) cho từng URL trên các trình duyệt của pool
+
+        Args:
+            urls (iterable): Danh sách URL
+            func (callable): Hàm xử lý một trang với trình duyệt được mượn
+            stop_event (threading.Event): Dừng nhận URL mới khi được set
+
+        Yields:
+            tuple: (url, kết quả, lỗi) theo thứ tự hoàn thành
+        """
+        work = queue.Queue()
+        for url in urls:
+            work.put(url)
+
+        results = queue.Queue()
+        done = object()
+
+        def worker():
+            try:
+                while not (stop_event and stop_event.is_set()):
+                    try:
+                        url = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        with self.lease() as driver:
+                            results.put((url, func(driver, url), None))
+                    except Exception as e:
+                        results.put((url, None, e))
+            finally:
+                results.put(done)
+
+        workers = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.size, work.qsize()))]
+        for thread in workers:
+            thread.start()
+
+        finished = 0
+        while finished < len(workers):
+            item = results.get()
+            if item is done:
+                finished += 1
+            else:
+                yield item
+
+    def close(self):
+        """Đóng toàn bộ trình duyệt trong pool"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._quit(driver)
+
+    def _new_driver(self):
+        driver = self.driver_factory()
+        with self._lock:
+            self._pages[id(driver)] = 0
+        return driver
+
+    def _release(self, driver, broken):
+        """Trả trình duyệt về pool, thay mới nếu đã crash hoặc dùng quá max_pages trang"""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+            recycle = broken or self._pages[id(driver)] >= self.max_pages
+
+        if recycle or self._closed:
+            if broken:
+                self.logger.warning("Trình duyệt bị lỗi, sẽ khởi động lại")
+            self._quit(driver)
+            driver = None
+
+        if self._closed:
+            return
+        self._idle.put(driver)
+
+    def _quit(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _is_alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
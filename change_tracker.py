@@ -0,0 +1,209 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import CHANGE_CONFIG
+from listing_plan import fingerprint
+from url_utils import normalize_url
+
+NEW = 'mới'
+CHANGED = 'thay đổi'
+REMOVED = 'đã xóa'
+
+
+def record_key(row, occurrences):
+    """Khóa của sản phẩm trong trang: tên, kèm số thứ tự nếu trang có nhiều sản phẩm cùng tên"""
+    name = row[1]
+    occurrences[name] = occurrences.get(name, 0) + 1
+    return name if occurrences[name] == 1 else f"{name}#{occurrences[name]}"
+
+
+class ChangeTracker:
+    """
+    Lưu dấu vân tay của trang và từng bản ghi giữa các lượt cào (SQLite)
+
+    Mỗi trang lưu hash của toàn bộ nội dung và hash của vùng danh sách sản
+    phẩm; mỗi bản ghi lưu hash các trường. Lượt sau so với trạng thái cũ:
+    trang có nội dung hoặc vùng danh sách không đổi thì dùng lại bản ghi cũ
+    mà không trích xuất, trang thay đổi thì so từng bản ghi để ra danh sách
+    mới / thay đổi / đã xóa.
+
+    Bản ghi chỉ được coi là đã xóa khi trang của nó được cào lại trong lượt
+    này. Trang không còn trong danh sách URL thì chỉ được phát hiện khi gọi
+    remove_missing() với danh sách URL đầy đủ của lượt cào.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or CHANGE_CONFIG['path']
+        self.logger = logging.getLogger(__name__)
+        self.stats = dict.fromkeys(
+            ('pages_unchanged', 'regions_unchanged', 'pages_changed', 'pages_removed', 'unchanged', 'new',
+             'changed', 'removed'), 0
+        )
+        self.changes = []
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                body_hash TEXT,
+                region_hash TEXT,
+                updated_at REAL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                page_key TEXT,
+                record_key TEXT,
+                record_hash TEXT,
+                record TEXT,
+                PRIMARY KEY (page_key, record_key)
+            )
+        """)
+        self._conn.commit()
+
+    def page_state(self, url):
+        """
+        Returns:
+            dict: body_hash và region_hash của lượt trước, None nếu trang chưa từng cào
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body_hash, region_hash FROM pages WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'body_hash': row[0], 'region_hash': row[1]}
+
+    def keep_page(self, url, body_hash=None):
+        """
+        Trang không đổi: trả lại bản ghi của lượt trước
+
+        Args:
+            body_hash (str): Hash nội dung mới nếu chỉ vùng danh sách không đổi
+
+        Returns:
+            list: Các bản ghi (tuple) đã lưu, theo thứ tự trong trang
+        """
+        key = normalize_url(url)
+        with self._lock:
+            if body_hash is None:
+                self.stats['pages_unchanged'] += 1
+            else:
+                self.stats['regions_unchanged'] += 1
+                self._conn.execute(
+                    "UPDATE pages SET body_hash = ?, updated_at = ? WHERE key = ?", (body_hash, time.time(), key)
+                )
+                self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT record FROM records WHERE page_key = ? ORDER BY rowid", (key,)
+            ).fetchall()
+            self.stats['unchanged'] += len(rows)
+        return [tuple(json.loads(record)) for (record,) in rows]
+
+    def update_page(self, url, body_hash, region_hash, rows):
+        """
+        Ghi trạng thái mới của trang và so từng bản ghi với lượt trước
+
+        Trang không có bản ghi nào (ví dụ trang lỗi, trang chặn bot) không
+        được ghi, để bản ghi cũ không bị coi là đã xóa.
+
+        Returns:
+            list: Các thay đổi (loại, bản ghi, bản ghi cũ) của trang
+        """
+        if not rows:
+            self.logger.warning(f"{url}: không có bản ghi nào, giữ nguyên trạng thái lượt trước")
+            return []
+
+        key = normalize_url(url)
+        changes = []
+        occurrences = {}
+        with self._lock:
+            old = {
+                rkey: (rhash, record) for rkey, rhash, record in self._conn.execute(
+                    "SELECT record_key, record_hash, record FROM records WHERE page_key = ?", (key,)
+                )
+            }
+            self._conn.execute("DELETE FROM records WHERE page_key = ?", (key,))
+
+            for row in rows:
+                rkey = record_key(row, occurrences)
+                rhash = fingerprint(*(str(value) for value in row[1:]))
+                previous = old.pop(rkey, None)
+                if previous is None:
+                    changes.append((NEW, row, None))
+                elif previous[0] != rhash:
+                    changes.append((CHANGED, row, tuple(json.loads(previous[1]))))
+                else:
+                    self.stats['unchanged'] += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO records (page_key, record_key, record_hash, record) VALUES (?, ?, ?, ?)",
+                    (key, rkey, rhash, json.dumps(row, ensure_ascii=False))
+                )
+            for _, record in old.values():
+                changes.append((REMOVED, tuple(json.loads(record)), None))
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, body_hash, region_hash, updated_at) VALUES (?, ?, ?, ?)",
+                (key, body_hash, region_hash, time.time())
+            )
+            self._conn.commit()
+
+            self.stats['pages_changed'] += 1
+            for change, _, _ in changes:
+                self.stats[{NEW: 'new', CHANGED: 'changed', REMOVED: 'removed'}[change]] += 1
+            self.changes.extend(changes)
+        return changes
+
+    def remove_missing(self, urls):
+        """
+        Trang đã theo dõi nhưng không có trong `urls`: mọi bản ghi của trang là
+        đã xóa, trạng thái của trang bị bỏ
+
+        Chỉ gọi khi `urls` là danh sách URL đầy đủ của lượt cào và lượt cào
+        không bị dừng giữa chừng; trang có trong `urls` nhưng tải lỗi vẫn giữ
+        nguyên trạng thái.
+
+        Returns:
+            list: Các thay đổi (đã xóa, bản ghi, None)
+        """
+        keys = {normalize_url(url) for url in urls}
+        changes = []
+        with self._lock:
+            missing = [key for (key,) in self._conn.execute("SELECT key FROM pages") if key not in keys]
+            for key in missing:
+                rows = self._conn.execute(
+                    "SELECT record FROM records WHERE page_key = ? ORDER BY rowid", (key,)
+                ).fetchall()
+                changes.extend((REMOVED, tuple(json.loads(record)), None) for (record,) in rows)
+                self._conn.execute("DELETE FROM records WHERE page_key = ?", (key,))
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._conn.commit()
+
+            self.stats['pages_removed'] += len(missing)
+            self.stats['removed'] += len(changes)
+            self.changes.extend(changes)
+        if missing:
+            self.logger.info(f"{len(missing)} trang không còn trong danh sách URL, {len(changes)} bản ghi đã xóa")
+        return changes
+
+    def summary_rows(self):
+        """Dòng thống kê thay đổi cho sheet Thống kê"""
+        stats = self.stats
+        return {
+            'Trang không đổi (bỏ qua parse)': stats['pages_unchanged'],
+            'Trang chỉ đổi ngoài danh sách (bỏ qua trích xuất)': stats['regions_unchanged'],
+            'Trang có thay đổi': stats['pages_changed'],
+            'Trang không còn trong danh sách': stats['pages_removed'],
+            'Bản ghi mới': stats['new'],
+            'Bản ghi thay đổi': stats['changed'],
+            'Bản ghi đã xóa': stats['removed'],
+            'Bản ghi không đổi': stats['unchanged']
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -3,11 +3,35 @@
 # Cấu hình request
 REQUEST_CONFIG = {
     'timeout': 30,  # Timeout cho mỗi request (giây)
+    'connect_timeout': 10,  # Timeout kết nối, ngắn hơn để host chết không giữ worker lâu (giây)
     'delay': 1,     # Delay giữa các request (giây)
+    'max_delay': 60,  # Delay tối đa cho một host khi bị giới hạn tốc độ (429/503) (giây)
     'max_retries': 3,  # Số lần thử lại tối đa
+    'backoff_base': 1,  # Thời gian chờ trước lần thử lại đầu tiên, nhân đôi sau mỗi lần (giây)
+    'backoff_max': 60,  # Thời gian chờ tối đa giữa hai lần thử; Retry-After dài hơn thì bỏ cuộc (giây)
+    'max_workers': 16,  # Số request đồng thời tối đa cho toàn bộ lượt cào
+    'per_host_concurrency': 2,  # Số request đồng thời tối đa cho mỗi host
     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+# Cấu hình ngắt mạch theo host: ngừng gửi request tới host lỗi liên tục
+CIRCUIT_CONFIG = {
+    'failure_threshold': 5,  # Số lần lỗi liên tiếp để ngắt mạch
+    'reset_timeout': 30,  # Sau thời gian này gửi một request thử (giây), nhân đôi mỗi lần thử thất bại
+    'max_reset_timeout': 300,  # Thời gian ngắt mạch tối đa (giây)
+    'max_trips': 3  # Ngắt mạch quá số lần này thì bỏ qua các URL còn lại của host
+}
+
+# Cấu hình kết nối HTTP dùng chung (requests.Session)
+TRANSPORT_CONFIG = {
+    'pool_connections': 100,  # Số host giữ pool kết nối cùng lúc
+    'pool_maxsize': None,  # Số kết nối giữ lại cho mỗi host; None = theo per_host_concurrency
+    'http2': False,  # Dùng HTTP/2 cho HTTPS nếu urllib3 >= 2.3 và đã cài gói h2 (thử nghiệm)
+    'max_body_bytes': 10 * 1024 * 1024,  # Ngừng tải trang lớn hơn giới hạn này (byte); None = không giới hạn
+    # Chỉ tải nội dung có content-type thuộc danh sách; None = tải mọi loại
+    'allowed_content_types': ('text/html', 'application/xhtml+xml', 'text/plain')
+}
+
 # CSS Selector mặc định
 DEFAULT_SELECTORS = {
     'title': 'h1, .title, .post-title, meta[property="og:title"]',
@@ -16,13 +40,128 @@ DEFAULT_SELECTORS = {
     'images': 'img[src], img[data-src]'
 }
 
+# Cấu hình parser HTML
+PARSER_CONFIG = {
+    # Backend parser: 'html.parser', 'lxml', 'html5lib' (qua BeautifulSoup) hoặc 'selectolax'
+    'backend': 'html.parser',
+    # Số tiến trình trích xuất: 0 = parse ngay trong thread tải trang, None = theo số nhân CPU
+    'processes': 0,
+    'max_pending': None,  # Số trang tối đa chờ trích xuất; None = gấp đôi số tiến trình
+    # Lấy nội dung: 'density' = khối chính theo mật độ text, bỏ nav/script/quảng cáo;
+    # 'legacy' = toàn bộ text của article/main như phiên bản cũ
+    'content_engine': 'density'
+}
+
+# Cấu hình bộ selector theo tên miền (selector_profiles.SelectorProfiles)
+PROFILE_CONFIG = {
+    'path': 'selector_profiles.json',  # File JSON: tên miền -> selector title/content/date/item/name/price
+    'learn_after': 3,  # Số trang liên tiếp cùng bước thắng thì bỏ qua các bước đứng trước nó
+    'recheck_every': 50  # Cứ sau số trang này của một host lại chạy đủ các bước để phát hiện giao diện mới
+}
+
+# Cấu hình cache phản hồi HTTP
+CACHE_CONFIG = {
+    'path': 'scrape_cache.sqlite',  # File SQLite lưu cache
+    'max_bytes': 200 * 1024 * 1024,  # Dung lượng tối đa, vượt quá sẽ xóa mục lâu không dùng (LRU)
+    'ttl': 3600,  # Trong thời gian này (giây) bản ghi được dùng lại mà không gửi request
+    'max_age': 7 * 24 * 3600  # Mục cũ hơn (giây) bị xóa và tải lại đầy đủ
+}
+
+# Cấu hình cào theo liên kết từ các URL gốc
+CRAWL_CONFIG = {
+    'max_depth': 2,  # Số bước liên kết tối đa tính từ URL gốc (trang phân trang không tính)
+    'max_pages': 1000,  # Số trang tối đa mỗi lượt cào
+    'max_pagination': 100,  # Số trang phân trang tối đa đi theo từ một trang danh sách
+    'same_domain': True,  # Chỉ đi theo liên kết cùng tên miền với URL gốc (kể cả tên miền con)
+    'include_patterns': [],  # Regex; nếu có, URL phải khớp ít nhất một mẫu
+    # Regex; URL khớp bất kỳ mẫu nào bị bỏ qua (file tĩnh, trang tài khoản...)
+    'exclude_patterns': [
+        r'\.(jpe?g|png|gif|webp|svg|ico|pdf|zip|rar|mp3|mp4|avi|css|js|xml|docx?|xlsx?)$',
+        r'/(login|logout|dang-nhap|dang-ky|cart|gio-hang)\b'
+    ],
+    # Selector liên kết phân trang của trang danh sách
+    'pagination_selector': 'a[rel="next"], link[rel="next"], .pagination a, .pager a, a.next, .next a',
+    'expected_urls': 1000000,  # Số URL dự kiến, dùng để cấp phát Bloom filter
+    'error_rate': 0.001  # Tỉ lệ Bloom filter báo nhầm URL mới là đã gặp
+}
+
+# Cấu hình nhật ký cào (tiếp tục khi bị dừng giữa chừng)
+JOURNAL_CONFIG = {
+    'path': 'crawl_journal.sqlite',
+    'done_ttl': None  # Cào lại URL đã xong sau số giây này (None = không bao giờ)
+}
+
+# Cấu hình robots.txt
+ROBOTS_CONFIG = {
+    'enabled': True,  # Tuân theo robots.txt (Allow/Disallow, Crawl-delay)
+    'agent': 'web-scraping-gui',  # Tên dùng để chọn nhóm User-agent trong robots.txt
+    'ttl': 86400,  # Thời gian cache robots.txt (giây)
+    'error_ttl': 300,  # Thời gian cache khi không tải được robots.txt (giây)
+    'max_crawl_delay': 60  # Crawl-delay tối đa được áp dụng (giây)
+}
+
+# Cấu hình đọc sitemap
+SITEMAP_CONFIG = {
+    'max_depth': 3,  # Số cấp sitemap index lồng nhau tối đa
+    'batch_size': 1000,  # Số URL mỗi đợt cào
+    'spool_bytes': 1024 * 1024,  # Sitemap lớn hơn được tải ra file tạm thay vì giữ trong RAM
+    'state_path': 'sitemap_state.json'  # Thời điểm lượt cào trước, dùng cho --since last
+}
+
+# Cấu hình kiểm tra kích thước ảnh (HEAD hoặc GET một phần, không tải cả ảnh)
+IMAGE_PROBE_CONFIG = {
+    'enabled': False,  # Bật để loại pixel theo dõi và ghi kích thước ảnh (cột image_info)
+    'method': 'range',  # 'range': GET vài KB đầu để đọc kích thước, 'head': chỉ lấy dung lượng
+    'range_bytes': 32768,  # Số byte đầu tải về khi dùng 'range'
+    'max_workers': 8,  # Số request kiểm tra ảnh đồng thời (mọi host ảnh)
+    'per_host_concurrency': 2,  # Số request kiểm tra đồng thời tối đa cho mỗi host ảnh
+    'delay': 0,  # Khoảng cách tối thiểu giữa hai request kiểm tra tới cùng host ảnh (giây)
+    'cache_size': 50000,  # Số URL ảnh giữ kết quả kiểm tra
+    'min_dimension': 10,  # Loại ảnh có cạnh nhỏ hơn (pixel)
+    'min_bytes': 100  # Loại ảnh nhỏ hơn (byte)
+}
+
+# Cấu hình theo dõi thay đổi giữa các lượt cào danh sách sản phẩm
+CHANGE_CONFIG = {
+    'path': 'change_state.sqlite'  # File SQLite lưu dấu vân tay trang và bản ghi
+}
+
+# Cấu hình kho bản ghi (record_store.RecordStore)
+STORE_CONFIG = {
+    'path': 'scrape_store.sqlite',  # File kho; đuôi .duckdb thì dùng DuckDB
+    'backend': 'sqlite',  # 'sqlite' hoặc 'duckdb' (cần pip install duckdb)
+    'batch_size': 500  # Số bản ghi ghi trong một transaction
+}
+
+# Cấu hình trình duyệt Selenium
+SELENIUM_CONFIG = {
+    'headless': True,  # Chạy trình duyệt không hiển thị cửa sổ
+    'pool_size': 2,  # Số trình duyệt chạy song song
+    'max_pages_per_driver': 50,  # Khởi động lại trình duyệt sau số trang này
+    'wait_timeout': 10,  # Thời gian chờ tối đa cho selector sản phẩm (giây)
+    'extract_mode': 'script'  # 'script': một script lấy mọi sản phẩm, 'element': find_element từng sản phẩm
+}
+
+# Cấu hình render khi cần: thử HTML tĩnh trước, chỉ render bằng trình duyệt khi thiếu dữ liệu (hybrid_scraper)
+RENDER_CONFIG = {
+    'min_items': 1,  # Trang tĩnh có ít sản phẩm hơn thì coi là thiếu dữ liệu
+    'min_complete_ratio': 0.8,  # Tỉ lệ sản phẩm tối thiểu có đủ tên và giá
+    'item_ratio': 0.5,  # Trang tĩnh có ít hơn tỉ lệ này so với số sản phẩm khi render thì coi là thiếu
+    'learn_after': 3,  # Số trang liên tiếp phải render thì các URL sau của tên miền được render ngay
+    'recheck_every': 50,  # Cứ sau số URL này của tên miền cần render lại thử HTML tĩnh một lần
+    'state_path': 'render_state.json'  # File ghi nhớ tên miền cần render
+}
+
 # Cấu hình giao diện
 UI_CONFIG = {
     'window_size': '1000x700',
     'url_list_height': 6,
     'result_table_height': 15,
     'max_title_length': 50,
-    'max_content_length': 100
+    'max_content_length': 100,
+    'refresh_interval_ms': 100,  # Chu kỳ cập nhật bảng kết quả khi đang cào
+    'rows_per_refresh': 500,  # Số dòng tối đa nhận vào mỗi lần cập nhật
+    'page_size': 200  # Số dòng hiển thị trên một trang của bảng kết quả
 }
 
 # Cấu hình file Excel
@@ -35,6 +174,12 @@ EXCEL_CONFIG = {
     'max_images_per_url': 5
 }
 
+# Cấu hình file Parquet
+PARQUET_CONFIG = {
+    'batch_size': 65536,  # Số bản ghi mỗi row group khi ghi và mỗi phần khi đọc
+    'compression': 'zstd'
+}
+
 # Cấu hình logging
 LOGGING_CONFIG = {
     'level': 'INFO',
@@ -0,0 +1,246 @@
+import re
+
+from bs4 import CData, NavigableString, Tag
+
+# Thẻ không bao giờ chứa nội dung chính
+BOILERPLATE_TAGS = frozenset((
+    'script', 'style', 'noscript', 'template', 'nav', 'aside', 'footer', 'header', 'form',
+    'iframe', 'button', 'select', 'svg', 'canvas'
+))
+
+# Một class/id (cả token) của khối phụ: chia sẻ, bình luận, tin liên quan, quảng cáo...,
+# có thể kèm hậu tố khối như comment-item, share-buttons, related-news. Không khớp một
+# phần token, nên class bố cục như has-sidebar, comments-open, tag-share không bị bỏ
+NEGATIVE_TOKEN = re.compile(
+    r'(?:comments?|share|sharing|social|related|sidebar|footer|nav|navbar|menu|advert\w*|ads?|banner|promo|'
+    r'breadcrumbs?|popup|cookie|newsletter|subscribe|(?:tin-)?lien-quan|quang-cao)'
+    r'(?:[_-](?:area|bar|block|box|buttons?|container|form|icons?|items?|links?|list|news|posts?|section|'
+    r'tools?|widget|wrap|wrapper))?',
+    re.I
+)
+
+# Thẻ không có text hiển thị, bỏ qua cả khi lấy text của phần tử khớp selector
+NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+
+# Thẻ khối: text hai bên được tách bằng khoảng trắng
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'
+))
+
+# Thẻ đoạn văn dùng để chấm điểm khối chứa nội dung
+PARAGRAPH_TAGS = frozenset(('p', 'pre', 'blockquote'))
+MIN_PARAGRAPH_CHARS = 25
+
+
+def normalize_whitespace(text):
+    """Gộp mọi chuỗi khoảng trắng (kể cả xuống dòng) thành một dấu cách và bỏ khoảng trắng đầu cuối"""
+    return ' '.join(text.split())
+
+
+class _SoupTree:
+    """Truy cập cây BeautifulSoup"""
+
+    @staticmethod
+    def key(node):
+        return id(node)
+
+    @staticmethod
+    def name(node):
+        return node.name
+
+    @staticmethod
+    def marker(node):
+        """Chuỗi class và id để so với NEGATIVE_TOKEN"""
+        classes = node.get('class') or ''
+        if not isinstance(classes, str):
+            classes = ' '.join(classes)
+        return f"{classes} {node.get('id') or ''}"
+
+    @staticmethod
+    def parent(node):
+        return node.parent
+
+    @staticmethod
+    def paragraphs(root):
+        return [tag for tag in root.descendants if tag.name in PARAGRAPH_TAGS]
+
+    @staticmethod
+    def text(node):
+        return node.get_text()
+
+    @staticmethod
+    def link_chars(node):
+        return sum(len(tag.get_text()) for tag in node.descendants if tag.name == 'a')
+
+    @staticmethod
+    def strings(node, skip):
+        """
+        Các chuỗi text trong node theo thứ tự, bỏ qua thẻ mà skip(tag) trả về True;
+        trước và sau mỗi thẻ khối có một dấu cách
+        """
+        parts = []
+        # Duyệt không đệ quy để không vượt giới hạn đệ quy với DOM lồng sâu
+        stack = [(iter(node.contents), False)]
+        while stack:
+            children, block = stack[-1]
+            for child in children:
+                if isinstance(child, Tag):
+                    if skip(child):
+                        continue
+                    block = child.name in BLOCK_TAGS
+                    if block:
+                        parts.append(' ')
+                    stack.append((iter(child.contents), block))
+                    break
+                # Bỏ comment, doctype và nội dung script/style (các lớp con khác của NavigableString)
+                if type(child) is NavigableString or type(child) is CData:
+                    parts.append(child)
+            else:
+                stack.pop()
+                if block:
+                    parts.append(' ')
+        return parts
+
+
+class _LexborTree:
+    """Truy cập cây selectolax (lexbor)"""
+
+    @staticmethod
+    def key(node):
+        return node.mem_id
+
+    @staticmethod
+    def name(node):
+        return node.tag
+
+    @staticmethod
+    def marker(node):
+        attributes = node.attributes
+        return f"{attributes.get('class') or ''} {attributes.get('id') or ''}"
+
+    @staticmethod
+    def parent(node):
+        return node.parent
+
+    @staticmethod
+    def paragraphs(root):
+        return root.css(', '.join(sorted(PARAGRAPH_TAGS)))
+
+    @staticmethod
+    def text(node):
+        return node.text(deep=True)
+
+    @staticmethod
+    def link_chars(node):
+        return sum(len(a.text(deep=True)) for a in node.css('a'))
+
+    @staticmethod
+    def strings(node, skip):
+        parts = []
+        stack = [(node.iter(include_text=True), False)]
+        while stack:
+            children, block = stack[-1]
+            for child in children:
+                tag = child.tag
+                if tag == '-text':
+                    parts.append(child.text_content or '')
+                elif not tag.startswith('-'):
+                    if skip(child):
+                        continue
+                    block = tag in BLOCK_TAGS
+                    if block:
+                        parts.append(' ')
+                    stack.append((child.iter(include_text=True), block))
+                    break
+            else:
+                stack.pop()
+                if block:
+                    parts.append(' ')
+        return parts
+
+
+def visible_text(node, backend):
+    """
+    Text của node như get_text(strip=True) (từng chuỗi bỏ khoảng trắng hai đầu
+    rồi nối lại), không lấy nội dung script, style, template
+
+    get_text của html.parser và lxml đã bỏ các thẻ này nhưng html5lib và
+    text() của selectolax thì không; hàm này cho cùng kết quả với mọi backend.
+    """
+    if backend == 'selectolax':
+        if node.css_first('script, style, template') is None:
+            return node.text(strip=True)
+        tree = _LexborTree
+    else:
+        tree = _SoupTree
+    return ''.join(part.strip() for part in tree.strings(node, lambda child: tree.name(child) in NON_TEXT_TAGS))
+
+
+class ContentExtractor:
+    """
+    Lấy nội dung chính của trang theo mật độ text (kiểu Readability)
+
+    Mỗi đoạn văn (<p>, <pre>, <blockquote>) đủ dài nằm ngoài khối phụ được
+    chấm điểm theo độ dài, số dấu phẩy và tỉ lệ text không phải liên kết;
+    điểm được cộng cho thẻ cha và một nửa cho thẻ ông. Khối có điểm cao nhất
+    là nội dung chính. Text được lấy trong một lần duyệt, bỏ qua script,
+    style, nav, aside, footer, form và các khối có class/id như share,
+    related, comment, ads; các thẻ khối được tách bằng khoảng trắng.
+    """
+
+    def __init__(self, backend):
+        self._tree = _LexborTree if backend == 'selectolax' else _SoupTree
+
+    def extract(self, root):
+        """
+        Nội dung chính trong root (thường là <article>, <main> hoặc <body>)
+
+        Returns:
+            str: Text đã chuẩn hóa khoảng trắng, '' nếu không có đoạn văn nào đủ dài
+        """
+        tree = self._tree
+        root_key = tree.key(root)
+        scores = {}
+        for paragraph in tree.paragraphs(root):
+            if self._in_boilerplate(paragraph, root_key):
+                continue
+            text = tree.text(paragraph)
+            length = len(text.strip())
+            if length < MIN_PARAGRAPH_CHARS:
+                continue
+            link_density = min(tree.link_chars(paragraph) / length, 1.0)
+            score = (1 + text.count(',') + min(length // 100, 3)) * (1 - link_density)
+
+            parent = tree.parent(paragraph)
+            for node, share in ((parent, 1.0), (tree.parent(parent) if parent is not None else None, 0.5)):
+                if node is None:
+                    continue
+                entry = scores.setdefault(tree.key(node), [node, 0.0])
+                entry[1] += score * share
+                if tree.key(node) == root_key:
+                    break
+
+        if not scores:
+            return ''
+        best = max(scores.values(), key=lambda entry: entry[1])[0]
+        return self.text(best)
+
+    def text(self, node):
+        """Text của node, bỏ các khối phụ bên trong, các thẻ khối được tách bằng khoảng trắng"""
+        return normalize_whitespace(''.join(self._tree.strings(node, self._is_boilerplate)))
+
+    def _is_boilerplate(self, node):
+        tree = self._tree
+        return tree.name(node) in BOILERPLATE_TAGS or any(
+            NEGATIVE_TOKEN.fullmatch(token) for token in tree.marker(node).split()
+        )
+
+    def _in_boilerplate(self, node, root_key):
+        """Node nằm trong khối phụ (xét từ node lên tới root, không tính root)"""
+        tree = self._tree
+        while node is not None and tree.key(node) != root_key:
+            if self._is_boilerplate(node):
+                return True
+            node = tree.parent(node)
+        return False
@@ -0,0 +1,198 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import JOURNAL_CONFIG
+from url_utils import normalize_url
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CrawlJournal:
+    """
+    Nhật ký cào lưu trên đĩa (SQLite) để tiếp tục khi tiến trình bị dừng
+
+    Mỗi job có một dòng cho mỗi URL đã chuẩn hóa, với trạng thái pending, done
+    hoặc failed và kết quả đã cào. Trạng thái được ghi ngay khi thay đổi, nên
+    chạy lại cùng job sẽ bỏ qua URL đã xong và chỉ thử lại URL lỗi hoặc còn
+    dở. URL đã xong ở job khác không bị cào lại: kết quả được chép sang job
+    hiện tại, nên results() của job vẫn đủ mọi URL đã gửi. Kết quả cũ hơn
+    `done_ttl` giây (None là không hết hạn) được cào lại; `rescrape=True` cào
+    lại mọi URL đã xong. `shared=False` tắt việc dùng lại kết quả của job khác
+    (khi các job cào cùng URL với selector khác nhau).
+    """
+
+    def __init__(self, path=None, job_id='default', done_ttl=None, rescrape=False, shared=True):
+        self.path = path or JOURNAL_CONFIG['path']
+        self.job_id = job_id
+        self.done_ttl = JOURNAL_CONFIG['done_ttl'] if done_ttl is None else done_ttl
+        self.rescrape = rescrape
+        self.shared = shared
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_table()
+        self._conn.commit()
+
+    def _create_table(self):
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                job TEXT NOT NULL,
+                key TEXT NOT NULL,
+                url TEXT,
+                state TEXT,
+                attempts INTEGER DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (job, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_job_state ON urls (job, state)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_key_state ON urls (key, state)")
+
+    def submit(self, urls):
+        """
+        Ghi nhận một lô URL và trả về các URL cần cào
+
+        URL trùng (sau khi chuẩn hóa) trong lô hoặc đã xong (chưa hết hạn) ở
+        lần chạy trước bị bỏ qua.
+
+        Args:
+            urls (iterable): Danh sách URL
+
+        Returns:
+            list: Các URL cần cào, giữ thứ tự ban đầu
+        """
+        return self.resume(urls)[0]
+
+    def resume(self, urls):
+        """
+        Như submit, kèm kết quả đã lưu của các URL đã xong
+
+        Bên gọi trả lại các kết quả này cùng kết quả mới để đầu ra của lượt
+        chạy tiếp vẫn đủ mọi URL, không chỉ các URL cào trong lượt này.
+
+        Returns:
+            tuple: (URL cần cào, danh sách (url, kết quả) của URL đã xong)
+        """
+        todo = []
+        finished = []
+        seen = set()
+        skipped = copied = 0
+        now = time.time()
+        # Kết quả cập nhật trước mốc này coi như đã hết hạn
+        if self.rescrape:
+            fresh_after = float('inf')
+        elif self.done_ttl is not None:
+            fresh_after = now - self.done_ttl
+        else:
+            fresh_after = float('-inf')
+        with self._lock:
+            for url in urls:
+                key = normalize_url(url)
+                if key in seen:
+                    skipped += 1
+                    continue
+                seen.add(key)
+
+                row = self._conn.execute(
+                    "SELECT state, updated_at, url, result FROM urls WHERE job = ? AND key = ?", (self.job_id, key)
+                ).fetchone()
+                if row is not None and row[0] == DONE and row[1] >= fresh_after:
+                    finished.append((row[2], json.loads(row[3])))
+                    skipped += 1
+                    continue
+                if row is None:
+                    # Đã xong ở job khác: chép kết quả sang job này thay vì cào lại
+                    done = self._conn.execute(
+                        "SELECT url, attempts, result, updated_at FROM urls "
+                        "WHERE key = ? AND state = ? AND updated_at >= ? ORDER BY updated_at DESC LIMIT 1",
+                        (key, DONE, fresh_after)
+                    ).fetchone() if self.shared else None
+                    if done is not None:
+                        self._conn.execute(
+                            "INSERT INTO urls (job, key, url, state, attempts, result, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (self.job_id, key, done[0], DONE, done[1], done[2], done[3])
+                        )
+                        finished.append((done[0], json.loads(done[2])))
+                        copied += 1
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO urls (job, key, url, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (self.job_id, key, url, PENDING, now)
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE urls SET url = ?, state = ?, updated_at = ? WHERE job = ? AND key = ?",
+                        (url, PENDING, now, self.job_id, key)
+                    )
+                todo.append(url)
+            self._conn.commit()
+
+        if skipped:
+            self.logger.info(f"Bỏ qua {skipped} URL trùng hoặc đã cào xong")
+        if copied:
+            self.logger.info(f"Dùng lại kết quả của {copied} URL đã cào xong ở job khác")
+        return todo, finished
+
+    def mark_done(self, url, result):
+        """Ghi nhận URL đã cào xong cùng kết quả"""
+        self._update(url, DONE, json.dumps(result, ensure_ascii=False, default=str), None)
+
+    def mark_failed(self, url, error=None):
+        """Ghi nhận URL cào thất bại, sẽ được thử lại ở lần chạy sau"""
+        self._update(url, FAILED, None, str(error) if error else None)
+
+    def results(self, job_id=None):
+        """
+        Đọc lại kết quả các URL đã xong của job
+
+        Yields:
+            dict: Bản ghi đã cào
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM urls WHERE job = ? AND state = ? ORDER BY updated_at",
+                (job_id or self.job_id, DONE)
+            ).fetchall()
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def counts(self, job_id=None):
+        """Số URL theo trạng thái của job"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM urls WHERE job = ? GROUP BY state",
+                (job_id or self.job_id,)
+            ).fetchall()
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def forget(self):
+        """Xóa mọi URL của job, lượt chạy sau cào lại từ đầu"""
+        with self._lock:
+            self._conn.execute("DELETE FROM urls WHERE job = ?", (self.job_id,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, url, state, result, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET state = ?, result = ?, error = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE job = ? AND key = ?",
+                (state, result, error, time.time(), self.job_id, normalize_url(url))
+            )
+            self._conn.commit()
@@ -1,19 +1,88 @@
 import pandas as pd
+import json
 import os
-from datetime import datetime
 import logging
 
+from config import PARQUET_CONFIG
+from run_profiler import timed
+from stream_writer import RunStats, StreamingWriter
+
+
+def _import_pyarrow():
+    """Import pyarrow khi cần, báo lỗi rõ ràng nếu chưa cài"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Cần cài đặt pyarrow để đọc/ghi file Parquet: pip install pyarrow")
+    return pa, pq
+
+
+def _known_types(pa):
+    """Kiểu của các trường bản ghi đã biết, kể cả trường phụ chỉ có khi bật tính năng tương ứng"""
+    return {
+        'url': pa.string(),
+        'title': pa.string(),
+        'content': pa.string(),
+        'date': pa.string(),
+        'images': pa.list_(pa.string()),
+        'timestamp': pa.string(),
+        # Khi cào theo liên kết (link_selector)
+        'links': pa.list_(pa.string()),
+        'next_pages': pa.list_(pa.string()),
+        # Khi kiểm tra ảnh (ImageProbe)
+        'image_info': pa.list_(pa.struct([
+            ('url', pa.string()), ('status', pa.int64()), ('bytes', pa.int64()), ('width', pa.int64()),
+            ('height', pa.int64()), ('content_type', pa.string())
+        ]))
+    }
+
+
+def _record_schema(pa, table):
+    """
+    Schema của file theo lô đầu tiên, với kiểu cố định cho các trường đã biết
+
+    Trường lạ chỉ có giá trị rỗng trong lô đầu (kiểu null) được lưu thành chuỗi,
+    để lô sau có giá trị vẫn ghi được.
+    """
+    known = _known_types(pa)
+    fields = []
+    for f in table.schema:
+        field_type = known.get(f.name, f.type)
+        if pa.types.is_null(field_type):
+            field_type = pa.string()
+        fields.append(pa.field(f.name, field_type))
+    return pa.schema(fields)
+
+
+def _coerce_batch(pa, batch, schema):
+    """
+    Tạo bảng theo schema đã cố định khi lô có giá trị khác kiểu: cột chuỗi
+    nhận giá trị khác kiểu dưới dạng JSON, các cột khác ép kiểu như bình thường
+    """
+    columns = []
+    for field in schema:
+        values = [record.get(field.name) for record in batch]
+        if pa.types.is_string(field.type):
+            values = [value if value is None or isinstance(value, str)
+                      else json.dumps(value, ensure_ascii=False, default=str) for value in values]
+        columns.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
 class DataManager:
-    def __init__(self):
+    def __init__(self, profiler=None):
         self.logger = logging.getLogger(__name__)
+        self.profiler = profiler
     
-    def save_to_excel(self, data, filename):
+    def save_to_excel(self, data, filename, extra_stats=None):
         """
         Lưu dữ liệu ra file Excel
         
         Args:
             data (list): Danh sách dữ liệu cần lưu
             filename (str): Tên file Excel
+            extra_stats (dict): Các dòng thống kê bổ sung cho sheet Thống kê
+                (ví dụ ResponseCache.summary_rows())
         """
         try:
             if not data:
@@ -23,15 +92,18 @@ class DataManager:
             df = pd.DataFrame(data)
             
             # Tạo writer object
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+            with timed(self.profiler, 'save_to_excel'), pd.ExcelWriter(filename, engine='openpyxl') as writer:
                 # Sheet chính chứa dữ liệu
                 df.to_excel(writer, sheet_name='Dữ liệu', index=False)
                 
+                # Thống kê được tính trong một lần duyệt dữ liệu
+                stats = RunStats.from_records(data)
+                
                 # Sheet thống kê
-                self._create_summary_sheet(writer, data)
+                self._create_summary_sheet(writer, stats, extra_stats)
                 
                 # Sheet cấu hình
-                self._create_config_sheet(writer, data)
+                self._create_config_sheet(writer, stats)
             
             self.logger.info(f"Đã lưu dữ liệu vào file: {filename}")
             
@@ -39,56 +111,54 @@ class DataManager:
             self.logger.error(f"Lỗi khi lưu file Excel: {str(e)}")
             raise
     
-    def _create_summary_sheet(self, writer, data):
+    def _create_summary_sheet(self, writer, stats, extra_stats=None):
         """Tạo sheet thống kê"""
-        summary_data = {
-            'Thông tin': [
-                'Tổng số URL đã cào',
-                'Số URL thành công',
-                'Số URL thất bại',
-                'Ngày tạo file',
-                'Thời gian tạo'
-            ],
-            'Giá trị': [
-                len(data),
-                len([d for d in data if d.get('title')]),
-                len([d for d in data if not d.get('title')]),
-                datetime.now().strftime('%Y-%m-%d'),
-                datetime.now().strftime('%H:%M:%S')
-            ]
-        }
-        
-        summary_df = pd.DataFrame(summary_data)
+        summary_df = pd.DataFrame(stats.summary_rows(extra_stats), columns=['Thông tin', 'Giá trị'])
         summary_df.to_excel(writer, sheet_name='Thống kê', index=False)
     
-    def _create_config_sheet(self, writer, data):
+    def _create_config_sheet(self, writer, stats):
         """Tạo sheet cấu hình"""
-        if not data:
+        config_rows = stats.config_rows()
+        if not config_rows:
             return
         
-        # Lấy thông tin từ dữ liệu đầu tiên
-        first_data = data[0]
-        
-        config_data = {
-            'Thông số': [
-                'URL mẫu',
-                'Tiêu đề mẫu',
-                'Độ dài nội dung trung bình',
-                'Số hình ảnh trung bình',
-                'Định dạng ngày'
-            ],
-            'Giá trị': [
-                first_data.get('url', ''),
-                first_data.get('title', '')[:50] + '...' if len(first_data.get('title', '')) > 50 else first_data.get('title', ''),
-                f"{sum(len(d.get('content', '')) for d in data) // len(data)} ký tự",
-                f"{sum(len(d.get('images', [])) for d in data) // len(data)} hình",
-                'YYYY-MM-DD HH:MM:SS'
-            ]
-        }
-        
-        config_df = pd.DataFrame(config_data)
+        config_df = pd.DataFrame(config_rows, columns=['Thông số', 'Giá trị'])
         config_df.to_excel(writer, sheet_name='Cấu hình', index=False)
     
+    def open_stream(self, filename, extra_stats=None):
+        """
+        Mở file để ghi bản ghi dần dần trong khi đang cào
+        
+        Args:
+            filename (str): Tên file .csv, .jsonl hoặc .xlsx
+            extra_stats (dict): Các dòng thống kê bổ sung cho sheet Thống kê
+            
+        Returns:
+            StreamingWriter: Đối tượng ghi, gọi write() cho từng bản ghi và close() khi xong
+        """
+        return StreamingWriter(filename, extra_stats=extra_stats, profiler=self.profiler)
+    
+    def stream_to_file(self, records, filename, extra_stats=None):
+        """
+        Ghi bản ghi từ một iterator ra file mà không giữ toàn bộ trong bộ nhớ
+        
+        Args:
+            records (iterable): Các bản ghi (dict), có thể là generator
+            filename (str): Tên file .csv, .jsonl hoặc .xlsx
+            extra_stats (dict): Các dòng thống kê bổ sung cho sheet Thống kê
+            
+        Returns:
+            RunStats: Thống kê cộng dồn của các bản ghi đã ghi
+        """
+        try:
+            with self.open_stream(filename, extra_stats) as writer:
+                writer.write_all(records)
+            return writer.stats
+            
+        except Exception as e:
+            self.logger.error(f"Lỗi khi ghi file {filename}: {str(e)}")
+            raise
+    
     def load_from_excel(self, filename):
         """
         Đọc dữ liệu từ file Excel
@@ -125,14 +195,125 @@ class DataManager:
             filename (str): Tên file CSV
         """
         try:
-            df = pd.DataFrame(data)
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
+            with timed(self.profiler, 'export_to_csv'):
+                df = pd.DataFrame(data)
+                df.to_csv(filename, index=False, encoding='utf-8-sig')
             self.logger.info(f"Đã xuất dữ liệu ra file CSV: {filename}")
             
         except Exception as e:
             self.logger.error(f"Lỗi khi xuất file CSV: {str(e)}")
             raise
     
+    def save_to_parquet(self, data, filename, batch_size=None):
+        """
+        Lưu dữ liệu ra file Parquet theo từng nhóm dòng
+        
+        Cột images được giữ nguyên kiểu list. Dữ liệu có thể là generator,
+        mỗi lần chỉ giữ `batch_size` bản ghi trong bộ nhớ.
+        
+        Args:
+            data (iterable): Các bản ghi (dict)
+            filename (str): Tên file Parquet
+            batch_size (int): Số bản ghi mỗi row group
+            
+        Returns:
+            int: Số bản ghi đã ghi
+        """
+        pa, pq = _import_pyarrow()
+        batch_size = batch_size or PARQUET_CONFIG['batch_size']
+        
+        try:
+            writer = None
+            schema = None
+            count = 0
+            batch = []
+            dropped = set()
+            
+            def flush():
+                nonlocal writer, schema
+                with timed(self.profiler, 'save_to_parquet'):
+                    if writer is None:
+                        schema = _record_schema(pa, pa.Table.from_pylist(batch))
+                        writer = pq.ParquetWriter(filename, schema, compression=PARQUET_CONFIG['compression'])
+                    else:
+                        new_columns = set().union(*batch) - set(schema.names) - dropped
+                        if new_columns:
+                            dropped.update(new_columns)
+                            self.logger.warning(f"Bỏ cột chỉ xuất hiện sau lô đầu: {', '.join(sorted(new_columns))}")
+                    try:
+                        table = pa.Table.from_pylist(batch, schema=schema)
+                    except (pa.ArrowInvalid, pa.ArrowTypeError):
+                        # Giá trị khác kiểu với schema đã cố định (ví dụ trường lạ rỗng ở lô đầu)
+                        table = _coerce_batch(pa, batch, schema)
+                    writer.write_table(table)
+                batch.clear()
+            
+            try:
+                for record in data:
+                    batch.append(record)
+                    count += 1
+                    if len(batch) >= batch_size:
+                        flush()
+                if batch:
+                    flush()
+            finally:
+                if writer is not None:
+                    writer.close()
+            
+            if count == 0:
+                raise ValueError("Không có dữ liệu để lưu")
+            
+            self.logger.info(f"Đã lưu {count} bản ghi vào file Parquet: {filename}")
+            return count
+            
+        except Exception as e:
+            self.logger.error(f"Lỗi khi lưu file Parquet: {str(e)}")
+            raise
+    
+    def iter_parquet(self, filename, columns=None, batch_size=None):
+        """
+        Đọc file Parquet theo từng phần
+        
+        Args:
+            filename (str): Tên file Parquet
+            columns (list): Chỉ đọc các cột này (ví dụ bỏ qua cột content)
+            batch_size (int): Số bản ghi mỗi phần
+            
+        Yields:
+            list: Danh sách bản ghi (dict) của từng phần
+        """
+        _, pq = _import_pyarrow()
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Không tìm thấy file: {filename}")
+        
+        parquet_file = pq.ParquetFile(filename)
+        for batch in parquet_file.iter_batches(batch_size=batch_size or PARQUET_CONFIG['batch_size'],
+                                               columns=columns):
+            yield batch.to_pylist()
+    
+    def load_from_parquet(self, filename, columns=None):
+        """
+        Đọc toàn bộ dữ liệu từ file Parquet
+        
+        Args:
+            filename (str): Tên file Parquet
+            columns (list): Chỉ đọc các cột này
+            
+        Returns:
+            list: Danh sách dữ liệu
+        """
+        try:
+            data = []
+            for chunk in self.iter_parquet(filename, columns):
+                data.extend(chunk)
+            
+            self.logger.info(f"Đã đọc dữ liệu từ file: {filename}")
+            return data
+            
+        except Exception as e:
+            self.logger.error(f"Lỗi khi đọc file Parquet: {str(e)}")
+            raise
+    
     def validate_data(self, data):
         """
         Kiểm tra tính hợp lệ của dữ liệu
@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from config import PARSER_CONFIG
+from extraction_plan import ExtractionPlan
+
+# Plan đã biên dịch trong từng tiến trình con, theo bộ selector và backend
+_plans = {}
+
+
+def _extract_in_process(html, url, title_selector, content_selector, backend, link_selector, date_selector=None,
+                        content_engine=None):
+    """Chạy trong tiến trình con: parse và trích xuất một trang"""
+    key = (title_selector, content_selector, backend, link_selector, date_selector, content_engine)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = ExtractionPlan(title_selector, content_selector, backend, link_selector,
+                                            content_engine=content_engine, date_selector=date_selector)
+    return plan.extract(html, url)
+
+
+class PendingExtraction:
+    """
+    Trang đã tải xong, bản ghi chưa được tạo: đang trích xuất trong pool tiến
+    trình, hoặc đã trích xuất nhưng còn chờ kiểm tra ảnh
+
+    Thread tải trang trả về đối tượng này thay vì chờ kết quả, để bộ điều phối
+    trả lại lượt của host và của worker ngay. finish(fields) tạo bản ghi từ
+    kết quả trích xuất.
+    """
+
+    def __init__(self, future, finish):
+        self.future = future
+        self.finish = finish
+
+    @classmethod
+    def ready(cls, fields, finish):
+        """Trang đã trích xuất xong, chỉ còn bước finish"""
+        future = Future()
+        future.set_result(fields)
+        return cls(future, finish)
+
+    def result(self):
+        """Chờ trích xuất xong và trả về bản ghi"""
+        return self.finish(self.future.result())
+
+
+class ExtractionPool:
+    """
+    Trích xuất trong nhiều tiến trình để parse HTML dùng được mọi nhân CPU
+
+    Thread tải trang (I/O) gửi nội dung thô sang pool tiến trình (CPU) và nhận
+    lại future, không chờ kết quả. Số trang đang chờ trích xuất bị giới hạn bởi
+    `max_pending`: bộ điều phối không tải thêm trang khi hàng đợi đầy (full()),
+    và submit() chặn khi vượt giới hạn, tránh dồn nội dung thô trong bộ nhớ.
+    """
+
+    def __init__(self, processes=None, max_pending=None):
+        self.processes = processes or PARSER_CONFIG['processes'] or os.cpu_count() or 1
+        self.max_pending = max_pending or PARSER_CONFIG['max_pending'] or 2 * self.processes
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = ProcessPoolExecutor(max_workers=self.processes)
+
+    def submit(self, html, url, title_selector, content_selector, backend=None, link_selector=None,
+               date_selector=None, content_engine=None):
+        """
+        Gửi một trang sang tiến trình con, chặn nếu đã có `max_pending` trang đang chờ
+
+        Returns:
+            Future: Kết quả là các trường như ExtractionPlan.extract
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(
+                _extract_in_process, html, url, title_selector, content_selector,
+                backend or PARSER_CONFIG['backend'], link_selector, date_selector, content_engine
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def extract(self, *args, **kwargs):
+        """Trích xuất một trang trong tiến trình con, chặn đến khi có kết quả (tham số như submit)"""
+        return self.submit(*args, **kwargs).result()
+
+    def full(self):
+        """Đã có `max_pending` trang đang chờ trích xuất"""
+        with self._lock:
+            return self._pending >= self.max_pending
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
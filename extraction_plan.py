@@ -0,0 +1,542 @@
+from functools import partial
+import re
+from urllib.parse import urljoin, urlparse
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+from config import EXCEL_CONFIG, PARSER_CONFIG
+from content_engine import ContentExtractor, normalize_whitespace, visible_text
+from run_profiler import timed
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Các selector ngày đăng, thử lần lượt theo thứ tự
+DATE_SELECTORS = [
+    'meta[property="article:published_time"]',
+    'meta[name="publish_date"]',
+    'meta[name="date"]',
+    'time[datetime]',
+    '.date',
+    '.published',
+    '.post-date'
+]
+
+# Bước lấy được từng trường khi không selector nào khớp (ghi trong fields['steps']); có tiền tố
+# 'fallback:' để không trùng với selector cùng tên (ví dụ selector 'h1' hay 'article' đã cấu hình)
+TITLE_FALLBACK_STEPS = ('fallback:title', 'fallback:h1', 'fallback:og:title', 'fallback:url')
+CONTENT_FALLBACK_STEPS = ('fallback:density', 'fallback:article', 'fallback:main', 'fallback:div')
+NOT_FOUND_STEP = ''
+
+CONTENT_CLASS_PATTERN = re.compile(r'content|post|article', re.I)
+
+# Thuộc tính chứa URL ảnh thật khi trang dùng lazy-load (src thường chỉ là ảnh giữ chỗ)
+LAZY_SRC_ATTRS = ('data-src', 'data-lazy-src', 'data-original', 'data-lazy')
+SRCSET_ATTRS = ('data-srcset', 'srcset')
+SRCSET_DESCRIPTOR = re.compile(r'^(\d+(?:\.\d+)?)([wx])$')
+
+
+def split_selector(selector):
+    """Tách chuỗi selector phân tách bằng dấu phẩy thành danh sách"""
+    if not selector:
+        return []
+    return [s.strip() for s in selector.split(',') if s.strip()]
+
+
+def srcset_candidates(srcset):
+    """
+    Tách srcset thành các cặp (URL, mô tả) theo quy tắc của HTML
+
+    URL có thể chứa dấu phẩy (ví dụ 'w_100,h_100.jpg'), nên chỉ dấu phẩy ở
+    cuối URL hoặc sau phần mô tả mới là dấu phân cách.
+    """
+    pos, length = 0, len(srcset)
+    while pos < length:
+        while pos < length and (srcset[pos].isspace() or srcset[pos] == ','):
+            pos += 1
+        start = pos
+        while pos < length and not srcset[pos].isspace():
+            pos += 1
+        url = srcset[start:pos]
+        descriptor = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            end = srcset.find(',', pos)
+            end = length if end == -1 else end
+            descriptor = srcset[pos:end].strip()
+            pos = end + 1
+        if url:
+            yield url, descriptor
+
+
+def best_srcset_url(srcset):
+    """URL có độ phân giải lớn nhất trong srcset ('a.jpg 480w, b.jpg 800w' -> 'b.jpg'), '' nếu không có"""
+    best, best_score = '', -1.0
+    for url, descriptor in srcset_candidates(srcset or ''):
+        if url.startswith('data:'):
+            continue
+        match = SRCSET_DESCRIPTOR.match(descriptor)
+        score = float(match.group(1)) if match else 1.0
+        if score > best_score:
+            best, best_score = url, score
+    return best
+
+
+def _soup_attr(node, name):
+    return node.get(name, '')
+
+
+def _lexbor_attr(node, name):
+    return node.attributes.get(name) or ''
+
+
+class ExtractionPlan:
+    """
+    Kế hoạch trích xuất biên dịch sẵn cho một bộ selector
+
+    Selector chỉ được tách và biên dịch một lần khi tạo plan. Với backend
+    BeautifulSoup, mọi trường được thu thập trong một lần duyệt cây DOM; thứ tự
+    fallback của từng trường giữ nguyên như cách trích xuất cũ. Bước lấy được
+    từng trường (selector đã khớp hoặc tên bước fallback) được trả về trong
+    fields['steps'].
+    """
+
+    def __init__(self, title_selector, content_selector, backend=None, link_selector=None, max_images=None,
+                 content_engine=None, date_selector=None):
+        self.backend = backend or PARSER_CONFIG['backend']
+        # 'density': lấy nội dung chính theo mật độ text, 'legacy': get_text của article/main như trước
+        self.content_engine = content_engine or PARSER_CONFIG['content_engine']
+        if self.content_engine not in ('density', 'legacy'):
+            raise ValueError(f"Cách lấy nội dung không hỗ trợ: {self.content_engine}")
+        self._content = ContentExtractor(self.backend) if self.content_engine == 'density' else None
+        # Text không gồm script, style, template với mọi backend (không sửa cây DOM)
+        self._text = partial(visible_text, backend=self.backend)
+        # Ngừng lấy ảnh khi đủ số lượng, không xử lý các thẻ <img> còn lại
+        self.max_images = EXCEL_CONFIG['max_images_per_url'] if max_images is None else max_images
+        self.title_selectors = split_selector(title_selector)
+        self.content_selectors = split_selector(content_selector)
+        # None: DATE_SELECTORS; '' thì không tìm ngày đăng
+        self.date_selectors = list(DATE_SELECTORS) if date_selector is None else split_selector(date_selector)
+        # link_selector khác None: lấy thêm mọi liên kết và các liên kết phân trang khớp selector
+        self.link_selector = link_selector
+        self.collect_links = link_selector is not None
+
+        if self.backend == 'selectolax':
+            if LexborHTMLParser is None:
+                raise ImportError("Cần cài đặt selectolax để dùng backend 'selectolax'")
+            self._attr = _lexbor_attr
+        else:
+            self._attr = _soup_attr
+            self._matchers = {
+                'title': [soupsieve.compile(s) for s in self.title_selectors],
+                'content': [soupsieve.compile(s) for s in self.content_selectors],
+                'date': [soupsieve.compile(s) for s in self.date_selectors]
+            }
+            self._next_matcher = soupsieve.compile(link_selector) if link_selector else None
+            self._build_index()
+
+    def parse(self, html):
+        """Parse HTML bằng backend đã chọn"""
+        if self.backend == 'selectolax':
+            return LexborHTMLParser(html)
+        return BeautifulSoup(html, self.backend)
+
+    def extract(self, html, url, profiler=None):
+        """
+        Trích xuất tiêu đề, nội dung, ngày đăng và hình ảnh từ HTML
+
+        Args:
+            html (bytes|str): Nội dung trang
+            url (str): URL của trang, dùng để chuyển đổi URL hình ảnh
+            profiler (RunProfiler): Ghi thời gian parse và từng bước trích xuất
+
+        Returns:
+            dict: Các trường title, content, date, images và steps (bước lấy
+                được title, content, date); thêm links và next_pages nếu plan
+                được tạo với link_selector
+        """
+        with timed(profiler, 'parse', url):
+            document = self.parse(html)
+        return self.extract_document(document, url, profiler)
+
+    def extract_document(self, document, url, profiler=None):
+        """Trích xuất các trường từ tài liệu đã parse"""
+        with timed(profiler, 'collect', url):
+            if self.backend == 'selectolax':
+                matches = self._collect_selectolax(document)
+            else:
+                matches = self._collect_soup(document)
+
+        with timed(profiler, '_extract_title', url):
+            title = self._extract_title(matches, url)
+        with timed(profiler, '_extract_content', url):
+            content = self._extract_content(matches, profiler, url)
+        with timed(profiler, '_extract_date', url):
+            date = self._extract_date(matches)
+        with timed(profiler, '_extract_images', url):
+            images = self._extract_images(matches, url)
+
+        fields = {
+            'title': title,
+            'content': content,
+            'date': date,
+            'images': images,
+            'steps': matches['steps']
+        }
+        if self.collect_links:
+            with timed(profiler, '_extract_links', url):
+                fields['links'] = self._extract_links(matches['links'], url)
+                fields['next_pages'] = self._extract_links(matches['next_pages'], url)
+        return fields
+
+    def _new_matches(self):
+        return {
+            'title': [None] * len(self.title_selectors),
+            'title_tag': None,
+            'h1': None,
+            'og_title': None,
+            'content': [[] for _ in self.content_selectors],
+            'article': None,
+            'main': None,
+            'body': None,
+            'content_divs': [],
+            'date': [None] * len(self.date_selectors),
+            'images': [],
+            'links': [],
+            'next_pages': [],
+            'steps': {}
+        }
+
+    def _build_index(self):
+        """
+        Lập chỉ mục selector theo tên thẻ, class hoặc id của phần tử đích
+
+        Nhờ chỉ mục, mỗi phần tử chỉ phải so khớp với vài selector có khả năng
+        khớp thay vì toàn bộ danh sách selector.
+        """
+        self._index = {}
+        self._wildcard = []
+        for field, matchers in self._matchers.items():
+            for i, matcher in enumerate(matchers):
+                key = self._index_key(matcher)
+                if key is None:
+                    self._wildcard.append((field, i))
+                else:
+                    self._index.setdefault(key, []).append((field, i))
+
+    def _index_key(self, matcher):
+        if len(matcher.selectors) != 1:
+            return None
+        subject = matcher.selectors[0]
+        if subject.tag is not None and subject.tag.name != '*':
+            return subject.tag.name.lower()
+        if subject.classes:
+            return '.' + subject.classes[0]
+        if subject.ids:
+            return '#' + subject.ids[0]
+        return None
+
+    def _candidates(self, tag):
+        """Lấy các selector (trường, vị trí) có thể khớp với phần tử"""
+        index = self._index
+        candidates = list(self._wildcard)
+        candidates.extend(index.get(tag.name, ()))
+
+        classes = tag.get('class')
+        if classes:
+            if isinstance(classes, str):
+                classes = classes.split()
+            for cls in classes:
+                candidates.extend(index.get('.' + cls, ()))
+
+        tag_id = tag.get('id')
+        if tag_id:
+            candidates.extend(index.get('#' + tag_id, ()))
+
+        return candidates
+
+    def _collect_soup(self, soup):
+        """Duyệt cây BeautifulSoup một lần và gom các phần tử ứng viên cho mọi trường"""
+        matches = self._new_matches()
+        titles = matches['title']
+        contents = matches['content']
+        dates = matches['date']
+        matchers = self._matchers
+        collect_links = self.collect_links
+        next_matcher = self._next_matcher
+        images = matches['images']
+        max_images = self.max_images
+
+        # Khi selector thứ i đã khớp, các selector sau nó không thể thắng nữa
+        limits = {
+            'title': len(titles),
+            'content': len(contents),
+            'date': len(dates)
+        }
+
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+
+            candidates = self._candidates(tag)
+            if candidates:
+                candidates.sort()
+                for field, i in candidates:
+                    if i >= limits[field] or not matchers[field][i].match(tag):
+                        continue
+                    if field == 'title':
+                        if titles[i] is None:
+                            titles[i] = tag
+                            limits['title'] = i
+                    elif field == 'content':
+                        contents[i].append(tag)
+                        limits['content'] = i + 1
+                    elif dates[i] is None:
+                        dates[i] = tag
+                        if self._date_value(tag):
+                            limits['date'] = i
+
+            name = tag.name
+            if name == 'img':
+                if len(images) < max_images:
+                    src = self._image_source(tag)
+                    if src and src not in images:
+                        images.append(src)
+            elif name == 'title':
+                if matches['title_tag'] is None:
+                    matches['title_tag'] = tag
+            elif name == 'h1':
+                if matches['h1'] is None:
+                    matches['h1'] = tag
+            elif name == 'meta':
+                if matches['og_title'] is None and tag.get('property') == 'og:title':
+                    matches['og_title'] = tag
+            elif name == 'article':
+                if matches['article'] is None:
+                    matches['article'] = tag
+            elif name == 'main':
+                if matches['main'] is None:
+                    matches['main'] = tag
+            elif name == 'body':
+                if matches['body'] is None:
+                    matches['body'] = tag
+            elif name == 'div' and matches['article'] is None and matches['main'] is None:
+                if self._has_content_class(tag.get('class')):
+                    matches['content_divs'].append(tag)
+            elif (name == 'a' or name == 'link') and collect_links and tag.get('href'):
+                if name == 'a':
+                    matches['links'].append(tag)
+                if next_matcher is not None and next_matcher.match(tag):
+                    matches['next_pages'].append(tag)
+
+        return matches
+
+    def _collect_selectolax(self, tree):
+        """Gom các phần tử ứng viên bằng selectolax, mỗi truy vấn chạy trong C"""
+        matches = self._new_matches()
+
+        for i, sel in enumerate(self.title_selectors):
+            node = tree.css_first(sel)
+            if node is not None:
+                matches['title'][i] = node
+                break
+
+        for i, sel in enumerate(self.content_selectors):
+            nodes = tree.css(sel)
+            if nodes:
+                matches['content'][i] = nodes
+                break
+
+        for i, sel in enumerate(self.date_selectors):
+            node = tree.css_first(sel)
+            matches['date'][i] = node
+            if node is not None and self._date_value(node):
+                break
+
+        matches['title_tag'] = tree.css_first('title')
+        matches['h1'] = tree.css_first('h1')
+        matches['og_title'] = tree.css_first('meta[property="og:title"]')
+        matches['article'] = tree.css_first('article')
+        matches['main'] = tree.css_first('main')
+        matches['body'] = tree.body
+        if matches['article'] is None and matches['main'] is None:
+            matches['content_divs'] = [
+                node for node in tree.css('div[class]')
+                if self._has_content_class(node.attributes.get('class'))
+            ]
+        images = matches['images']
+        if self.max_images:
+            for node in tree.css('img'):
+                src = self._image_source(node)
+                if src and src not in images:
+                    images.append(src)
+                    if len(images) >= self.max_images:
+                        break
+        if self.collect_links:
+            matches['links'] = tree.css('a[href]')
+            if self.link_selector:
+                matches['next_pages'] = [
+                    node for node in tree.css(self.link_selector) if node.attributes.get('href')
+                ]
+
+        return matches
+
+    def _has_content_class(self, classes):
+        """Kiểm tra class theo cùng quy tắc với find_all('div', class_=regex)"""
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            return bool(CONTENT_CLASS_PATTERN.search(classes))
+        return (any(CONTENT_CLASS_PATTERN.search(c) for c in classes)
+                or bool(CONTENT_CLASS_PATTERN.search(' '.join(classes))))
+
+    def _tag_name(self, node):
+        return node.tag if self.backend == 'selectolax' else node.name
+
+    def _date_value(self, node):
+        if self._tag_name(node) == 'meta':
+            return self._attr(node, 'content')
+        return self._attr(node, 'datetime') or self._text(node)
+
+    def _extract_title(self, matches, url):
+        """Trích xuất tiêu đề từ trang web"""
+        title = ""
+        step = 'fallback:url'
+
+        # Thử với CSS selector được cung cấp
+        for i, node in enumerate(matches['title']):
+            if node is not None:
+                title = self._text(node)
+                step = self.title_selectors[i]
+                break
+
+        # Nếu không tìm thấy, thử các selector mặc định
+        if not title and matches['title_tag'] is not None:
+            title, step = self._text(matches['title_tag']), 'fallback:title'
+        if not title and matches['h1'] is not None:
+            title, step = self._text(matches['h1']), 'fallback:h1'
+        if not title and matches['og_title'] is not None:
+            title, step = self._attr(matches['og_title'], 'content'), 'fallback:og:title'
+
+        # Nếu vẫn không có, lấy từ URL
+        if not title:
+            title, step = urlparse(url).netloc, 'fallback:url'
+
+        matches['steps']['title'] = step
+        return title
+
+    def _extract_content(self, matches, profiler=None, url=None):
+        """Trích xuất nội dung từ trang web"""
+        # Phần tử khớp selector người dùng được lấy như get_text(strip=True) trước đây, không lọc khối phụ;
+        # chỉ nội dung tìm theo mật độ text mới được lọc và tách khối bằng khoảng trắng
+        parts = []
+        step = NOT_FOUND_STEP
+
+        # Thử với CSS selector được cung cấp
+        for i, nodes in enumerate(matches['content']):
+            if nodes:
+                for node in nodes:
+                    text = self._text(node)
+                    if text:
+                        parts.append(text)
+                step = self.content_selectors[i]
+                break
+        content = ' '.join(parts)
+
+        # Nếu không tìm thấy, tìm khối nội dung chính theo mật độ text
+        if not content and self._content is not None:
+            root = matches['article'] or matches['main'] or matches['body']
+            if root is not None:
+                with timed(profiler, 'content_engine', url):
+                    content = self._content.extract(root)
+                step = 'fallback:density'
+
+        # Các selector mặc định như cách trích xuất cũ
+        if not content:
+            if matches['article'] is not None:
+                content, step = self._text(matches['article']), 'fallback:article'
+            elif matches['main'] is not None:
+                content, step = self._text(matches['main']), 'fallback:main'
+            else:
+                for div in matches['content_divs']:
+                    text = self._text(div)
+                    if len(text) > len(content):
+                        content = text
+                step = 'fallback:div'
+
+        matches['steps']['content'] = step if content else NOT_FOUND_STEP
+
+        with timed(profiler, '_clean_text', url):
+            return self._clean_text(content)
+
+    def _extract_date(self, matches):
+        """Trích xuất ngày đăng từ trang web"""
+        for i, node in enumerate(matches['date']):
+            if node is not None:
+                date = self._date_value(node)
+                if date:
+                    matches['steps']['date'] = self.date_selectors[i]
+                    return date
+        matches['steps']['date'] = NOT_FOUND_STEP
+        return ""
+
+    def _image_source(self, img):
+        """
+        URL (chưa chuyển thành tuyệt đối) của ảnh trong thẻ <img>, '' nếu không có
+
+        Thứ tự: thuộc tính lazy-load, src (bỏ data: URI), ảnh lớn nhất trong
+        srcset, rồi các <source> của <picture> chứa thẻ <img>.
+        """
+        attr = self._attr
+        for name in LAZY_SRC_ATTRS:
+            src = attr(img, name).strip()
+            if src and not src.startswith('data:'):
+                return src
+        src = attr(img, 'src').strip()
+        if src and not src.startswith('data:'):
+            return src
+        for name in SRCSET_ATTRS:
+            src = best_srcset_url(attr(img, name))
+            if src:
+                return src
+
+        picture = img.parent
+        while picture is not None and self._tag_name(picture) == 'source':
+            # lxml không biết <source> là thẻ rỗng nên lồng <img> vào trong các <source>
+            picture = picture.parent
+        if picture is not None and self._tag_name(picture) == 'picture':
+            if self.backend == 'selectolax':
+                sources = picture.css('source')
+            else:
+                sources = picture.find_all('source')
+            for source in sources:
+                for name in SRCSET_ATTRS:
+                    src = best_srcset_url(attr(source, name))
+                    if src:
+                        return src
+        return ''
+
+    def _extract_images(self, matches, base_url):
+        """Chuyển URL hình ảnh đã thu thập thành URL tuyệt đối"""
+        return [urljoin(base_url, src) for src in matches['images']]
+
+    def _extract_links(self, nodes, base_url):
+        """Chuyển href thành URL tuyệt đối http(s), bỏ fragment và URL trùng"""
+        links = []
+        seen = set()
+        for node in nodes:
+            link = urljoin(base_url, self._attr(node, 'href').strip()).split('#', 1)[0]
+            if link.startswith(('http://', 'https://')) and link not in seen:
+                seen.add(link)
+                links.append(link)
+        return links
+
+    def _clean_text(self, text):
+        """Làm sạch text: gộp khoảng trắng, xuống dòng và bỏ khoảng trắng đầu cuối trong một lần duyệt"""
+        if not text:
+            return ""
+        return normalize_whitespace(text)
@@ -0,0 +1,185 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+
+from config import CIRCUIT_CONFIG, REQUEST_CONFIG
+
+# Mã trạng thái đáng thử lại; 429 và 503 còn là tín hiệu host đang giới hạn tốc độ
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def parse_retry_after(value):
+    """
+    Đọc header Retry-After (số giây hoặc ngày giờ HTTP)
+
+    Returns:
+        float: Số giây cần chờ, hoặc None nếu header trống hoặc sai định dạng
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Thời gian chờ trước lần thử lại thứ `attempt` (bắt đầu từ 0)
+
+    Tăng theo hàm mũ và được làm nhiễu (equal jitter) để nhiều worker không
+    cùng thử lại một lúc.
+    """
+    base = REQUEST_CONFIG['backoff_base'] if base is None else base
+    cap = REQUEST_CONFIG['backoff_max'] if cap is None else cap
+    ceiling = min(cap, base * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """
+    Ngắt mạch theo host
+
+    Sau `failure_threshold` lần lỗi liên tiếp (mất kết nối, timeout, 5xx) host
+    bị ngắt mạch: không gửi request nào trong `reset_timeout` giây. Hết thời
+    gian đó chỉ một request thử được gửi; thành công thì đóng mạch, thất bại
+    thì ngắt tiếp với thời gian gấp đôi. Host ngắt mạch quá `max_trips` lần
+    được coi là đã chết.
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None, max_reset_timeout=None, max_trips=None):
+        self.failure_threshold = failure_threshold or CIRCUIT_CONFIG['failure_threshold']
+        self.reset_timeout = CIRCUIT_CONFIG['reset_timeout'] if reset_timeout is None else reset_timeout
+        self.max_reset_timeout = max_reset_timeout or CIRCUIT_CONFIG['max_reset_timeout']
+        self.max_trips = max_trips or CIRCUIT_CONFIG['max_trips']
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {'state': CLOSED, 'failures': 0, 'trips': 0, 'open_until': 0.0}
+        return state
+
+    def allow(self, host):
+        """
+        Kiểm tra có được gửi request tới host không
+
+        Returns:
+            float: 0 nếu được gửi (nếu đang chờ thử lại thì request này là
+                request thử), số giây còn lại nếu mạch đang ngắt, hoặc inf nếu
+                request thử đang chạy
+        """
+        with self._lock:
+            state = self._host(host)
+            if state['state'] == CLOSED:
+                return 0
+            if state['state'] == HALF_OPEN:
+                return float('inf')
+
+            wait_time = state['open_until'] - time.monotonic()
+            if wait_time > 0:
+                return wait_time
+            state['state'] = HALF_OPEN
+            return 0
+
+    def record_success(self, host):
+        """Host phản hồi bình thường: đóng mạch và xóa bộ đếm lỗi"""
+        with self._lock:
+            state = self._host(host)
+            state.update(state=CLOSED, failures=0, trips=0)
+
+    def record_failure(self, host):
+        """
+        Ghi nhận một lần lỗi của host
+
+        Returns:
+            bool: True nếu lần lỗi này làm mạch bị ngắt
+        """
+        with self._lock:
+            state = self._host(host)
+            state['failures'] += 1
+            if state['state'] != HALF_OPEN and state['failures'] < self.failure_threshold:
+                return False
+
+            timeout = min(self.max_reset_timeout, self.reset_timeout * 2 ** state['trips'])
+            state['trips'] += 1
+            state['state'] = OPEN
+            state['open_until'] = time.monotonic() + timeout
+            return True
+
+    def release_probe(self, host):
+        """
+        Request thử kết thúc mà không cho biết host sống hay chết (bị robots.txt
+        chặn, bị dừng, lỗi trích xuất): cho phép gửi request thử khác ngay
+        """
+        with self._lock:
+            state = self._host(host)
+            if state['state'] == HALF_OPEN:
+                state['state'] = OPEN
+                state['open_until'] = time.monotonic()
+
+    def is_dead(self, host):
+        """True nếu host đã ngắt mạch quá số lần cho phép mà không hồi phục"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is not None and state['state'] == OPEN and state['trips'] >= self.max_trips
+
+
+class HostStats:
+    """Thống kê request, lỗi, thử lại và giới hạn tốc độ theo host trong một lượt cào"""
+
+    COUNTERS = ('requests', 'failures', 'retries', 'throttled', 'circuit_opens', 'skipped', 'disallowed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+        self._last_error = {}
+
+    def count(self, host, name, error=None):
+        """Tăng bộ đếm `name` của host, ghi lại lỗi gần nhất nếu có"""
+        with self._lock:
+            self._hosts[host][name] += 1
+            if error is not None:
+                self._last_error[host] = str(error)
+
+    def report(self):
+        """
+        Returns:
+            dict: {host: {bộ đếm..., 'last_error': lỗi gần nhất}}
+        """
+        with self._lock:
+            return {
+                host: dict(counters, last_error=self._last_error.get(host))
+                for host, counters in self._hosts.items()
+            }
+
+    def summary_rows(self):
+        """Dòng thống kê cho sheet Thống kê, chỉ gồm các host có lỗi hoặc URL bị robots.txt chặn"""
+        rows = {}
+        for host, info in self.report().items():
+            if info['disallowed']:
+                rows[f"Bị chặn bởi robots.txt tại {host}"] = f"{info['disallowed']} URL"
+            if not (info['failures'] or info['skipped']):
+                continue
+            rows[f"Lỗi tại {host}"] = (
+                f"{info['failures']}/{info['requests']} request lỗi, {info['retries']} lần thử lại, "
+                f"{info['throttled']} lần bị giới hạn, ngắt mạch {info['circuit_opens']} lần, "
+                f"bỏ qua {info['skipped']} URL"
+            )
+            if info['last_error']:
+                rows[f"Lỗi cuối tại {host}"] = info['last_error']
+        return rows
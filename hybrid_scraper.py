@@ -0,0 +1,425 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+
+from config import RENDER_CONFIG, ROBOTS_CONFIG
+from listing_plan import STATUS_OK
+from rate_limiter import HostRateLimiter
+from selector_profiles import host_of
+from web_scraper import IDLE_POLL_SECONDS
+
+
+class RenderMemory:
+    """
+    Ghi nhớ theo tên miền trang nào cần render bằng trình duyệt (lưu ra file JSON)
+
+    Tên miền được coi là cần render khi `learn_after` trang liên tiếp có HTML
+    tĩnh thiếu dữ liệu nhưng render thì đủ; từ đó URL của tên miền đi thẳng
+    vào hàng đợi render, trừ mỗi `recheck_every` URL lại thử HTML tĩnh một lần
+    để phát hiện trang đã chuyển sang render phía server. Số sản phẩm khi render
+    cũng được ghi lại để nhận ra trang tĩnh chỉ có một phần danh sách.
+    """
+
+    def __init__(self, path=None, learn_after=None, recheck_every=None):
+        self.path = path or RENDER_CONFIG['state_path']
+        self.learn_after = learn_after or RENDER_CONFIG['learn_after']
+        self.recheck_every = recheck_every or RENDER_CONFIG['recheck_every']
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # tên miền -> needs_render, streak (số trang liên tiếp cần render), items, routed
+        self._domains = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self._domains = json.load(f)
+
+    def _entry(self, url):
+        return self._domains.setdefault(host_of(url), {'needs_render': False, 'streak': 0, 'items': 0, 'routed': 0})
+
+    def needs_render(self, url):
+        """URL nên được render ngay, không thử HTML tĩnh"""
+        with self._lock:
+            entry = self._entry(url)
+            if not entry['needs_render']:
+                return False
+            entry['routed'] += 1
+            return entry['routed'] % self.recheck_every != 0
+
+    def expected_items(self, url):
+        """Số sản phẩm thường thấy khi render trang của tên miền, 0 nếu chưa biết"""
+        with self._lock:
+            return self._entry(url)['items']
+
+    def record_static(self, url):
+        """HTML tĩnh đủ dữ liệu: tên miền không cần render"""
+        with self._lock:
+            entry = self._entry(url)
+            if entry['needs_render']:
+                self.logger.info(f"{host_of(url)}: HTML tĩnh đã đủ dữ liệu, không render nữa")
+            entry['needs_render'] = False
+            entry['streak'] = 0
+
+    def record_render(self, url, rows, after_static):
+        """
+        Kết quả render một trang
+
+        Args:
+            rows (list): Sản phẩm lấy được khi render (None nếu lỗi)
+            after_static (bool): Trang đã thử HTML tĩnh và thiếu dữ liệu
+        """
+        with self._lock:
+            entry = self._entry(url)
+            if rows:
+                entry['items'] = max(entry['items'], len(rows))
+            if not after_static:
+                return
+            if not rows:
+                entry['streak'] = 0
+                return
+            entry['streak'] += 1
+            if not entry['needs_render'] and entry['streak'] >= self.learn_after:
+                entry['needs_render'] = True
+                self.logger.info(f"{host_of(url)}: cần render bằng trình duyệt, các URL sau không thử HTML tĩnh")
+
+    def domains(self):
+        """Các tên miền đang được render ngay"""
+        with self._lock:
+            return sorted(domain for domain, entry in self._domains.items() if entry['needs_render'])
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            data = json.dumps(self._domains, ensure_ascii=False, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+
+
+class _DeferredTracker:
+    """
+    ChangeTracker cho lượt tải tĩnh: bản ghi của trang chỉ được ghi khi HTML tĩnh đủ dữ liệu
+
+    Nếu ghi ngay, trang tĩnh thiếu sản phẩm sẽ làm các sản phẩm của lượt trước
+    bị coi là đã xóa rồi lại là mới khi bản render được ghi.
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def page_state(self, url):
+        return self.tracker.page_state(url)
+
+    def keep_page(self, url, body_hash=None):
+        return self.tracker.keep_page(url, body_hash)
+
+    def update_page(self, url, body_hash, region_hash, rows):
+        with self._lock:
+            self._pending[url] = (body_hash, region_hash, rows)
+        return []
+
+    def commit(self, url):
+        """Ghi bản ghi tĩnh của trang vào tracker"""
+        with self._lock:
+            pending = self._pending.pop(url, None)
+        if pending is not None:
+            self.tracker.update_page(url, *pending)
+
+    def discard(self, url):
+        with self._lock:
+            self._pending.pop(url, None)
+
+    def replace(self, url, rows):
+        """Ghi bản render thay cho bản ghi tĩnh của trang"""
+        self.discard(url)
+        self.tracker.update_page(url, None, None, rows)
+
+
+class HybridScraper:
+    """
+    Cào trang danh sách sản phẩm bằng HTML tĩnh trước, chỉ render bằng trình duyệt khi cần
+
+    Mỗi URL được tải bằng WebScraper (requests + parser, song song và giới hạn
+    theo host như scrape_listings). Kết quả được coi là đủ khi có ít nhất
+    `min_items` sản phẩm (và không ít hơn `item_ratio` lần số sản phẩm thường
+    thấy khi render trang của tên miền đó), đồng thời tỉ lệ sản phẩm có đủ tên
+    và giá đạt `min_complete_ratio`. URL thiếu dữ liệu được đưa vào hàng đợi
+    render, xử lý trên BrowserPool song song với các URL tĩnh còn lại; trình
+    duyệt chỉ được khởi động khi có URL đầu tiên cần render. RenderMemory ghi
+    nhớ tên miền cần render để lần sau bỏ qua bước tải tĩnh.
+    """
+
+    def __init__(self, scraper, pool=None, memory=None, min_items=None, min_complete_ratio=None, item_ratio=None):
+        self.scraper = scraper
+        self.pool = pool
+        self.memory = memory or RenderMemory()
+        self.min_items = min_items or RENDER_CONFIG['min_items']
+        self.min_complete_ratio = (RENDER_CONFIG['min_complete_ratio']
+                                   if min_complete_ratio is None else min_complete_ratio)
+        self.item_ratio = RENDER_CONFIG['item_ratio'] if item_ratio is None else item_ratio
+        self.logger = logging.getLogger(__name__)
+        self.stats = dict.fromkeys(('static', 'incomplete', 'direct', 'rendered', 'render_failed'), 0)
+        # Tổng thời gian xử lý (giây, cộng theo từng trang) của các nhóm trang
+        self.seconds = dict.fromkeys(('static', 'wasted', 'render'), 0.0)
+
+        self._lock = threading.Lock()
+        self._static_seconds = {}
+        self._owns_pool = False
+
+    def is_complete(self, url, rows):
+        """HTML tĩnh có đủ sản phẩm và đủ tên, giá hay không"""
+        if not rows or len(rows) < self.min_items:
+            return False
+        expected = self.memory.expected_items(url)
+        if expected and len(rows) < expected * self.item_ratio:
+            return False
+        complete = sum(1 for row in rows if row[3] == STATUS_OK)
+        return complete >= len(rows) * self.min_complete_ratio
+
+    def scrape_listings(self, urls, selector_item, selector_title, selector_price, tracker=None, **options):
+        """
+        Lấy danh sách sản phẩm, render bằng trình duyệt các trang mà HTML tĩnh thiếu dữ liệu
+
+        Chỉ trang tải được nhưng thiếu dữ liệu mới được render; trang lỗi, bị
+        robots.txt chặn hay thuộc host đã ngắt mạch được trả về như
+        WebScraper.scrape_listings. Lượt render tuân theo robots.txt, giới hạn
+        theo host (per_host_concurrency, delay) và được ghi vào journal.
+
+        Args:
+            tracker (ChangeTracker): Như WebScraper.scrape_listings
+            **options: Tham số như WebScraper.scrape_many (max_workers, delay, journal...)
+
+        Yields:
+            tuple: (url, danh sách tuple (url, tên, giá, trạng thái)) theo thứ
+                tự hoàn thành, None nếu thất bại
+        """
+        selectors = (selector_item, selector_title, selector_price)
+        journal = options.get('journal')
+        if journal is not None:
+            # Ghi nhận cả URL render ngay (không qua bộ điều phối); URL đã xong
+            # được trả lại với kết quả đã lưu
+            urls, done = journal.resume(urls)
+            for url, rows in done:
+                yield url, rows
+        deferred = _DeferredTracker(tracker) if tracker is not None else None
+        limiter = HostRateLimiter(options.get('per_host_concurrency'), options.get('delay'))
+        render_queue = queue.Queue()
+        results = queue.Queue()
+        workers = []
+
+        def enqueue(url, static_rows):
+            if not workers:
+                if self.pool is None:
+                    from browser_pool import BrowserPool
+                    self.pool = BrowserPool()
+                    self._owns_pool = True
+                workers.extend(
+                    threading.Thread(target=self._render_worker, daemon=True,
+                                     args=(render_queue, results, selectors, deferred, journal, limiter))
+                    for _ in range(self.pool.size)
+                )
+                for worker in workers:
+                    worker.start()
+            render_queue.put((url, static_rows))
+
+        def static_urls():
+            for url in urls:
+                if self.memory.needs_render(url):
+                    enqueue(url, None)
+                else:
+                    yield url
+
+        def drain():
+            """Kết quả render đã xong (không chờ)"""
+            while True:
+                try:
+                    item = results.get_nowait()
+                except queue.Empty:
+                    return
+                if item is None:
+                    finished.append(None)
+                else:
+                    yield item
+
+        finished = []
+        scrape = self._static_scrape(selectors, deferred)
+        # URL đã được ghi nhận ở trên; trạng thái được ghi ở đây thay vì trong bộ điều phối
+        # để trang thiếu dữ liệu chỉ được ghi là xong sau khi render
+        static_options = dict(options, journal=None)
+        for url, rows in self.scraper._dispatch(static_urls(), scrape, **static_options):
+            seconds = self._static_seconds.pop(url, 0.0)
+            if rows is None or self.scraper.stop_flag:
+                # Không tải được trang (lỗi, robots.txt, ngắt mạch...) hoặc đang dừng: không render
+                if deferred is not None:
+                    deferred.commit(url)
+                if journal is not None and rows is None and not self.scraper.stop_flag:
+                    journal.mark_failed(url)
+                yield url, rows
+            elif self.is_complete(url, rows):
+                self.stats['static'] += 1
+                self.seconds['static'] += seconds
+                self.memory.record_static(url)
+                if deferred is not None:
+                    deferred.commit(url)
+                if journal is not None:
+                    journal.mark_done(url, rows)
+                yield url, rows
+            else:
+                self.stats['incomplete'] += 1
+                self.seconds['wasted'] += seconds
+                enqueue(url, rows)
+            for rendered in drain():
+                yield rendered
+
+        # Hết URL tĩnh: báo các worker render dừng sau khi xong hàng đợi
+        for _ in workers:
+            render_queue.put(None)
+        while len(finished) < len(workers):
+            item = results.get()
+            if item is None:
+                finished.append(None)
+            else:
+                yield item
+
+    def _static_scrape(self, selectors, tracker):
+        """Hàm tải tĩnh cho bộ điều phối, cộng dồn thời gian của từng URL (kể cả các lần thử lại)"""
+        def scrape(url):
+            started = time.perf_counter()
+            try:
+                return self.scraper._scrape_listing(url, selectors, tracker)
+            finally:
+                with self._lock:
+                    self._static_seconds[url] = self._static_seconds.get(url, 0.0) + time.perf_counter() - started
+        return scrape
+
+    def _render_worker(self, render_queue, results, selectors, deferred, journal, limiter):
+        """
+        Render các URL trong hàng đợi; mỗi phần tử là (url, bản ghi tĩnh), bản
+        ghi tĩnh là None nếu URL được render ngay mà không thử HTML tĩnh
+        """
+        from selenium_crawler import extract_products
+
+        profiles = self.scraper.profiles
+        try:
+            while True:
+                item = render_queue.get()
+                if item is None:
+                    return
+                url, static_rows = item
+                host = urlparse(url).netloc
+                if not self._allowed(url, host, limiter):
+                    if journal is not None:
+                        journal.mark_failed(url, 'robots.txt')
+                    results.put((url, None))
+                    continue
+                if not self._acquire(host, limiter):
+                    results.put((url, static_rows or None))
+                    continue
+
+                page_selectors = profiles.listing_selectors(url, *selectors) if profiles is not None else selectors
+                started = time.perf_counter()
+                try:
+                    with self.pool.lease() as driver:
+                        rows = extract_products(driver, url, *page_selectors)
+                except Exception as e:
+                    self.logger.error(f"Lỗi khi render {url}: {str(e)}")
+                    rows = None
+                finally:
+                    limiter.release(host)
+                seconds = time.perf_counter() - started
+
+                with self._lock:
+                    self.seconds['render'] += seconds
+                    if static_rows is None:
+                        self.stats['direct'] += 1
+                    self.stats['rendered' if rows else 'render_failed'] += 1
+                self.memory.record_render(url, rows, static_rows is not None)
+                if self.scraper.stop_flag:
+                    results.put((url, rows or static_rows or None))
+                elif rows:
+                    if deferred is not None:
+                        deferred.replace(url, rows)
+                    if journal is not None:
+                        journal.mark_done(url, rows)
+                    results.put((url, rows))
+                else:
+                    # Render lỗi: giữ bản ghi tĩnh (nếu có) như khi không render
+                    if deferred is not None:
+                        deferred.commit(url)
+                    if journal is not None and not static_rows:
+                        journal.mark_failed(url, 'render')
+                    results.put((url, static_rows or None))
+        finally:
+            results.put(None)
+
+    def _allowed(self, url, host, limiter):
+        """Kiểm tra robots.txt trước khi render, áp dụng Crawl-delay cho lượt render của host"""
+        robots = self.scraper.robots
+        if robots is None:
+            return True
+        rules = robots.get(url)
+        if rules.crawl_delay:
+            limiter.set_min_delay(host, min(rules.crawl_delay, ROBOTS_CONFIG['max_crawl_delay']))
+        if rules.allowed(url):
+            return True
+        self.scraper.host_stats.count(host, 'disallowed')
+        self.logger.info(f"{url}: bị chặn bởi robots.txt, không render")
+        return False
+
+    def _acquire(self, host, limiter):
+        """Chờ tới lượt render của host; False nếu bị dừng trong lúc chờ"""
+        while True:
+            wait_time = limiter.try_acquire(host)
+            if not wait_time:
+                return True
+            if self.scraper.stop_event.wait(min(wait_time, IDLE_POLL_SECONDS)):
+                return False
+
+    def saved_seconds(self):
+        """
+        Thời gian xử lý tiết kiệm được so với render mọi trang (ước tính)
+
+        Trang lấy được bằng HTML tĩnh tiết kiệm phần chênh với thời gian render
+        trung bình; trang render ngay nhờ RenderMemory tiết kiệm một lần tải tĩnh
+        vô ích. Lần tải tĩnh vô ích của các trang phải render bị trừ đi.
+
+        Returns:
+            float: Số giây, None nếu chưa render trang nào để so sánh
+        """
+        rendered = self.stats['rendered'] + self.stats['render_failed']
+        if not rendered:
+            return None
+        average_render = self.seconds['render'] / rendered
+        saved = self.stats['static'] * average_render - self.seconds['static'] - self.seconds['wasted']
+        if self.stats['incomplete']:
+            saved += self.stats['direct'] * self.seconds['wasted'] / self.stats['incomplete']
+        return saved
+
+    def summary_rows(self):
+        """Dòng thống kê cho sheet Thống kê"""
+        stats, seconds = self.stats, self.seconds
+        rendered = stats['rendered'] + stats['render_failed']
+        saved = self.saved_seconds()
+        return {
+            'Trang lấy bằng HTML tĩnh': stats['static'],
+            'Trang phải render (HTML tĩnh thiếu dữ liệu)': stats['incomplete'],
+            'Trang render ngay (tên miền cần render)': stats['direct'],
+            'Trang render lỗi': stats['render_failed'],
+            'Thời gian HTML tĩnh trung bình (giây)': round(seconds['static'] / stats['static'], 3) if stats['static'] else '-',
+            'Thời gian render trung bình (giây)': round(seconds['render'] / rendered, 3) if rendered else '-',
+            'Thời gian xử lý tiết kiệm so với render mọi trang (giây)': round(saved, 1) if saved is not None else '-',
+            'Tên miền cần render': ', '.join(self.memory.domains()) or '-'
+        }
+
+    def close(self):
+        """Lưu RenderMemory và đóng BrowserPool nếu do HybridScraper tạo"""
+        self.memory.save()
+        if self._owns_pool and self.pool is not None:
+            self.pool.close()
+            self.pool = None
+            self._owns_pool = False
@@ -0,0 +1,277 @@
+import logging
+import re
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from config import IMAGE_PROBE_CONFIG, REQUEST_CONFIG, ROBOTS_CONFIG
+from fetch_policy import THROTTLE_STATUSES, CircuitBreaker
+from rate_limiter import HostRateLimiter
+from transport import create_session
+
+CONTENT_RANGE_TOTAL = re.compile(r'/(\d+)\s*$')
+
+
+def image_dimensions(data):
+    """
+    Đọc kích thước ảnh từ các byte đầu file (PNG, GIF, JPEG, WebP, BMP)
+
+    Returns:
+        tuple: (rộng, cao), None nếu không nhận ra định dạng hoặc thiếu dữ liệu
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return width, abs(height)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3fff, height & 0x3fff
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_dimensions(data)
+    return None
+
+
+def _jpeg_dimensions(data):
+    """Tìm marker SOF trong JPEG để lấy kích thước"""
+    pos = 2
+    length = len(data)
+    while pos + 9 < length:
+        if data[pos] != 0xff:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xff:
+            pos += 1
+            continue
+        # SOF0..SOF15, trừ DHT (C4), JPG (C8), DAC (CC)
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+            return width, height
+        segment_length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        pos += 2 + segment_length
+    return None
+
+
+class ImageProbe:
+    """
+    Kiểm tra kích thước và dung lượng ảnh mà không tải cả ảnh
+
+    Mỗi ảnh chỉ gửi một request HEAD hoặc GET có Range lấy vài chục KB đầu
+    (đủ để đọc kích thước), các ảnh của một trang được kiểm tra song song.
+    Kết quả được cache theo URL và dùng chung cho mọi trang, nên logo hay
+    banner lặp lại trên cả trang web chỉ được kiểm tra một lần. Ảnh nhỏ hơn
+    `min_dimension` pixel hoặc `min_bytes` byte (pixel theo dõi, ảnh đệm),
+    ảnh trả về 404/410 hoặc trả về trang HTML thay cho ảnh cũng bị loại.
+
+    Request kiểm tra đi qua session riêng nhưng vẫn theo các giới hạn của
+    lượt cào: ảnh bị robots.txt của host ảnh chặn (`robots`, thường là
+    WebScraper.robots) không được kiểm tra, mỗi host ảnh chỉ có tối đa
+    `per_host_concurrency` request cùng lúc (kèm Crawl-delay và giãn cách khi
+    bị 429/503), và host ảnh lỗi liên tục bị ngắt mạch. Ảnh không được kiểm
+    tra được giữ lại như ảnh không xác định.
+    """
+
+    def __init__(self, session=None, method=None, range_bytes=None, max_workers=None, cache_size=None,
+                 min_dimension=None, min_bytes=None, robots=None, per_host_concurrency=None):
+        max_workers = max_workers or IMAGE_PROBE_CONFIG['max_workers']
+        # Session riêng có đủ kết nối cho mọi request kiểm tra chạy song song
+        self._owns_session = session is None
+        self.session = session or create_session(pool_maxsize=max_workers)
+        self.method = method or IMAGE_PROBE_CONFIG['method']
+        if self.method not in ('range', 'head'):
+            raise ValueError(f"Cách kiểm tra ảnh không hỗ trợ: {self.method}")
+        self.range_bytes = range_bytes or IMAGE_PROBE_CONFIG['range_bytes']
+        self.cache_size = cache_size or IMAGE_PROBE_CONFIG['cache_size']
+        self.min_dimension = IMAGE_PROBE_CONFIG['min_dimension'] if min_dimension is None else min_dimension
+        self.min_bytes = IMAGE_PROBE_CONFIG['min_bytes'] if min_bytes is None else min_bytes
+        self.robots = robots
+        self.limiter = HostRateLimiter(per_host_concurrency or IMAGE_PROBE_CONFIG['per_host_concurrency'],
+                                       IMAGE_PROBE_CONFIG['delay'])
+        self.breaker = CircuitBreaker()
+        self.stats = dict.fromkeys(('probes', 'hits', 'errors', 'filtered', 'skipped'), 0)
+        self.logger = logging.getLogger(__name__)
+
+        self._closed = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # URL -> Future: trang khác hỏi cùng ảnh khi đang kiểm tra thì chờ chung một request
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def probe(self, url):
+        """
+        Kiểm tra một ảnh (không chặn)
+
+        Returns:
+            Future: Kết quả là dict url, status, bytes, width, height,
+                content_type (giá trị None nếu không xác định được)
+        """
+        with self._lock:
+            future = self._cache.get(url)
+            if future is not None:
+                self._cache.move_to_end(url)
+                self.stats['hits'] += 1
+                return future
+            self.stats['probes'] += 1
+            future = self._cache[url] = self._executor.submit(self._probe, url)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return future
+
+    def filter(self, urls):
+        """
+        Kiểm tra song song các ảnh của một trang và loại ảnh quá nhỏ hoặc hỏng
+
+        Returns:
+            tuple: (URL ảnh được giữ, thông tin của các ảnh được giữ)
+        """
+        futures = [self.probe(url) for url in urls]
+        kept, infos = [], []
+        for url, future in zip(urls, futures):
+            info = future.result()
+            if self.rejects(info):
+                with self._lock:
+                    self.stats['filtered'] += 1
+                continue
+            kept.append(url)
+            infos.append(info)
+        return kept, infos
+
+    def rejects(self, info):
+        """Ảnh hỏng hoặc có kích thước, dung lượng dưới ngưỡng; ảnh không xác định được thì giữ lại"""
+        if info['status'] in (404, 410) or (info['content_type'] or '').startswith('text/'):
+            return True
+        width, height = info['width'], info['height']
+        if width is not None and height is not None and min(width, height) < self.min_dimension:
+            return True
+        return info['bytes'] is not None and info['bytes'] < self.min_bytes
+
+    def summary_rows(self):
+        """Dòng thống kê cho sheet Thống kê"""
+        return {
+            'Ảnh đã kiểm tra': self.stats['probes'],
+            'Ảnh dùng lại kết quả kiểm tra': self.stats['hits'],
+            'Ảnh bị loại (quá nhỏ, hỏng)': self.stats['filtered'],
+            'Ảnh kiểm tra lỗi': self.stats['errors'],
+            'Ảnh không kiểm tra (robots.txt, host lỗi)': self.stats['skipped']
+        }
+
+    def close(self):
+        self._closed.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_session:
+            self.session.close()
+
+    def _probe(self, url):
+        info = {'url': url, 'status': None, 'bytes': None, 'width': None, 'height': None, 'content_type': None}
+        host = urlsplit(url).netloc
+        if self.robots is not None:
+            rules = self.robots.get(url)
+            if rules.crawl_delay:
+                self.limiter.set_min_delay(host, min(rules.crawl_delay, ROBOTS_CONFIG['max_crawl_delay']))
+            if not rules.allowed(url):
+                return self._skip(info)
+        if not self._acquire(host):
+            return self._skip(info)
+        try:
+            info = self._request(url, info)
+        finally:
+            self.limiter.release(host)
+
+        status = info['status']
+        if status in THROTTLE_STATUSES:
+            self.limiter.throttle(host)
+        if status is None or status >= 500:
+            self.breaker.record_failure(host)
+        else:
+            self.breaker.record_success(host)
+            if status not in THROTTLE_STATUSES:
+                self.limiter.relax(host)
+        return info
+
+    def _acquire(self, host):
+        """
+        Chờ tới lượt kiểm tra của host ảnh
+
+        Returns:
+            bool: False nếu host đang bị ngắt mạch hoặc probe đã đóng
+        """
+        while not self._closed.is_set():
+            wait_time = self.limiter.try_acquire(host)
+            if wait_time:
+                # inf: host đã hết lượt đồng thời, thử lại sau một lúc
+                self._closed.wait(min(wait_time, 0.05))
+                continue
+            # Chỉ hỏi ngắt mạch khi chắc chắn gửi request, để request thử luôn được gửi đi
+            if self.breaker.allow(host):
+                self.limiter.release(host)
+                return False
+            return True
+        return False
+
+    def _skip(self, info):
+        with self._lock:
+            self.stats['skipped'] += 1
+        return info
+
+    def _request(self, url, info):
+        """Gửi request HEAD hoặc GET có Range và đọc dung lượng, kích thước ảnh"""
+        timeout = (REQUEST_CONFIG['connect_timeout'], REQUEST_CONFIG['timeout'])
+        try:
+            if self.method == 'head':
+                response = self.session.head(url, timeout=timeout, allow_redirects=True)
+                info['status'] = response.status_code
+                response.raise_for_status()
+                info['bytes'] = _int_header(response.headers.get('Content-Length'))
+                info['content_type'] = response.headers.get('Content-Type')
+                return info
+
+            headers = {'Range': f'bytes=0-{self.range_bytes - 1}', 'Accept-Encoding': 'identity'}
+            with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                info['status'] = response.status_code
+                response.raise_for_status()
+                info['content_type'] = response.headers.get('Content-Type')
+                if response.status_code == 206:
+                    total = CONTENT_RANGE_TOTAL.search(response.headers.get('Content-Range', ''))
+                    info['bytes'] = int(total.group(1)) if total else None
+                else:
+                    # Server bỏ qua Range: chỉ đọc phần đầu rồi đóng kết nối
+                    info['bytes'] = _int_header(response.headers.get('Content-Length'))
+
+                head = bytearray()
+                for chunk in response.iter_content(chunk_size=8192):
+                    head += chunk
+                    if len(head) >= self.range_bytes:
+                        break
+                if response.status_code == 200 and info['bytes'] is None and len(head) < self.range_bytes:
+                    info['bytes'] = len(head)
+        except requests.RequestException as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            self.logger.debug(f"Không kiểm tra được ảnh {url}: {str(e)}")
+            return info
+
+        dimensions = image_dimensions(bytes(head))
+        if dimensions is not None:
+            info['width'], info['height'] = dimensions
+        return info
+
+
+def _int_header(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
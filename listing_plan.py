@@ -0,0 +1,106 @@
+import hashlib
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+from config import PARSER_CONFIG
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+NOT_FOUND = "Không tìm thấy"
+STATUS_OK = "✅ Thành công"
+STATUS_MISSING = "⚠️ Thiếu dữ liệu"
+
+
+def product_status(name, price):
+    """Trạng thái của một sản phẩm theo việc có đủ tên và giá hay không"""
+    return STATUS_OK if name != NOT_FOUND and price != NOT_FOUND else STATUS_MISSING
+
+
+def fingerprint(*parts):
+    """Dấu vân tay ngắn (hex) của nội dung, dùng để phát hiện thay đổi"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ListingPlan:
+    """
+    Lấy danh sách sản phẩm (tên, giá) từ HTML tĩnh, không cần trình duyệt
+
+    Cùng thứ tự fallback với selenium_crawler: selector giá -> ".price" ->
+    "Không tìm thấy". Dùng cho trang danh sách render sẵn phía server, ví dụ
+    các lượt theo dõi giá định kỳ.
+    """
+
+    def __init__(self, selector_item, selector_title, selector_price, backend=None):
+        self.backend = backend or PARSER_CONFIG['backend']
+        self.selector_item = selector_item
+        self.selector_title = selector_title
+        self.price_selectors = [selector_price, '.price']
+
+        if self.backend == 'selectolax':
+            if LexborHTMLParser is None:
+                raise ImportError("Cần cài đặt selectolax để dùng backend 'selectolax'")
+            self._title = selector_title
+            self._prices = self.price_selectors
+        else:
+            self._item = soupsieve.compile(selector_item)
+            self._title = soupsieve.compile(selector_title)
+            self._prices = [soupsieve.compile(s) for s in self.price_selectors]
+
+    def parse(self, html):
+        """Parse HTML bằng backend đã chọn"""
+        if self.backend == 'selectolax':
+            return LexborHTMLParser(html)
+        return BeautifulSoup(html, self.backend)
+
+    def items(self, document):
+        """Các phần tử sản phẩm trong trang"""
+        if self.backend == 'selectolax':
+            return document.css(self.selector_item)
+        return self._item.select(document)
+
+    def region_fingerprint(self, items):
+        """Dấu vân tay của vùng danh sách sản phẩm (HTML của các phần tử sản phẩm)"""
+        if self.backend == 'selectolax':
+            return fingerprint(*(item.html for item in items))
+        return fingerprint(*(str(item) for item in items))
+
+    def extract_items(self, items, url):
+        """
+        Lấy tên, giá của từng sản phẩm
+
+        Returns:
+            list: Các tuple (url, tên, giá, trạng thái) như extract_products
+        """
+        rows = []
+        for item in items:
+            name = self._text(item, [self._title])
+            price = self._text(item, self._prices)
+            rows.append((url, name, price, product_status(name, price)))
+        return rows
+
+    def extract(self, html, url):
+        """Parse và lấy danh sách sản phẩm"""
+        return self.extract_items(self.items(self.parse(html)), url)
+
+    def _text(self, item, selectors):
+        """Text của phần tử đầu tiên khớp selector (theo thứ tự fallback), NOT_FOUND nếu không có"""
+        for selector in selectors:
+            if self.backend == 'selectolax':
+                node = item.css_first(selector)
+                if node is not None:
+                    return node.text(separator=' ', strip=True)
+            else:
+                node = selector.select_one(item)
+                if node is not None:
+                    return node.get_text(' ', strip=True)
+        return NOT_FOUND
@@ -1,49 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import time
-from webdriver_manager.chrome import ChromeDriverManager
-import undetected_chromedriver as uc
-
-def crawl_with_selenium(url, selector_item, selector_title, selector_price):
-    import undetected_chromedriver as uc
-    from selenium.webdriver.common.by import By
-    import time
-
-    options = uc.ChromeOptions()
-    # options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    driver = uc.Chrome(options=options)
-    try:
-        driver.get(url)
-        time.sleep(10)
-        products = driver.find_elements(By.CSS_SELECTOR, selector_item)
-        results = []
-        for item in products:
-            try:
-                name = item.find_element(By.CSS_SELECTOR, selector_title).text
-            except:
-                name = "Không tìm thấy"
-            try:
-                price = item.find_element(By.CSS_SELECTOR, selector_price).text
-            except:
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, ".price").text
-                except:
-                    price = "Không tìm thấy"
-            status = "✅ Thành công" if name != "Không tìm thấy" and price != "Không tìm thấy" else "⚠️ Thiếu dữ liệu"
-            results.append((url, name, price, status))
-        return results
-    finally:
-        driver.quit()
+from browser_pool import BrowserPool
+from config import PROFILE_CONFIG, UI_CONFIG
+from crawl_journal import CrawlJournal
+from hybrid_scraper import HybridScraper, RenderMemory
+from listing_plan import fingerprint
+from result_store import ResultStore
+from selector_profiles import SelectorProfiles
+from selenium_crawler import crawl_many_with_selenium
+from stream_writer import StreamingWriter
+from url_utils import normalize_url
+from web_scraper import WebScraper
+
+RESULT_COLUMNS = ("URL", "Tiêu đề", "Nội dung", "Trạng thái")
 
 class WebScrapingApp:
     def __init__(self, root):
@@ -51,7 +27,21 @@ class WebScrapingApp:
         self.root.title("Ứng dụng Cào Dữ liệu Web")
         self.root.geometry("900x600")
         self.urls = []
+        self.url_keys = set()  # URL đã chuẩn hóa, để kiểm tra trùng không phải duyệt cả danh sách
+        self.browser_pool = None
+        # Selector theo tên miền nếu có file profile; trang không khớp dùng selector nhập trên giao diện
+        self.profiles = SelectorProfiles() if os.path.exists(PROFILE_CONFIG['path']) else None
+        self.scraper = WebScraper(profiles=self.profiles)
+        # Tên miền cần render, ghi nhớ giữa các lượt và các lần mở ứng dụng
+        self.render_memory = RenderMemory()
+        self.hybrid = None
+        self.journal = None
+        self.result_queue = queue.Queue()
+        self.result_store = ResultStore(RESULT_COLUMNS)
+        self.page = 0
+        self.worker = None
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         # Quản lý URL
@@ -103,19 +93,32 @@ class WebScrapingApp:
         control_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
         self.scrape_button = tk.Button(control_frame, text="Bắt đầu Cào Dữ liệu", command=self.start_scraping)
         self.scrape_button.pack(side=tk.LEFT, padx=(0, 10))
+        self.stop_button = tk.Button(control_frame, text="Dừng", command=self.stop_scraping, state=tk.DISABLED)
+        self.stop_button.pack(side=tk.LEFT, padx=(0, 10))
         self.save_button = tk.Button(control_frame, text="Lưu Excel", command=self.save_to_excel)
         self.save_button.pack(side=tk.LEFT)
+        self.static_first = tk.BooleanVar(value=True)
+        tk.Checkbutton(control_frame, text="Thử HTML tĩnh trước, chỉ mở trình duyệt khi thiếu dữ liệu",
+                       variable=self.static_first).pack(side=tk.LEFT, padx=(10, 0))
 
         # Kết quả
         result_frame = tk.LabelFrame(self.root, text="Kết quả Cào dữ liệu")
         result_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
 
-        columns = ("URL", "Tiêu đề", "Nội dung", "Trạng thái")
-        self.result_tree = ttk.Treeview(result_frame, columns=columns, show="headings", height=10)
-        for col in columns:
+        # Bảng chỉ hiển thị một trang, dữ liệu đầy đủ nằm trong result_store
+        self.result_tree = ttk.Treeview(result_frame, columns=RESULT_COLUMNS, show="headings", height=10)
+        for col in RESULT_COLUMNS:
             self.result_tree.heading(col, text=col)
             self.result_tree.column(col, width=200)
-        self.result_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.result_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+
+        page_frame = tk.Frame(result_frame)
+        page_frame.pack(fill=tk.X, padx=10, pady=(5, 10))
+        tk.Button(page_frame, text="◀ Trang trước", command=self.prev_page).pack(side=tk.LEFT)
+        tk.Button(page_frame, text="Trang sau ▶", command=self.next_page).pack(side=tk.LEFT, padx=(10, 0))
+        self.page_var = tk.StringVar()
+        tk.Label(page_frame, textvariable=self.page_var).pack(side=tk.LEFT, padx=(10, 0))
+        self._refresh_table()
 
         # Status bar
         self.status_var = tk.StringVar()
@@ -126,7 +129,9 @@ class WebScrapingApp:
     def add_url(self):
         url = self.url_entry.get().strip()
         if url:
-            if url not in self.urls:
+            key = normalize_url(url)
+            if key not in self.url_keys:
+                self.url_keys.add(key)
                 self.urls.append(url)
                 self.url_listbox.insert(tk.END, url)
                 self.url_entry.delete(0, tk.END)
@@ -141,6 +146,7 @@ class WebScrapingApp:
         if selection:
             index = selection[0]
             url = self.urls.pop(index)
+            self.url_keys.discard(normalize_url(url))
             self.url_listbox.delete(index)
             self.status_var.set(f"Đã xóa URL: {url}")
         else:
@@ -150,42 +156,194 @@ class WebScrapingApp:
         if not self.urls:
             messagebox.showwarning("Cảnh báo", "Vui lòng thêm ít nhất một URL!")
             return
-        for item in self.result_tree.get_children():
-            self.result_tree.delete(item)
+        if self.worker is not None and self.worker.is_alive():
+            return
+        self.result_store.clear()
+        self.page = 0
+        self._refresh_table()
 
-        for url in self.urls:
-            try:
-                selector_item = self.item_selector_entry.get().strip()
-                selector_title = self.title_selector.get().strip()
-                selector_price = self.content_selector.get().strip()
-                results = crawl_with_selenium(url, selector_item, selector_title, selector_price)
-                count = 0
-                for result in results:
-                    self.result_tree.insert('', 'end', values=result)
-                    count += 1
-                if count == 0:
-                    messagebox.showwarning("Không tìm thấy sản phẩm", f"Không tìm thấy sản phẩm nào ở URL:\n{url}")
-                    self.status_var.set(f"Không tìm thấy sản phẩm nào ở {url}")
+        selector_item = self.item_selector_entry.get().strip()
+        selector_title = self.title_selector.get().strip()
+        selector_price = self.content_selector.get().strip()
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool()
+        self.hybrid = HybridScraper(self.scraper, self.browser_pool, self.render_memory) if self.static_first.get() else None
+        # Cùng danh sách URL và selector là cùng một job: lượt bị dừng được chạy tiếp,
+        # URL đã xong lấy lại từ nhật ký thay vì cào lại
+        job_id = fingerprint(*sorted(self.url_keys), selector_item, selector_title, selector_price)
+        self.journal = CrawlJournal(job_id=f"gui-{job_id}", shared=False)
+
+        self.scraper.stop_event.clear()
+        self.progress = {
+            'total': len(self.urls),
+            'done': 0,
+            'rows': 0,
+            'empty': [],
+            'started': time.monotonic(),
+            'finished': False
+        }
+        self.scrape_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.status_var.set(f"Đang cào dữ liệu cho {len(self.urls)} URL...")
+
+        # Cào trong thread nền, kết quả gửi về qua hàng đợi
+        self.worker = threading.Thread(
+            target=self._scrape_worker,
+            args=(list(self.urls), selector_item, selector_title, selector_price),
+            daemon=True
+        )
+        self.worker.start()
+        self.root.after(UI_CONFIG['refresh_interval_ms'], self._drain_results)
+
+    def stop_scraping(self):
+        self.scraper.stop_scraping()
+        self.stop_button.config(state=tk.DISABLED)
+        self.status_var.set("Đang dừng, chờ các trang đang tải hoàn thành...")
+
+    def _scrape_worker(self, urls, selector_item, selector_title, selector_price):
+        try:
+            if self.hybrid is not None:
+                # Trình duyệt chỉ được mở cho trang mà HTML tĩnh thiếu sản phẩm
+                for url, results in self.hybrid.scrape_listings(urls, selector_item, selector_title, selector_price,
+                                                                journal=self.journal):
+                    error = self._failure_reason(url) if results is None else None
+                    self.result_queue.put((url, results, error))
+                return
+            urls, done = self.journal.resume(urls)
+            for url, results in done:
+                self.result_queue.put((url, results, None))
+            for url, results, error in crawl_many_with_selenium(
+                    urls, selector_item, selector_title, selector_price,
+                    self.browser_pool, self.scraper.stop_event, self.profiles):
+                if results:
+                    self.journal.mark_done(url, results)
                 else:
-                    self.status_var.set(f"Đã cào được {count} sản phẩm từ {url}")
-            except Exception as e:
-                self.result_tree.insert('', 'end', values=(url, "", "", f"❌ Lỗi: {str(e)}"))
+                    self.journal.mark_failed(url, error)
+                self.result_queue.put((url, results, error))
+        except Exception as e:
+            self.result_queue.put((None, None, e))
+        finally:
+            self.result_queue.put(None)
+
+    def _failure_reason(self, url):
+        """Lỗi hiển thị cho trang không lấy được dữ liệu bằng HTML tĩnh lẫn trình duyệt"""
+        host = urlparse(url).netloc
+        last_error = self.scraper.host_stats.report().get(host, {}).get('last_error')
+        if last_error:
+            return f"không lấy được dữ liệu (lỗi gần nhất của {host}: {last_error})"
+        return "không lấy được dữ liệu"
+
+    def _drain_results(self):
+        """Lấy kết quả từ hàng đợi và thêm vào bảng theo từng đợt"""
+        progress = self.progress
+        follow = self.page >= self._page_count() - 1
+        added = 0
+        while added < UI_CONFIG['rows_per_refresh']:
+            try:
+                message = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                progress['finished'] = True
+                break
+
+            url, results, error = message
+            progress['done'] += 1
+            if error is not None:
+                self.result_store.append((url or "", "", "", f"❌ Lỗi: {str(error)}"))
+                added += 1
+                continue
+            if not results:
+                progress['empty'].append(url)
+            self.result_store.extend(results)
+            added += len(results)
+            progress['rows'] += len(results)
+
+        # Chỉ vẽ lại bảng khi đang xem trang cuối, các trang khác không đổi
+        if added:
+            if follow:
+                self.page = self._page_count() - 1
+                self._refresh_table()
+            else:
+                self._update_page_label()
+
+        elapsed = max(time.monotonic() - progress['started'], 1e-6)
+        if progress['finished']:
+            self._finish_scraping(elapsed)
+            return
+
+        self.status_var.set(
+            f"Đang cào: {progress['done']}/{progress['total']} URL, {progress['rows']} sản phẩm, "
+            f"{progress['done'] / elapsed:.2f} URL/giây, {progress['rows'] / elapsed:.1f} sản phẩm/giây"
+        )
+        self.root.after(UI_CONFIG['refresh_interval_ms'], self._drain_results)
 
-        self.status_var.set(f"Đã hoàn thành cào dữ liệu cho {len(self.urls)} URL.")
+    def _finish_scraping(self, elapsed):
+        progress = self.progress
+        self.scrape_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+
+        verb = "Đã dừng" if self.scraper.stop_flag else "Đã hoàn thành"
+        if not self.scraper.stop_flag:
+            # Lượt đã xong: lần bấm sau cào lại từ đầu thay vì lấy lại kết quả cũ
+            self.journal.forget()
+        self.journal.close()
+        split = ""
+        if self.hybrid is not None:
+            self.render_memory.save()
+            stats, saved = self.hybrid.stats, self.hybrid.saved_seconds()
+            split = (f" HTML tĩnh: {stats['static']} URL, render: {stats['incomplete'] + stats['direct']} URL"
+                     + (f", tiết kiệm khoảng {saved:.0f} giây." if saved is not None else "."))
+        self.status_var.set(
+            f"{verb} cào dữ liệu: {progress['done']}/{progress['total']} URL, "
+            f"{progress['rows']} sản phẩm trong {elapsed:.1f} giây.{split}"
+        )
+        if progress['empty']:
+            urls = "\n".join(progress['empty'][:10])
+            more = f"\n... và {len(progress['empty']) - 10} URL khác" if len(progress['empty']) > 10 else ""
+            messagebox.showwarning("Không tìm thấy sản phẩm", f"Không tìm thấy sản phẩm nào ở URL:\n{urls}{more}")
+
+    def _page_count(self):
+        return max(1, -(-len(self.result_store) // UI_CONFIG['page_size']))
+
+    def _refresh_table(self):
+        """Vẽ lại bảng với các dòng của trang hiện tại"""
+        self.result_tree.delete(*self.result_tree.get_children())
+        start = self.page * UI_CONFIG['page_size']
+        for row in self.result_store.rows(start, start + UI_CONFIG['page_size']):
+            self.result_tree.insert('', 'end', values=row)
+        self._update_page_label()
+
+    def _update_page_label(self):
+        self.page_var.set(f"Trang {self.page + 1}/{self._page_count()} ({len(self.result_store)} dòng)")
+
+    def prev_page(self):
+        if self.page > 0:
+            self.page -= 1
+            self._refresh_table()
+
+    def next_page(self):
+        if self.page < self._page_count() - 1:
+            self.page += 1
+            self._refresh_table()
 
     def save_to_excel(self):
-        if not self.result_tree.get_children():
+        if not len(self.result_store):
             messagebox.showwarning("Cảnh báo", "Không có dữ liệu để lưu!")
             return
         filename = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
         if filename:
-            data = []
-            for item in self.result_tree.get_children():
-                data.append(self.result_tree.item(item)['values'])
-            df = pd.DataFrame(data, columns=["URL", "Tiêu đề", "Nội dung", "Trạng thái"])
-            df.to_excel(filename, index=False)
+            with StreamingWriter(filename, fmt='xlsx', columns=RESULT_COLUMNS, summary=False) as writer:
+                for row in self.result_store.iter_rows():
+                    writer.write_row(row)
             messagebox.showinfo("Thành công", f"Đã lưu dữ liệu vào file: {filename}")
 
+    def on_close(self):
+        self.scraper.stop_scraping()
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+        self.root.destroy()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = WebScrapingApp(root)
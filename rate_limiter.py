@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import defaultdict
+
+from config import REQUEST_CONFIG
+
+
+class HostRateLimiter:
+    """
+    Giới hạn số request đồng thời và khoảng cách giữa các request cho từng host
+
+    Khoảng cách được điều chỉnh theo từng host: nhân đôi khi host trả về
+    429/503 (tối đa max_delay) và giảm dần về mức ban đầu khi request thành công.
+    Mức ban đầu của host có thể được nâng lên, ví dụ theo Crawl-delay trong robots.txt.
+    """
+
+    # Mức delay tối thiểu khi bị giới hạn tốc độ lúc delay ban đầu bằng 0 (giây)
+    MIN_THROTTLE_DELAY = 0.5
+    RELAX_FACTOR = 0.75
+
+    def __init__(self, per_host_concurrency=None, delay=None, max_delay=None):
+        self.per_host_concurrency = per_host_concurrency or REQUEST_CONFIG['per_host_concurrency']
+        self.delay = REQUEST_CONFIG['delay'] if delay is None else delay
+        self.max_delay = max_delay or REQUEST_CONFIG['max_delay']
+        self._lock = threading.Lock()
+        self._active = defaultdict(int)
+        self._next_allowed = defaultdict(float)
+        self._host_delay = {}
+        self._base_delay = {}
+
+    def try_acquire(self, host):
+        """
+        Thử giữ một lượt request cho host
+
+        Args:
+            host (str): Tên host
+
+        Returns:
+            float: 0 nếu được phép gửi ngay, số giây cần chờ nếu host đang trong
+                thời gian delay, hoặc inf nếu host đã dùng hết lượt đồng thời
+        """
+        with self._lock:
+            if self._active[host] >= self.per_host_concurrency:
+                return float('inf')
+
+            now = time.monotonic()
+            wait_time = self._next_allowed[host] - now
+            if wait_time > 0:
+                return wait_time
+
+            self._active[host] += 1
+            self._next_allowed[host] = now + self._delay(host)
+            return 0
+
+    def release(self, host):
+        """Trả lại lượt request của host sau khi request kết thúc"""
+        with self._lock:
+            self._active[host] -= 1
+            if self._active[host] <= 0:
+                del self._active[host]
+
+    def delay_for(self, host):
+        """Khoảng cách hiện tại giữa hai request tới host (giây)"""
+        with self._lock:
+            return self._delay(host)
+
+    def set_min_delay(self, host, seconds):
+        """Khoảng cách tối thiểu riêng của host, không giảm xuống dưới mức này khi relax"""
+        with self._lock:
+            if seconds > self.delay:
+                self._base_delay[host] = min(seconds, self.max_delay)
+            else:
+                self._base_delay.pop(host, None)
+
+    def throttle(self, host):
+        """
+        Host báo đang bị giới hạn tốc độ: nhân đôi khoảng cách giữa các request
+
+        Returns:
+            float: Khoảng cách mới (giây)
+        """
+        with self._lock:
+            current = self._delay(host)
+            new_delay = min(self.max_delay, max(current * 2, self.MIN_THROTTLE_DELAY))
+            self._host_delay[host] = new_delay
+            return new_delay
+
+    def relax(self, host):
+        """Request tới host thành công: giảm dần khoảng cách về mức ban đầu"""
+        with self._lock:
+            current = self._host_delay.get(host)
+            if current is None:
+                return
+            new_delay = current * self.RELAX_FACTOR
+            if new_delay <= self._base_delay.get(host, self.delay):
+                del self._host_delay[host]
+            else:
+                self._host_delay[host] = new_delay
+
+    def _delay(self, host):
+        delay = self._host_delay.get(host)
+        return delay if delay is not None else self._base_delay.get(host, self.delay)
+
+    def defer(self, host, seconds):
+        """Không gửi request mới tới host trong `seconds` giây (ví dụ theo Retry-After)"""
+        with self._lock:
+            self._next_allowed[host] = max(self._next_allowed[host], time.monotonic() + seconds)
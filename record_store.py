@@ -0,0 +1,361 @@
+"""
+Kho bản ghi đã cào (SQLite, hoặc DuckDB nếu đã cài), dùng chung cho nhiều lượt cào
+
+Xuất một phần dữ liệu trong kho ra file:
+    python record_store.py kho.sqlite -o vnexpress.xlsx --domain vnexpress.net --since 2024-05-01
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from config import STORE_CONFIG
+from run_profiler import timed
+from url_utils import normalize_url
+
+# Cột của bản ghi được lưu thành cột riêng; các trường khác gộp vào cột extra (JSON)
+RECORD_FIELDS = ('url', 'title', 'content', 'date', 'images', 'timestamp')
+# Trường bắt buộc, cùng quy tắc với DataManager.validate_data
+REQUIRED_FIELDS = ('url', 'title', 'content')
+# Cột có thể chọn khi truy vấn
+QUERY_COLUMNS = RECORD_FIELDS + ('domain', 'first_seen', 'valid')
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS records (
+        key TEXT NOT NULL,
+        url TEXT,
+        domain TEXT,
+        title TEXT,
+        content TEXT,
+        date TEXT,
+        images TEXT,
+        timestamp TEXT,
+        extra TEXT,
+        valid INTEGER,
+        first_seen TEXT
+    )
+"""
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_records_key ON records (key)",
+    "CREATE INDEX IF NOT EXISTS idx_records_url ON records (url)",
+    "CREATE INDEX IF NOT EXISTS idx_records_domain_timestamp ON records (domain, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records (timestamp)"
+)
+
+
+def _import_duckdb():
+    """Import duckdb khi cần, báo lỗi rõ ràng nếu chưa cài"""
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("Cần cài đặt duckdb để dùng kho DuckDB: pip install duckdb")
+    return duckdb
+
+
+def record_columns(records, fields):
+    """
+    Tách danh sách bản ghi thành các cột
+
+    Returns:
+        dict: Tên trường -> mảng numpy kiểu object (None nếu bản ghi không có trường)
+    """
+    return {field: np.array([record.get(field) for record in records], dtype=object) for field in fields}
+
+
+def missing_fields(columns):
+    """
+    Ô thiếu trường bắt buộc, tính trên cả cột thay vì từng bản ghi
+
+    None, NaN và chuỗi rỗng đều tính là thiếu.
+
+    Returns:
+        dict: url, title, content -> mảng bool, True là thiếu
+    """
+    return {field: pd.isna(columns[field]) | ~columns[field].astype(bool) for field in REQUIRED_FIELDS}
+
+
+def _domain(url):
+    host = urlsplit(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _moment(value):
+    """Mốc thời gian lọc theo cột timestamp ('YYYY-MM-DD HH:MM:SS', so sánh như chuỗi)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class RecordStore:
+    """
+    Lưu bản ghi vào cơ sở dữ liệu theo từng lô trong khi đang cào
+
+    Bản ghi được gom thành lô `batch_size` dòng và ghi trong một transaction.
+    Việc kiểm tra trường bắt buộc (như DataManager.validate_data) chạy theo cột
+    trên cả lô ngay khi ghi: bản ghi thiếu URL bị bỏ, bản ghi thiếu tiêu đề
+    hoặc nội dung vẫn được lưu với valid = 0. Mỗi URL (đã chuẩn hóa) chỉ có một
+    dòng; cào lại thì dòng cũ được thay bằng bản ghi mới, giữ first_seen của
+    lần cào đầu. Kho có chỉ mục theo url, domain và timestamp để truy vấn và
+    xuất một phần dữ liệu mà không đọc cả kho vào bộ nhớ.
+    """
+
+    def __init__(self, path=None, backend=None, batch_size=None, profiler=None):
+        self.path = path or STORE_CONFIG['path']
+        self.backend = backend or ('duckdb' if self.path.endswith('.duckdb') else STORE_CONFIG['backend'])
+        if self.backend not in ('sqlite', 'duckdb'):
+            raise ValueError(f"Kho dữ liệu không hỗ trợ: {self.backend}")
+        self.batch_size = batch_size or STORE_CONFIG['batch_size']
+        self.profiler = profiler
+        self.stats = dict.fromkeys(('inserted', 'updated', 'rejected', 'missing_title', 'missing_content'), 0)
+        self.logger = logging.getLogger(__name__)
+
+        self._batch = []
+        self._lock = threading.Lock()
+        if self.backend == 'duckdb':
+            self._conn = _import_duckdb().connect(self.path)
+        else:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        for statement in INDEXES:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def write(self, record):
+        """Thêm một bản ghi, ghi xuống kho khi đủ lô"""
+        with self._lock:
+            self._batch.append(record)
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def write_all(self, records):
+        """Ghi toàn bộ bản ghi từ một iterator, trả về số bản ghi đã nhận"""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        """Ghi các bản ghi còn chờ trong lô"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        with timed(self.profiler, 'store_write'):
+            self._insert(batch)
+
+    def _insert(self, batch):
+        columns = record_columns(batch, RECORD_FIELDS)
+        missing = missing_fields(columns)
+
+        keep = ~missing['url']
+        rejected = len(batch) - int(keep.sum())
+        if rejected:
+            self.stats['rejected'] += rejected
+            self.logger.warning(f"Bỏ {rejected} bản ghi thiếu URL")
+        self.stats['missing_title'] += int((missing['title'] & keep).sum())
+        self.stats['missing_content'] += int((missing['content'] & keep).sum())
+        valid = (keep & ~missing['title'] & ~missing['content']).astype(int)[keep].tolist()
+
+        batch = [record for record, kept in zip(batch, keep.tolist()) if kept]
+        if not batch:
+            return
+        urls = columns['url'][keep].tolist()
+        keys = [normalize_url(url) for url in urls]
+        images = [json.dumps(value or [], ensure_ascii=False) for value in columns['images'][keep].tolist()]
+        extra = [
+            json.dumps(fields, ensure_ascii=False, default=str) if fields else None
+            for fields in ({k: v for k, v in record.items() if k not in RECORD_FIELDS} for record in batch)
+        ]
+        rows = {}
+        for row in zip(keys, urls, map(_domain, urls), columns['title'][keep].tolist(),
+                       columns['content'][keep].tolist(), columns['date'][keep].tolist(), images,
+                       columns['timestamp'][keep].tolist(), extra, valid):
+            # URL xuất hiện nhiều lần trong lô: giữ bản ghi sau cùng
+            rows[row[0]] = row
+
+        # Xóa dòng cũ rồi chèn lại (giữ first_seen) thay cho ON CONFLICT, để chạy được trên cả
+        # SQLite và DuckDB (DuckDB không cho cập nhật cột có chỉ mục, kể cả chỉ mục unique)
+        keys = list(rows)
+        placeholders = ', '.join('?' * len(keys))
+        conn = self._conn
+        if self.backend == 'duckdb':
+            conn.begin()
+        try:
+            first_seen = dict(conn.execute(
+                f"SELECT key, first_seen FROM records WHERE key IN ({placeholders})", keys
+            ).fetchall())
+            if first_seen:
+                conn.execute(f"DELETE FROM records WHERE key IN ({placeholders})", keys)
+            conn.executemany(
+                "INSERT INTO records (key, url, domain, title, content, date, images, timestamp, extra, valid, "
+                "first_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row + (first_seen.get(key, row[7]),) for key, row in rows.items()]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.stats['updated'] += len(first_seen)
+        self.stats['inserted'] += len(rows) - len(first_seen)
+
+    def _where(self, domain=None, since=None, until=None, url_prefix=None, valid_only=False):
+        """Điều kiện WHERE và tham số cho các bộ lọc"""
+        clauses, params = [], []
+        if domain:
+            domains = [domain] if isinstance(domain, str) else list(domain)
+            clauses.append(f"domain IN ({', '.join('?' * len(domains))})")
+            params.extend(d[4:] if d.startswith('www.') else d for d in domains)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(_moment(since))
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(_moment(until))
+        if url_prefix:
+            clauses.append("substr(url, 1, ?) = ?")
+            params.extend((len(url_prefix), url_prefix))
+        if valid_only:
+            clauses.append("valid = 1")
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def count(self, **filters):
+        """Số bản ghi khớp bộ lọc (domain, since, until, url_prefix, valid_only)"""
+        self.flush()
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+
+    def query(self, columns=None, order_by='timestamp', limit=None, chunk_size=None, **filters):
+        """
+        Đọc bản ghi khớp bộ lọc theo từng phần
+
+        Args:
+            columns (list): Chỉ lấy các cột này (trong QUERY_COLUMNS); mặc định lấy
+                bản ghi đầy đủ như lúc cào, kể cả các trường phụ
+            order_by (str): Cột sắp xếp
+            limit (int): Số bản ghi tối đa
+            domain (str|list): Tên miền (không cần 'www.')
+            since, until (str|datetime): Khoảng thời gian cào [since, until)
+            url_prefix (str): URL bắt đầu bằng chuỗi này
+            valid_only (bool): Chỉ lấy bản ghi có đủ tiêu đề và nội dung
+
+        Yields:
+            dict: Bản ghi
+        """
+        self.flush()
+        names = list(columns) if columns else list(RECORD_FIELDS) + ['extra']
+        unknown = set(names) - set(QUERY_COLUMNS) - ({'extra'} if not columns else set())
+        if unknown or order_by not in QUERY_COLUMNS:
+            raise ValueError(f"Cột không hợp lệ: {', '.join(sorted(unknown)) or order_by}")
+
+        where, params = self._where(**filters)
+        sql = f"SELECT {', '.join(names)} FROM records{where} ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self._conn.cursor()
+        cursor.execute(sql, params)
+        chunk_size = chunk_size or self.batch_size
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                record = dict(zip(names, row))
+                if 'images' in record:
+                    record['images'] = json.loads(record['images']) if record['images'] else []
+                extra = record.pop('extra', None) if not columns else None
+                if extra:
+                    record.update(json.loads(extra))
+                yield record
+
+    def export(self, filename, columns=None, extra_stats=None, **filters):
+        """
+        Xuất bản ghi khớp bộ lọc ra file (.xlsx, .csv, .jsonl hoặc .parquet) theo luồng
+
+        Returns:
+            int: Số bản ghi đã xuất
+        """
+        records = self.query(columns=columns, **filters)
+        try:
+            if filename.lower().endswith('.parquet'):
+                from data_manager import DataManager
+                return DataManager(profiler=self.profiler).save_to_parquet(records, filename)
+
+            from stream_writer import StreamingWriter
+            stats = {'Kho dữ liệu': self.path}
+            for name, value in filters.items():
+                if value:
+                    stats[f"Lọc theo {name}"] = ', '.join(value) if isinstance(value, (list, tuple)) else value
+            stats.update(extra_stats or {})
+            with StreamingWriter(filename, columns=columns, extra_stats=stats, profiler=self.profiler) as writer:
+                return writer.write_all(records)
+        except Exception as e:
+            self.logger.error(f"Lỗi khi xuất dữ liệu ra file {filename}: {str(e)}")
+            raise
+
+    def summary_rows(self):
+        """Dòng thống kê cho sheet Thống kê"""
+        return {
+            'Bản ghi mới trong kho': self.stats['inserted'],
+            'Bản ghi cập nhật trong kho': self.stats['updated'],
+            'Bản ghi bị bỏ (thiếu URL)': self.stats['rejected'],
+            'Bản ghi thiếu tiêu đề': self.stats['missing_title'],
+            'Bản ghi thiếu nội dung': self.stats['missing_content']
+        }
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xuất một phần dữ liệu trong kho ra file")
+    parser.add_argument('store', help="File kho (.sqlite hoặc .duckdb)")
+    parser.add_argument('-o', '--output', required=True, help="File kết quả: .xlsx, .csv, .jsonl hoặc .parquet")
+    parser.add_argument('--domain', action='append', help="Chỉ lấy tên miền này (lặp lại được)")
+    parser.add_argument('--since', help="Cào từ thời điểm này (YYYY-MM-DD hoặc YYYY-MM-DD HH:MM:SS)")
+    parser.add_argument('--until', help="Cào trước thời điểm này")
+    parser.add_argument('--url-prefix', help="URL bắt đầu bằng chuỗi này")
+    parser.add_argument('--valid-only', action='store_true', help="Bỏ bản ghi thiếu tiêu đề hoặc nội dung")
+    parser.add_argument('--limit', type=int)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not os.path.exists(args.store):
+        print(f"Không tìm thấy file: {args.store}", file=sys.stderr)
+        return 2
+    with RecordStore(args.store) as store:
+        count = store.export(args.output, domain=args.domain, since=args.since, until=args.until,
+                             url_prefix=args.url_prefix, valid_only=args.valid_only, limit=args.limit)
+    print(f"Đã xuất {count} bản ghi", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
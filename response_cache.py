@@ -0,0 +1,188 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import CACHE_CONFIG
+from url_utils import normalize_url
+
+
+class ResponseCache:
+    """
+    Cache phản hồi HTTP lưu trên đĩa (SQLite), khóa theo URL đã chuẩn hóa và
+    variant (bộ selector, bật/tắt kiểm tra ảnh...)
+
+    Mỗi variant của một URL là một mục riêng, nên cào cùng URL với cấu hình
+    khác không ghi đè mục của nhau. Mỗi mục lưu ETag/Last-Modified cùng bản ghi đã trích xuất. Trong thời gian
+    `ttl` bản ghi được dùng lại ngay, sau đó được xác thực lại bằng request có
+    điều kiện. Khi tổng dung lượng vượt `max_bytes`, các mục lâu không dùng
+    nhất bị xóa trước.
+    """
+
+    def __init__(self, path=None, max_bytes=None, ttl=None, max_age=None):
+        self.path = path or CACHE_CONFIG['path']
+        self.max_bytes = max_bytes or CACHE_CONFIG['max_bytes']
+        self.ttl = CACHE_CONFIG['ttl'] if ttl is None else ttl
+        self.max_age = CACHE_CONFIG['max_age'] if max_age is None else max_age
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0, 'evictions': 0}
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._create_table()
+        self._conn.commit()
+
+        self._purge_expired()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _create_table(self):
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT NOT NULL,
+                variant TEXT NOT NULL DEFAULT '',
+                etag TEXT,
+                last_modified TEXT,
+                record TEXT,
+                size INTEGER,
+                stored_at REAL,
+                accessed_at REAL,
+                PRIMARY KEY (key, variant)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+
+    def lookup(self, url, variant=''):
+        """
+        Tìm mục cache cho URL
+
+        Args:
+            url (str): URL cần tìm
+            variant (str): Khóa phụ của bản ghi (ví dụ bộ selector đã dùng)
+
+        Returns:
+            dict: Mục cache với các khóa record, etag, last_modified, fresh;
+                None nếu không có mục dùng được
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, record, stored_at FROM entries WHERE key = ? AND variant = ?",
+                (key, variant)
+            ).fetchone()
+            if row is None:
+                return None
+
+            etag, last_modified, record, stored_at = row
+            age = now - stored_at
+            if self.max_age and age > self.max_age:
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ? AND variant = ?",
+                               (now, key, variant))
+            self._conn.commit()
+
+        return {
+            'record': json.loads(record),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': age < self.ttl
+        }
+
+    def conditional_headers(self, entry):
+        """Tạo header If-None-Match/If-Modified-Since từ mục cache"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, record, variant=''):
+        """
+        Lưu bản ghi đã trích xuất cùng thông tin xác thực của phản hồi
+
+        Args:
+            url (str): URL đã tải
+            headers (Mapping): Header của phản hồi
+            record (dict): Bản ghi đã trích xuất
+            variant (str): Khóa phụ của bản ghi
+        """
+        key = normalize_url(url)
+        payload = json.dumps(record, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ? AND variant = ?", (key, variant)
+            ).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, variant, headers.get('ETag'), headers.get('Last-Modified'), payload, size, now, now)
+            )
+            self._total_bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url, headers=None, variant=''):
+        """Đánh dấu mục cache vừa được xác thực lại (phản hồi 304)"""
+        key = normalize_url(url)
+        now = time.time()
+        headers = headers or {}
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ? AND variant = ?",
+                (now, now, headers.get('ETag'), headers.get('Last-Modified'), key, variant)
+            )
+            self._conn.commit()
+
+    def count(self, name):
+        """Tăng bộ đếm thống kê (hits, misses, revalidations)"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def summary_rows(self):
+        """Các dòng thống kê cache để ghi vào sheet Thống kê"""
+        return {
+            'Cache hit (dùng lại không cần tải)': self.stats['hits'],
+            'Cache miss (tải đầy đủ)': self.stats['misses'],
+            'Cache xác thực lại (304)': self.stats['revalidations'],
+            'Cache bị loại bỏ (LRU)': self.stats['evictions']
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """Xóa các mục lâu không dùng nhất cho tới khi dưới giới hạn dung lượng"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, variant, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, variant, size in rows:
+                self._conn.execute("DELETE FROM entries WHERE key = ? AND variant = ?", (key, variant))
+                self._total_bytes -= size
+                self.stats['evictions'] += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def _purge_expired(self):
+        """Xóa các mục đã quá max_age"""
+        if not self.max_age:
+            return
+        cursor = self._conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.max_age,))
+        self._conn.commit()
+        if cursor.rowcount:
+            self.logger.info(f"Đã xóa {cursor.rowcount} mục cache hết hạn")
@@ -0,0 +1,37 @@
+class ResultStore:
+    """
+    Lưu kết quả cào theo cột, tách khỏi widget bảng
+
+    Bảng trên giao diện chỉ hiển thị một trang lấy từ đây, còn việc lưu file
+    đọc trực tiếp từ các cột mà không cần đọc lại widget.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._data = [[] for _ in self.columns]
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def append(self, row):
+        """Thêm một dòng (tuple theo thứ tự cột)"""
+        for column, value in zip(self._data, row):
+            column.append(value)
+
+    def extend(self, rows):
+        """Thêm nhiều dòng"""
+        for row in rows:
+            self.append(row)
+
+    def clear(self):
+        for column in self._data:
+            column.clear()
+
+    def rows(self, start, stop):
+        """Lấy các dòng trong khoảng [start, stop) dưới dạng list tuple"""
+        return list(zip(*(column[start:stop] for column in self._data)))
+
+    def iter_rows(self, chunk_size=10000):
+        """Duyệt toàn bộ dòng theo từng khối để không tạo bản sao lớn"""
+        for start in range(0, len(self), chunk_size):
+            yield from self.rows(start, start + chunk_size)
@@ -0,0 +1,187 @@
+import logging
+import re
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from config import REQUEST_CONFIG, ROBOTS_CONFIG
+
+
+def _origin(url):
+    """scheme://host[:port] của URL, mỗi origin có một robots.txt riêng"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _compile_rule(pattern):
+    """Biên dịch đường dẫn trong Allow/Disallow: '*' khớp mọi chuỗi, '$' ở cuối là hết URL"""
+    anchored = pattern.endswith('$')
+    if anchored:
+        pattern = pattern[:-1]
+    regex = '.*'.join(re.escape(part) for part in unquote(pattern).split('*'))
+    return re.compile(regex + ('$' if anchored else ''))
+
+
+class RobotsRules:
+    """
+    Quy tắc robots.txt áp dụng cho user-agent của chương trình
+
+    So khớp theo RFC 9309: quy tắc khớp dài nhất thắng, Allow thắng khi dài
+    bằng nhau; nhóm của user-agent cụ thể được dùng thay cho nhóm '*'.
+    """
+
+    def __init__(self, rules=(), crawl_delay=None, sitemaps=(), disallow_all=False):
+        # (độ dài mẫu, allow, regex), sắp theo độ dài giảm dần
+        self.rules = sorted(rules, key=lambda rule: (-rule[0], not rule[1]))
+        self.crawl_delay = crawl_delay
+        self.sitemaps = list(sitemaps)
+        self.disallow_all = disallow_all
+
+    @classmethod
+    def parse(cls, text, agent=None):
+        """
+        Đọc nội dung robots.txt
+
+        Args:
+            agent (str): Tên sản phẩm của chương trình để chọn nhóm quy tắc
+        """
+        agent = (agent or ROBOTS_CONFIG['agent']).lower()
+        groups = {}
+        sitemaps = []
+        current = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            field, value = (part.strip() for part in line.split(':', 1))
+            field = field.lower()
+
+            if field == 'user-agent':
+                # Các dòng User-agent liền nhau dùng chung một nhóm
+                if in_rules:
+                    current = []
+                    in_rules = False
+                group = groups.setdefault(value.lower(), {'rules': [], 'crawl_delay': None})
+                current.append(group)
+            elif field in ('allow', 'disallow'):
+                in_rules = True
+                if value:
+                    for group in current:
+                        group['rules'].append((len(value), field == 'allow', _compile_rule(value)))
+            elif field == 'crawl-delay':
+                in_rules = True
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for group in current:
+                    group['crawl_delay'] = delay
+            elif field == 'sitemap' and value:
+                sitemaps.append(value)
+
+        # Nhóm có tên là tiền tố của agent (ví dụ 'web-scraping' khớp 'web-scraping-gui'), dài nhất thắng
+        matches = [name for name in groups if name != '*' and agent.startswith(name)]
+        group = groups[max(matches, key=len)] if matches else groups.get('*')
+        if group is None:
+            return cls(sitemaps=sitemaps)
+        return cls(group['rules'], group['crawl_delay'], sitemaps)
+
+    def allowed(self, url):
+        """URL có được phép tải hay không"""
+        if self.disallow_all:
+            return False
+        parts = urlsplit(url)
+        path = unquote(parts.path or '/') + ('?' + unquote(parts.query) if parts.query else '')
+        if path == '/robots.txt':
+            return True
+        for _, allow, regex in self.rules:
+            if regex.match(path):
+                return allow
+        return True
+
+
+class RobotsCache:
+    """
+    Tải và cache robots.txt theo origin, hết hạn sau `ttl` giây
+
+    Mỗi origin chỉ được tải một lần dù nhiều thread cùng hỏi. robots.txt trả
+    4xx nghĩa là không có giới hạn; lỗi 5xx hoặc không kết nối được thì tạm
+    coi như cấm toàn bộ (RFC 9309) và thử lại sau `error_ttl` giây.
+    """
+
+    # RFC 9309 chỉ yêu cầu đọc 500 KiB đầu tiên
+    MAX_BYTES = 500 * 1024
+
+    def __init__(self, session, ttl=None, error_ttl=None, agent=None):
+        self.session = session
+        self.ttl = ttl or ROBOTS_CONFIG['ttl']
+        self.error_ttl = error_ttl or ROBOTS_CONFIG['error_ttl']
+        self.agent = agent or ROBOTS_CONFIG['agent']
+        self.logger = logging.getLogger(__name__)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._origin_locks = {}
+
+    def cached(self, url):
+        """
+        Quy tắc đã có trong cache, không tải
+
+        Returns:
+            RobotsRules: None nếu chưa tải hoặc đã hết hạn
+        """
+        entry = self._entries.get(_origin(url))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def get(self, url):
+        """Quy tắc của origin chứa URL, tải robots.txt nếu chưa có trong cache"""
+        rules = self.cached(url)
+        if rules is not None:
+            return rules
+
+        origin = _origin(url)
+        with self._lock:
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:
+            # Thread khác có thể vừa tải xong
+            rules = self.cached(url)
+            if rules is None:
+                rules, ttl = self._load(origin)
+                self._entries[origin] = (time.monotonic() + ttl, rules)
+        return rules
+
+    def allowed(self, url):
+        return self.get(url).allowed(url)
+
+    def _load(self, origin):
+        """Tải robots.txt của origin, trả về (quy tắc, thời gian cache)"""
+        robots_url = origin + '/robots.txt'
+        timeout = (REQUEST_CONFIG['connect_timeout'], REQUEST_CONFIG['timeout'])
+        try:
+            with self.session.get(robots_url, timeout=timeout, stream=True) as response:
+                if response.status_code >= 500 or response.status_code == 429:
+                    self.logger.warning(f"{robots_url}: HTTP {response.status_code}, tạm dừng cào host này")
+                    return RobotsRules(disallow_all=True), self.error_ttl
+                if response.status_code >= 400:
+                    return RobotsRules(), self.ttl
+
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(chunk_size=65536):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= self.MAX_BYTES:
+                        break
+                text = b''.join(chunks)[:self.MAX_BYTES].decode('utf-8', errors='replace')
+        except requests.RequestException as e:
+            self.logger.warning(f"Không tải được {robots_url}: {str(e)}, tạm dừng cào host này")
+            return RobotsRules(disallow_all=True), self.error_ttl
+
+        rules = RobotsRules.parse(text, self.agent)
+        if rules.crawl_delay:
+            self.logger.info(f"{origin}: Crawl-delay {rules.crawl_delay} giây")
+        return rules, self.ttl
@@ -0,0 +1,153 @@
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlparse
+
+
+def percentile(sorted_values, q):
+    """Phân vị theo phương pháp nearest-rank trên danh sách đã sắp xếp"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _stage_summary(samples):
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'total': round(sum(values), 6),
+        'p50': round(percentile(values, 50), 6),
+        'p95': round(percentile(values, 95), 6),
+        'p99': round(percentile(values, 99), 6)
+    }
+
+
+def timed(profiler, stage, url=None):
+    """Context manager đo thời gian nếu có profiler, không làm gì nếu profiler là None"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(stage, url)
+
+
+class RunProfiler:
+    """
+    Đo thời gian từng giai đoạn của một lượt cào theo URL và theo host
+
+    Các giai đoạn được ghi: connect (DNS, kết nối và chờ header phản hồi),
+    transfer (tải nội dung), parse, các bước _extract_*, _clean_text và ghi
+    file của DataManager. Báo cáo gồm p50/p95/p99, số byte đã tải và số
+    trang mỗi giây; xuất ra JSON hoặc Excel mà không cần giao diện.
+    """
+
+    def __init__(self, keep_urls=True):
+        self.keep_urls = keep_urls
+        self._lock = threading.Lock()
+        self._stages = defaultdict(list)
+        self._hosts = defaultdict(lambda: defaultdict(list))
+        self._host_bytes = defaultdict(int)
+        self._urls = defaultdict(dict)
+        self.bytes = 0
+        self.pages = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @contextmanager
+    def stage(self, name, url=None):
+        """Đo thời gian một khối lệnh và ghi vào giai đoạn `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, url)
+
+    def record(self, name, seconds, url=None):
+        """Ghi một mẫu thời gian (giây) cho giai đoạn"""
+        with self._lock:
+            self._stages[name].append(seconds)
+            if url:
+                self._hosts[urlparse(url).netloc][name].append(seconds)
+                if self.keep_urls:
+                    per_url = self._urls[url]
+                    per_url[name] = per_url.get(name, 0.0) + seconds
+
+    def add_bytes(self, url, count):
+        """Cộng số byte đã tải của URL"""
+        with self._lock:
+            self.bytes += count
+            self._host_bytes[urlparse(url).netloc] += count
+
+    def page_done(self, url, ok=True):
+        """Đánh dấu một trang đã xử lý xong"""
+        with self._lock:
+            self.pages += 1
+            if not ok:
+                self.failed += 1
+            self.finished = time.monotonic()
+
+    def report(self):
+        """
+        Tạo báo cáo tổng hợp
+
+        Returns:
+            dict: Thông tin tổng quan, thống kê theo giai đoạn, theo host và
+                (nếu keep_urls) thời gian từng URL
+        """
+        with self._lock:
+            elapsed = (self.finished or time.monotonic()) - self.started
+            report = {
+                'pages': self.pages,
+                'failed': self.failed,
+                'bytes': self.bytes,
+                'elapsed': round(elapsed, 3),
+                'pages_per_second': round(self.pages / elapsed, 3) if elapsed > 0 else 0.0,
+                'stages': {name: _stage_summary(samples) for name, samples in self._stages.items()},
+                'hosts': {
+                    host: {
+                        'bytes': self._host_bytes.get(host, 0),
+                        'stages': {name: _stage_summary(samples) for name, samples in stages.items()}
+                    }
+                    for host, stages in self._hosts.items()
+                }
+            }
+            if self.keep_urls:
+                report['urls'] = {url: dict(stages) for url, stages in self._urls.items()}
+        return report
+
+    def write_json(self, filename):
+        """Ghi báo cáo ra file JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def write_excel(self, filename):
+        """Ghi báo cáo ra file Excel với sheet tổng quan, theo giai đoạn và theo host"""
+        from openpyxl import Workbook
+
+        report = self.report()
+        workbook = Workbook(write_only=True)
+
+        overview = workbook.create_sheet('Tổng quan')
+        overview.append(['Thông tin', 'Giá trị'])
+        overview.append(['Số trang', report['pages']])
+        overview.append(['Số trang lỗi', report['failed']])
+        overview.append(['Tổng byte đã tải', report['bytes']])
+        overview.append(['Thời gian chạy (giây)', report['elapsed']])
+        overview.append(['Trang mỗi giây', report['pages_per_second']])
+
+        header = ['Số mẫu', 'Tổng (giây)', 'p50 (giây)', 'p95 (giây)', 'p99 (giây)']
+        stages = workbook.create_sheet('Theo giai đoạn')
+        stages.append(['Giai đoạn'] + header)
+        for name, summary in report['stages'].items():
+            stages.append([name] + [summary[k] for k in ('count', 'total', 'p50', 'p95', 'p99')])
+
+        hosts = workbook.create_sheet('Theo host')
+        hosts.append(['Host', 'Byte', 'Giai đoạn'] + header)
+        for host, info in report['hosts'].items():
+            for name, summary in info['stages'].items():
+                hosts.append([host, info['bytes'], name] + [summary[k] for k in ('count', 'total', 'p50', 'p95', 'p99')])
+
+        workbook.save(filename)
@@ -0,0 +1,350 @@
+"""
+Cào dữ liệu từ file danh sách URL bằng dòng lệnh, không cần giao diện
+
+Ví dụ:
+    python scrape_cli.py urls.txt -o ket_qua.jsonl
+    python scrape_cli.py urls.txt -o ket_qua.xlsx --workers 32 --delay 0.5
+
+File URL: mỗi dòng một URL, bỏ qua dòng trống và dòng bắt đầu bằng '#'.
+Với --crawl, các URL trong file là URL gốc và các liên kết trong trang được
+cào tiếp theo CRAWL_CONFIG:
+    python scrape_cli.py goc.txt -o ket_qua.jsonl --crawl --depth 3 --include "/san-pham/"
+Với --listing, mỗi URL là một trang danh sách sản phẩm; --state lưu trạng thái
+để lượt sau chỉ trích xuất trang thay đổi và ghi phần thay đổi ra --changes:
+    python scrape_cli.py danh_muc.txt -o gia.xlsx --listing .product-box --state gia.sqlite --changes thay_doi.csv
+Thêm --prune-missing nếu file là danh sách trang đầy đủ: trang có trong --state nhưng
+không còn trong file được coi là đã xóa cùng mọi sản phẩm của nó.
+Thêm --render để trang mà HTML tĩnh thiếu sản phẩm (trang render bằng JavaScript)
+được render lại bằng Selenium; tên miền cần render được ghi nhớ cho lượt sau:
+    python scrape_cli.py danh_muc.txt -o gia.xlsx --listing .product-box --render
+Với -o kho.sqlite (hoặc .duckdb), bản ghi được ghi thêm vào kho, URL đã có thì
+được cập nhật; xuất một phần kho ra file bằng record_store.py:
+    python scrape_cli.py urls.txt -o kho.sqlite
+    python record_store.py kho.sqlite -o thang5.xlsx --since 2024-05-01 --until 2024-06-01
+Với --sitemap, mỗi dòng là một trang (sitemap lấy từ robots.txt hoặc /sitemap.xml)
+hoặc URL sitemap; --since last chỉ lấy URL có lastmod sau lượt trước của --job:
+    python scrape_cli.py trang.txt -o ket_qua.jsonl --sitemap --since last
+Chỉ import tkinter/selenium ở giao diện; ở đây các thư viện nặng được import
+khi cần để khởi động nhanh trên máy không có màn hình.
+"""
+import argparse
+import logging
+from functools import partial
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# Đuôi file kết quả được ghi vào kho bản ghi (record_store.RecordStore) thay vì file
+STORE_EXTENSIONS = ('.sqlite', '.db', '.duckdb')
+
+
+def read_urls(path):
+    """Đọc danh sách URL từ file (hoặc stdin nếu path là '-')"""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def build_parser():
+    from config import CRAWL_CONFIG, DEFAULT_SELECTORS, PARSER_CONFIG, REQUEST_CONFIG
+
+    parser = argparse.ArgumentParser(
+        description="Cào dữ liệu từ danh sách URL và lưu ra file",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('urls', help="File chứa danh sách URL ('-' để đọc từ stdin)")
+    parser.add_argument('-o', '--output', required=True,
+                        help="File kết quả: .jsonl, .csv, .xlsx, .parquet, hoặc kho .sqlite/.duckdb (ghi thêm, cập nhật URL cũ)")
+    parser.add_argument('--title-selector', default=DEFAULT_SELECTORS['title'])
+    parser.add_argument('--content-selector', default=DEFAULT_SELECTORS['content'])
+    parser.add_argument('--parser', default=PARSER_CONFIG['backend'],
+                        help="Backend parser: html.parser, lxml, html5lib, selectolax")
+    parser.add_argument('--processes', type=int, default=PARSER_CONFIG['processes'],
+                        help="Số tiến trình trích xuất (0 = trích xuất trong thread tải trang)")
+    parser.add_argument('--workers', type=int, default=REQUEST_CONFIG['max_workers'],
+                        help="Số request đồng thời tối đa")
+    parser.add_argument('--per-host', type=int, default=REQUEST_CONFIG['per_host_concurrency'],
+                        help="Số request đồng thời tối đa cho mỗi host")
+    parser.add_argument('--delay', type=float, default=REQUEST_CONFIG['delay'],
+                        help="Khoảng cách tối thiểu giữa hai request tới cùng host (giây)")
+    parser.add_argument('--cache', metavar='FILE', help="Bật cache phản hồi, lưu tại FILE")
+    parser.add_argument('--journal', metavar='FILE', help="Bật nhật ký cào để tiếp tục khi bị dừng")
+    parser.add_argument('--job', default='default', help="Tên job trong nhật ký cào")
+    parser.add_argument('--journal-ttl', type=float, metavar='HOURS',
+                        help="Cào lại URL đã xong trong nhật ký từ quá số giờ này")
+    parser.add_argument('--rescrape', action='store_true', help="Cào lại mọi URL, kể cả URL đã xong trong nhật ký")
+    parser.add_argument('--crawl', action='store_true', help="Đi theo liên kết từ các URL gốc")
+    parser.add_argument('--depth', type=int, default=CRAWL_CONFIG['max_depth'], help="Độ sâu liên kết tối đa khi --crawl")
+    parser.add_argument('--max-pages', type=int, default=CRAWL_CONFIG['max_pages'], help="Số trang tối đa khi --crawl")
+    parser.add_argument('--include', action='append', metavar='REGEX', help="Chỉ đi theo URL khớp mẫu (lặp lại được)")
+    parser.add_argument('--exclude', action='append', metavar='REGEX', help="Bỏ qua URL khớp mẫu, thêm vào mẫu mặc định")
+    parser.add_argument('--sitemap', action='store_true', help="Lấy URL từ sitemap của các trang trong file")
+    parser.add_argument('--since', metavar='DATE',
+                        help="Khi --sitemap: chỉ lấy URL có lastmod từ ngày này (YYYY-MM-DD) hoặc 'last' (lượt trước)")
+    parser.add_argument('--profiles', metavar='FILE',
+                        help="File JSON selector theo tên miền; bước thắng đã học được ghi lại vào file")
+    parser.add_argument('--probe-images', action='store_true',
+                        help="Kiểm tra kích thước ảnh bằng request nhỏ, loại pixel theo dõi (cột image_info)")
+    parser.add_argument('--ignore-robots', action='store_true', help="Không tuân theo robots.txt")
+    parser.add_argument('--listing', metavar='ITEM_SELECTOR',
+                        help="Lấy danh sách sản phẩm: selector của từng sản phẩm, ví dụ .product-box")
+    parser.add_argument('--name-selector', default='.product-name', help="Selector tên sản phẩm khi --listing")
+    parser.add_argument('--price-selector', default='.special-price', help="Selector giá khi --listing")
+    parser.add_argument('--state', metavar='FILE', help="File trạng thái để phát hiện thay đổi khi --listing")
+    parser.add_argument('--prune-missing', action='store_true',
+                        help="Khi --state: trang đã theo dõi nhưng không có trong danh sách URL lượt này "
+                             "được coi là đã xóa (cần danh sách URL đầy đủ)")
+    parser.add_argument('--render', action='store_true',
+                        help="Khi --listing: render bằng Selenium các trang mà HTML tĩnh thiếu dữ liệu")
+    parser.add_argument('--changes', metavar='FILE',
+                        help="Ghi bản ghi mới / thay đổi / đã xóa ra FILE (.jsonl, .csv, .xlsx), cần --state")
+    parser.add_argument('--profile', metavar='FILE', help="Ghi báo cáo thời gian ra FILE (.json hoặc .xlsx)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Chỉ in cảnh báo và lỗi")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.journal and args.crawl:
+        # Frontier của --crawl không được lưu, nên bỏ qua trang đã xong sẽ làm mất các liên kết của nó
+        parser.error("--journal không dùng được với --crawl")
+    if args.listing and args.crawl:
+        # Chế độ --listing chỉ cào các trang danh sách trong file, không đi theo liên kết
+        parser.error("--listing không dùng được với --crawl")
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('scrape_cli')
+
+    import_started = time.perf_counter()
+    from run_profiler import RunProfiler
+    from stream_writer import StreamingWriter
+    from web_scraper import WebScraper
+    import_seconds = time.perf_counter() - import_started
+
+    cache = None
+    if args.cache:
+        from response_cache import ResponseCache
+        cache = ResponseCache(args.cache)
+    journal = None
+    if args.journal:
+        from crawl_journal import CrawlJournal
+        done_ttl = args.journal_ttl * 3600 if args.journal_ttl is not None else None
+        journal = CrawlJournal(args.journal, args.job, done_ttl=done_ttl, rescrape=args.rescrape)
+    profiler = RunProfiler() if args.profile else None
+    profiles = None
+    if args.profiles:
+        from selector_profiles import SelectorProfiles
+        profiles = SelectorProfiles(args.profiles)
+
+    scraper = WebScraper(parser_backend=args.parser, cache=cache, profiler=profiler,
+                         extract_processes=args.processes, robots=False if args.ignore_robots else None,
+                         image_probe=True if args.probe_images else None, profiles=profiles)
+    startup_seconds = time.perf_counter() - _STARTED
+    print(f"Import: {import_seconds * 1000:.0f} ms, khởi động: {startup_seconds * 1000:.0f} ms", file=sys.stderr)
+
+    scrape_options = dict(max_workers=args.workers, per_host_concurrency=args.per_host, delay=args.delay)
+    sitemap = None
+    if args.sitemap:
+        from sitemap_reader import SitemapReader, last_run, parse_lastmod
+        sitemap = SitemapReader(scraper.session, scraper.robots)
+        since = last_run(args.job) if args.since == 'last' else parse_lastmod(args.since)
+        if args.since and args.since != 'last' and since is None:
+            logger.error(f"Ngày không hợp lệ: {args.since}")
+            return 2
+        batches = sitemap.batches(read_urls(args.urls), since=since)
+    else:
+        batches = [read_urls(args.urls)]
+
+    if args.listing:
+        return scrape_listings(args, scraper, journal, profiler, scrape_options, batches, sitemap)
+    if args.crawl:
+        from config import CRAWL_CONFIG
+        from site_crawler import SiteCrawler
+        crawler = SiteCrawler(
+            scraper, max_depth=args.depth, max_pages=args.max_pages, include_patterns=args.include,
+            exclude_patterns=CRAWL_CONFIG['exclude_patterns'] + (args.exclude or [])
+        )
+        seeds = (url for batch in batches for url in batch)
+        results = crawler.crawl(seeds, args.title_selector, args.content_selector, **scrape_options)
+    else:
+        scrape = partial(scraper.scrape_many, title_selector=args.title_selector,
+                         content_selector=args.content_selector, journal=journal, **scrape_options)
+        results = scrape_batches(scraper, scrape, batches)
+    ok = failed = 0
+
+    def records():
+        nonlocal ok, failed
+        for url, data in results:
+            if data:
+                ok += 1
+                yield data
+            else:
+                failed += 1
+
+    try:
+        if args.output.lower().endswith('.parquet'):
+            from data_manager import DataManager
+            try:
+                DataManager(profiler=profiler).save_to_parquet(records(), args.output)
+            except ValueError:
+                if ok:
+                    raise
+                # Không có bản ghi nào thì không có schema để tạo file Parquet
+                logger.error(f"Không có bản ghi nào để ghi vào {args.output}")
+        elif args.output.lower().endswith(STORE_EXTENSIONS):
+            from record_store import RecordStore
+            with RecordStore(args.output, profiler=profiler) as store:
+                store.write_all(records())
+            logger.info(f"Kho {args.output}: " + ', '.join(f"{k}: {v}" for k, v in store.summary_rows().items()))
+        else:
+            with StreamingWriter(args.output, profiler=profiler) as writer:
+                writer.write_all(records())
+                extra_stats = dict(cache.summary_rows()) if cache else {}
+                extra_stats.update(scraper.host_stats.summary_rows())
+                if scraper.image_probe is not None:
+                    extra_stats.update(scraper.image_probe.summary_rows())
+                if profiles is not None:
+                    extra_stats.update(profiles.summary_rows())
+                writer.extra_stats = extra_stats
+    except KeyboardInterrupt:
+        scraper.stop_scraping()
+        logger.warning("Đã dừng theo yêu cầu")
+    finally:
+        scraper.close()
+        if profiles is not None:
+            profiles.save()
+
+    return finish(args, profiler, ok, failed, sitemap, completed=not scraper.stop_flag)
+
+
+def scrape_batches(scraper, scrape, batches):
+    """
+    Cào lần lượt từng đợt URL, giữ trạng thái host (ngắt mạch, thống kê) giữa các đợt
+
+    Args:
+        scrape (callable): scrape(urls, reset_host_state=...) trả về các (url, dữ liệu)
+        batches (iterable): Các đợt URL
+    """
+    try:
+        for batch in batches:
+            yield from scrape(batch, reset_host_state=False)
+            if scraper.stop_flag:
+                break
+    finally:
+        scraper.log_host_stats()
+
+
+def scrape_listings(args, scraper, journal, profiler, scrape_options, batches, sitemap=None):
+    """Chế độ --listing: ghi mỗi sản phẩm một dòng, kèm phần thay đổi nếu có --state"""
+    from stream_writer import StreamingWriter
+
+    logger = logging.getLogger('scrape_cli')
+    tracker = None
+    if args.state:
+        from change_tracker import ChangeTracker
+        tracker = ChangeTracker(args.state)
+    elif args.changes or args.prune_missing:
+        logger.warning("--changes và --prune-missing cần --state, bỏ qua")
+
+    # URL đã gửi trong lượt này, để tìm trang đã theo dõi nhưng không còn trong danh sách
+    submitted = [] if tracker is not None and args.prune_missing else None
+    if submitted is not None:
+        batches = _recorded(batches, submitted)
+
+    hybrid = None
+    if args.render:
+        from hybrid_scraper import HybridScraper
+        hybrid = HybridScraper(scraper)
+
+    scrape = partial(hybrid.scrape_listings if hybrid is not None else scraper.scrape_listings,
+                     selector_item=args.listing, selector_title=args.name_selector,
+                     selector_price=args.price_selector, tracker=tracker, journal=journal, **scrape_options)
+    results = scrape_batches(scraper, scrape, batches)
+    ok = failed = products = 0
+    try:
+        with StreamingWriter(args.output, columns=['url', 'name', 'price', 'status'], profiler=profiler) as writer:
+            for url, rows in results:
+                if not rows:
+                    failed += 1
+                    continue
+                ok += 1
+                for row in rows:
+                    writer.write_row(row)
+                products += len(rows)
+
+            if submitted is not None and not scraper.stop_flag:
+                tracker.remove_missing(submitted)
+
+            # Sheet Thống kê đếm trang danh sách thay vì bản ghi
+            writer.stats.total, writer.stats.with_title = ok + failed, ok
+            extra_stats = {'Số sản phẩm': products}
+            extra_stats.update(scraper.host_stats.summary_rows())
+            if tracker is not None:
+                extra_stats.update(tracker.summary_rows())
+            if hybrid is not None:
+                extra_stats.update(hybrid.summary_rows())
+            writer.extra_stats = extra_stats
+
+        if tracker is not None and args.changes:
+            columns = ['change', 'url', 'name', 'price', 'old_price', 'status']
+            with StreamingWriter(args.changes, columns=columns, summary=False) as changes:
+                for change, row, old in tracker.changes:
+                    url, name, price, status = row
+                    changes.write_row([change, url, name, price, old[2] if old else '', status])
+            logger.info(f"Đã ghi {len(tracker.changes)} thay đổi vào file: {args.changes}")
+    except KeyboardInterrupt:
+        scraper.stop_scraping()
+        logger.warning("Đã dừng theo yêu cầu")
+    finally:
+        scraper.close()
+        if tracker is not None:
+            tracker.close()
+        if hybrid is not None:
+            hybrid.close()
+            stats, saved = hybrid.stats, hybrid.saved_seconds()
+            print(f"HTML tĩnh: {stats['static']} trang, render: {stats['incomplete']} trang thiếu dữ liệu + "
+                  f"{stats['direct']} trang của tên miền cần render ({stats['render_failed']} lỗi), tiết kiệm ước tính: "
+                  f"{'-' if saved is None else f'{saved:.1f}'} giây", file=sys.stderr)
+
+    return finish(args, profiler, ok, failed, sitemap, completed=not scraper.stop_flag)
+
+
+def _recorded(batches, urls):
+    """Các đợt URL như ban đầu, đồng thời ghi mọi URL vào danh sách `urls`"""
+    for batch in batches:
+        batch = list(batch)
+        urls.extend(batch)
+        yield batch
+
+
+def finish(args, profiler, ok, failed, sitemap=None, completed=True):
+    """Ghi báo cáo thời gian và thời điểm lượt cào sitemap, in tổng kết và trả về mã thoát"""
+    if sitemap is not None:
+        stats = sitemap.stats
+        print(f"Sitemap: {stats['sitemaps']} file, {stats['urls']} URL, bỏ qua {stats['old']} mục cũ, "
+              f"{stats['disallowed']} URL bị robots.txt chặn, {stats['errors']} lỗi", file=sys.stderr)
+        if completed:
+            from sitemap_reader import save_last_run
+            save_last_run(args.job, sitemap.started)
+
+    if args.profile:
+        if args.profile.lower().endswith('.xlsx'):
+            profiler.write_excel(args.profile)
+        else:
+            profiler.write_json(args.profile)
+
+    elapsed = time.perf_counter() - _STARTED
+    print(f"Hoàn thành: {ok} thành công, {failed} thất bại trong {elapsed:.1f} giây", file=sys.stderr)
+    return 1 if failed and not ok else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
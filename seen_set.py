@@ -0,0 +1,62 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Tập URL đã gặp dạng Bloom filter, tốn khoảng 14 bit mỗi URL với tỉ lệ trùng nhầm 0.1%
+
+    10 triệu URL chỉ cần khoảng 18 MB, so với hàng GB nếu giữ chuỗi URL trong
+    set. Đổi lại có thể báo nhầm một URL mới là đã gặp (với xác suất
+    `error_rate` khi chưa vượt `capacity`), nhưng không bao giờ báo sót URL
+    đã thêm.
+
+    Args:
+        capacity (int): Số phần tử dự kiến
+        error_rate (float): Tỉ lệ báo nhầm chấp nhận được khi đủ `capacity` phần tử
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item):
+        # Double hashing: vị trí thứ i = h1 + i * h2, đủ độc lập cho Bloom filter
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """
+        Thêm phần tử
+
+        Returns:
+            bool: True nếu phần tử chưa có trước đó (theo Bloom filter)
+        """
+        added = False
+        bits = self._bits
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        """Số phần tử đã thêm (không tính phần tử bị báo nhầm là đã có)"""
+        return self._count
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+from config import PROFILE_CONFIG
+from extraction_plan import (CONTENT_FALLBACK_STEPS, DATE_SELECTORS, NOT_FOUND_STEP, TITLE_FALLBACK_STEPS,
+                             split_selector)
+
+# Khóa selector của một profile: trang bài viết (title, content, date) và trang danh sách (item, name, price)
+PROFILE_FIELDS = ('title', 'content', 'date', 'item', 'name', 'price')
+LEARNED_FIELDS = ('title', 'content', 'date')
+
+# Bước không được học: bước dự phòng (bỏ qua toàn bộ selector đã cấu hình) và không tìm thấy
+UNLEARNED_STEPS = frozenset(TITLE_FALLBACK_STEPS + CONTENT_FALLBACK_STEPS + (NOT_FOUND_STEP,))
+
+
+def host_of(url):
+    """Hostname viết thường, bỏ 'www.'"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def _skip_failed(selector, step):
+    """
+    Bỏ các selector đứng trước bước thắng
+
+    Returns:
+        str: Selector còn lại (bước thắng và các selector sau nó), None nếu bước
+            thắng không còn trong bộ selector (chạy đủ các bước)
+    """
+    selectors = split_selector(selector)
+    if step in selectors:
+        return ', '.join(selectors[selectors.index(step):])
+    return None
+
+
+class SelectorProfiles:
+    """
+    Bộ selector theo tên miền, đọc từ file JSON
+
+    Mỗi profile khớp với tên miền và các tên miền con của nó (profile dài nhất
+    thắng); trang không khớp profile nào dùng selector truyền vào. Với mỗi
+    host, bước lấy được tiêu đề, nội dung và ngày đăng (selector nào, hay bước
+    fallback nào) được ghi lại. Khi một selector thắng `learn_after` trang liên
+    tiếp, các trang sau của host dùng plan bỏ qua các selector đứng trước nó
+    (những selector đã thất bại); nếu selector đó không còn lấy được, hoặc sau
+    mỗi `recheck_every` trang, plan đầy đủ được dùng lại để học lại. Bước
+    fallback (fallback:h1, fallback:density...) và "không tìm thấy" không được học, vì
+    học chúng sẽ bỏ qua selector đã cấu hình ở mọi trang sau của host.
+
+    Ví dụ file:
+        {
+            "vnexpress.net": {"title": "h1.title-detail", "content": "article.fck_detail", "date": ".date"},
+            "tiki.vn": {"item": ".product-item", "name": ".name", "price": ".price-discount__price"}
+        }
+
+    save() ghi các bước thắng đã học vào khóa "learned" của từng profile.
+    """
+
+    def __init__(self, path=None, learn_after=None, recheck_every=None):
+        self.path = path or PROFILE_CONFIG['path']
+        self.learn_after = learn_after or PROFILE_CONFIG['learn_after']
+        self.recheck_every = recheck_every or PROFILE_CONFIG['recheck_every']
+        self.logger = logging.getLogger(__name__)
+        self.profiles = {}
+        self.stats = dict.fromkeys(('pages', 'matched', 'shortcut', 'relearned'), 0)
+
+        self._lock = threading.Lock()
+        # host -> tên miền của profile khớp (None nếu không có)
+        self._hosts = {}
+        # tên miền profile (hoặc host) -> {'pages': số trang, 'fields': {trường: [bước, số lần liên tiếp, đã học]}}
+        self._strategies = {}
+        self._dirty = False
+        if os.path.exists(self.path):
+            self.load()
+
+    def load(self):
+        """Đọc profile từ file, kèm các bước thắng đã học ở lượt trước"""
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        for domain, profile in data.items():
+            domain = host_of('//' + domain)
+            unknown = set(profile) - set(PROFILE_FIELDS) - {'learned'}
+            if unknown:
+                self.logger.warning(f"Profile {domain}: bỏ qua khóa không hỗ trợ {', '.join(sorted(unknown))}")
+            self.profiles[domain] = {field: profile[field] for field in PROFILE_FIELDS if profile.get(field)}
+            learned = profile.get('learned') or {}
+            fields = {field: [step, self.learn_after, True] for field, step in learned.items()
+                      if field in LEARNED_FIELDS and step not in UNLEARNED_STEPS}
+            if fields:
+                self._strategies[domain] = {'pages': 0, 'fields': fields}
+        self._hosts.clear()
+        self.logger.info(f"Đã đọc {len(self.profiles)} profile selector từ file: {self.path}")
+
+    def match(self, url):
+        """Tên miền của profile khớp hostname của URL, None nếu không có"""
+        host = host_of(url)
+        domain = self._hosts.get(host, False)
+        if domain is not False:
+            return domain
+
+        domain = None
+        candidate = host
+        while candidate:
+            if candidate in self.profiles:
+                domain = candidate
+                break
+            candidate = candidate.partition('.')[2]
+        self._hosts[host] = domain
+        return domain
+
+    def selectors(self, url, title_selector, content_selector):
+        """
+        Selector trang bài viết cho URL
+
+        Returns:
+            tuple: (title, content, date); date là None nếu dùng DATE_SELECTORS mặc định
+        """
+        profile = self.profiles.get(self.match(url), {})
+        return (profile.get('title', title_selector), profile.get('content', content_selector),
+                profile.get('date'))
+
+    def listing_selectors(self, url, selector_item, selector_title, selector_price):
+        """Selector trang danh sách (item, name, price) cho URL"""
+        profile = self.profiles.get(self.match(url), {})
+        return (profile.get('item', selector_item), profile.get('name', selector_title),
+                profile.get('price', selector_price))
+
+    def plan_options(self, url, title_selector, content_selector, date_selector=None):
+        """
+        Tham số ExtractionPlan cho trang, bỏ các bước đã thất bại ở những trang trước của host
+
+        Args:
+            title_selector, content_selector, date_selector: Selector đầy đủ (kết quả của selectors())
+
+        Returns:
+            dict: title_selector, content_selector, date_selector
+        """
+        options = {'title_selector': title_selector, 'content_selector': content_selector,
+                   'date_selector': date_selector}
+        key = self._key(url)
+        with self._lock:
+            self.stats['pages'] += 1
+            if key in self.profiles:
+                self.stats['matched'] += 1
+            strategy = self._strategies.setdefault(key, {'pages': 0, 'fields': {}})
+            strategy['pages'] += 1
+            if strategy['pages'] % self.recheck_every == 0:
+                return options
+            learned = {field: state[0] for field, state in strategy['fields'].items() if state[2]}
+        if not learned:
+            return options
+
+        # Chỉ bỏ các selector đứng trước selector thắng; các bước fallback vẫn được
+        # thử nếu selector thắng không còn lấy được
+        shortcut = False
+        if 'title' in learned:
+            title = _skip_failed(title_selector, learned['title'])
+            if title is not None:
+                options['title_selector'], shortcut = title, True
+        if 'content' in learned:
+            content = _skip_failed(content_selector, learned['content'])
+            if content is not None:
+                options['content_selector'], shortcut = content, True
+        if 'date' in learned:
+            dates = date_selector if date_selector is not None else ', '.join(DATE_SELECTORS)
+            date = _skip_failed(dates, learned['date'])
+            if date is not None:
+                options['date_selector'], shortcut = date, True
+
+        if shortcut:
+            with self._lock:
+                self.stats['shortcut'] += 1
+        return options
+
+    def record(self, url, steps):
+        """
+        Ghi bước lấy được từng trường của trang
+
+        Args:
+            steps (dict): fields['steps'] của ExtractionPlan.extract
+        """
+        key = self._key(url)
+        with self._lock:
+            fields = self._strategies.setdefault(key, {'pages': 0, 'fields': {}})['fields']
+            for field in LEARNED_FIELDS:
+                step = steps.get(field)
+                if step is None:
+                    continue
+                state = fields.get(field)
+                if step in UNLEARNED_STEPS:
+                    # Không selector nào lấy được: bỏ bước đã học (nếu có), trang sau chạy đủ các bước
+                    if state is not None:
+                        del fields[field]
+                        if state[2]:
+                            self.stats['relearned'] += 1
+                            self.logger.info(f"{key}: {field} không còn lấy được bằng '{state[0]}', học lại")
+                            self._dirty = self._dirty or key in self.profiles
+                    continue
+                if state is not None and state[0] == step:
+                    state[1] += 1
+                else:
+                    if state is not None and state[2]:
+                        self.stats['relearned'] += 1
+                        self.logger.info(f"{key}: {field} không còn lấy được bằng '{state[0]}' "
+                                         f"(nay là '{step}'), học lại")
+                        self._dirty = self._dirty or key in self.profiles
+                    state = fields[field] = [step, 1, False]
+                if not state[2] and state[1] >= self.learn_after:
+                    state[2] = True
+                    self._dirty = self._dirty or key in self.profiles
+
+    def learned(self, url):
+        """Các bước thắng đã học của host (trường -> bước)"""
+        with self._lock:
+            strategy = self._strategies.get(self._key(url), {'fields': {}})
+            return {field: state[0] for field, state in strategy['fields'].items() if state[2]}
+
+    def save(self, path=None):
+        """Ghi bước thắng đã học của các profile vào khóa "learned" trong file"""
+        path = path or self.path
+        if not self._dirty or not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            for name, profile in data.items():
+                strategy = self._strategies.get(host_of('//' + name))
+                if strategy is None:
+                    continue
+                learned = {field: state[0] for field, state in strategy['fields'].items() if state[2]}
+                if learned:
+                    profile['learned'] = learned
+                else:
+                    profile.pop('learned', None)
+            self._dirty = False
+        # Ghi ra file tạm rồi thay thế, để file profile không bị hỏng nếu tiến trình dừng giữa chừng
+        fd, tmp_path = tempfile.mkstemp(suffix='.json', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def summary_rows(self):
+        """Dòng thống kê cho sheet Thống kê"""
+        return {
+            'Trang dùng profile selector': self.stats['matched'],
+            'Trang bỏ qua các bước đã thất bại': self.stats['shortcut'],
+            'Trang chạy đủ các bước': self.stats['pages'] - self.stats['shortcut'],
+            'Lần học lại bước thắng': self.stats['relearned']
+        }
+
+    def _key(self, url):
+        """Trạng thái học theo profile (chung cho các tên miền con), hoặc theo host nếu không có profile"""
+        return self.match(url) or host_of(url)
@@ -0,0 +1,127 @@
+import json
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_pool import create_chrome_driver
+from config import SELENIUM_CONFIG
+from listing_plan import NOT_FOUND, product_status
+
+# Lấy tên và giá của mọi sản phẩm trong một lần gọi, cùng thứ tự fallback với
+# vòng lặp find_element: selector giá -> ".price" -> không tìm thấy
+EXTRACT_PRODUCTS_SCRIPT = """
+const [itemSelector, titleSelector, priceSelector] = arguments;
+function first(root, selector) {
+    try {
+        return root.querySelector(selector);
+    } catch (e) {
+        return null;
+    }
+}
+function text(el) {
+    return el ? (el.innerText || '').trim() : null;
+}
+return JSON.stringify(Array.from(document.querySelectorAll(itemSelector), item => [
+    text(first(item, titleSelector)),
+    text(first(item, priceSelector) || first(item, '.price'))
+]));
+"""
+
+
+def collect_products_per_element(driver, selector_item, selector_title, selector_price):
+    """Lấy (tên, giá) bằng find_element cho từng sản phẩm"""
+    rows = []
+    for item in driver.find_elements(By.CSS_SELECTOR, selector_item):
+        try:
+            name = item.find_element(By.CSS_SELECTOR, selector_title).text
+        except:
+            name = NOT_FOUND
+        try:
+            price = item.find_element(By.CSS_SELECTOR, selector_price).text
+        except:
+            try:
+                price = item.find_element(By.CSS_SELECTOR, ".price").text
+            except:
+                price = NOT_FOUND
+        rows.append((name, price))
+    return rows
+
+
+def collect_products_with_script(driver, selector_item, selector_title, selector_price):
+    """Lấy (tên, giá) của mọi sản phẩm bằng một script chạy trong trang"""
+    rows = json.loads(driver.execute_script(EXTRACT_PRODUCTS_SCRIPT, selector_item, selector_title, selector_price))
+    return [(NOT_FOUND if name is None else name, NOT_FOUND if price is None else price)
+            for name, price in rows]
+
+
+COLLECTORS = {
+    'element': collect_products_per_element,
+    'script': collect_products_with_script
+}
+
+
+def extract_products(driver, url, selector_item, selector_title, selector_price, wait_timeout=None, mode=None):
+    """
+    Mở URL trên trình duyệt có sẵn và lấy danh sách sản phẩm
+
+    Thay vì chờ cố định, hàm chờ tới khi có phần tử khớp `selector_item`
+    hoặc hết `wait_timeout` giây.
+
+    Args:
+        mode (str): 'script' lấy mọi sản phẩm bằng một script trong trang,
+            'element' gọi find_element cho từng sản phẩm
+
+    Returns:
+        list: Các tuple (url, tên, giá, trạng thái)
+    """
+    if wait_timeout is None:
+        wait_timeout = SELENIUM_CONFIG['wait_timeout']
+    collect = COLLECTORS[mode or SELENIUM_CONFIG['extract_mode']]
+
+    driver.get(url)
+    try:
+        WebDriverWait(driver, wait_timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector_item))
+        )
+    except TimeoutException:
+        return []
+
+    results = []
+    for name, price in collect(driver, selector_item, selector_title, selector_price):
+        results.append((url, name, price, product_status(name, price)))
+    return results
+
+
+def crawl_with_selenium(url, selector_item, selector_title, selector_price, pool=None):
+    """Cào sản phẩm từ một URL, dùng trình duyệt của pool nếu có"""
+    if pool is not None:
+        with pool.lease() as driver:
+            return extract_products(driver, url, selector_item, selector_title, selector_price)
+
+    driver = create_chrome_driver()
+    try:
+        return extract_products(driver, url, selector_item, selector_title, selector_price)
+    finally:
+        driver.quit()
+
+
+def crawl_many_with_selenium(urls, selector_item, selector_title, selector_price, pool, stop_event=None,
+                             profiles=None):
+    """
+    Cào sản phẩm từ nhiều URL song song trên các trình duyệt của pool
+
+    Args:
+        profiles (SelectorProfiles): Selector theo tên miền, thay cho bộ selector chung với trang khớp profile
+
+    Yields:
+        tuple: (url, danh sách sản phẩm, lỗi) theo thứ tự hoàn thành
+    """
+    def crawl(driver, url):
+        selectors = (selector_item, selector_title, selector_price)
+        if profiles is not None:
+            selectors = profiles.listing_selectors(url, *selectors)
+        return extract_products(driver, url, *selectors)
+
+    return pool.map(urls, crawl, stop_event)
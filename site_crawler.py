@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import logging
+import re
+from urllib.parse import urlsplit
+
+from config import CRAWL_CONFIG, REQUEST_CONFIG
+from seen_set import BloomFilter
+from url_utils import normalize_url
+
+
+def _site_host(url):
+    """Host của URL, bỏ 'www.' để www.site.vn và site.vn được coi là cùng trang"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class SiteCrawler:
+    """
+    Cào theo liên kết, bắt đầu từ các URL gốc
+
+    Frontier là hàng đợi ưu tiên: trang nông hơn được cào trước, trang phân
+    trang của một danh sách được ưu tiên hơn liên kết thường cùng độ sâu và
+    không tính vào độ sâu. URL được chuẩn hóa (bỏ fragment, tham số theo dõi,
+    sắp xếp query) rồi kiểm tra trong Bloom filter, nên hàng triệu URL đã gặp
+    chỉ tốn vài chục MB.
+
+    Việc tải trang dùng WebScraper.scrape_many theo từng đợt, nên vẫn có giới
+    hạn theo host, thử lại và ngắt mạch như khi cào danh sách URL.
+    """
+
+    def __init__(self, scraper, max_depth=None, max_pages=None, same_domain=None,
+                 include_patterns=None, exclude_patterns=None, pagination_selector=None,
+                 max_pagination=None, expected_urls=None, error_rate=None):
+        self.scraper = scraper
+        self.max_depth = CRAWL_CONFIG['max_depth'] if max_depth is None else max_depth
+        self.max_pages = max_pages or CRAWL_CONFIG['max_pages']
+        self.same_domain = CRAWL_CONFIG['same_domain'] if same_domain is None else same_domain
+        self.include_patterns = [re.compile(p) for p in (
+            CRAWL_CONFIG['include_patterns'] if include_patterns is None else include_patterns)]
+        self.exclude_patterns = [re.compile(p, re.I) for p in (
+            CRAWL_CONFIG['exclude_patterns'] if exclude_patterns is None else exclude_patterns)]
+        self.pagination_selector = (CRAWL_CONFIG['pagination_selector']
+                                    if pagination_selector is None else pagination_selector)
+        self.max_pagination = CRAWL_CONFIG['max_pagination'] if max_pagination is None else max_pagination
+
+        self.seen = BloomFilter(expected_urls or CRAWL_CONFIG['expected_urls'],
+                                error_rate or CRAWL_CONFIG['error_rate'])
+        self._frontier = []
+        self._counter = itertools.count()
+        self._hosts = set()
+        self.stats = {'pages': 0, 'failed': 0, 'queued': 0, 'filtered': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def add(self, url, depth=0, page_no=0):
+        """
+        Đưa URL (dạng đã chuẩn hóa) vào frontier nếu hợp lệ và chưa gặp
+
+        Args:
+            depth (int): Số bước liên kết tính từ URL gốc
+            page_no (int): Thứ tự trang phân trang, 0 nếu không phải trang phân trang
+
+        Returns:
+            bool: True nếu URL được thêm
+        """
+        if not self.allowed(url):
+            self.stats['filtered'] += 1
+            return False
+        url = normalize_url(url)
+        if not self.seen.add(url):
+            return False
+
+        # Ưu tiên theo độ sâu; trang phân trang đứng trước liên kết thường cùng độ sâu
+        priority = depth * 2 - (1 if page_no else 0)
+        heapq.heappush(self._frontier, (priority, next(self._counter), url, depth, page_no))
+        self.stats['queued'] += 1
+        return True
+
+    def allowed(self, url):
+        """Kiểm tra URL theo quy tắc tên miền, include và exclude"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            return False
+        if self.same_domain and self._hosts:
+            host = _site_host(url)
+            if not any(host == site or host.endswith('.' + site) for site in self._hosts):
+                return False
+
+        target = parts.path + ('?' + parts.query if parts.query else '')
+        if any(p.search(target) for p in self.exclude_patterns):
+            return False
+        if self.include_patterns and not any(p.search(target) for p in self.include_patterns):
+            return False
+        return True
+
+    def crawl(self, seeds, title_selector, content_selector, batch_size=None, **scrape_options):
+        """
+        Cào từ các URL gốc theo liên kết
+
+        Args:
+            seeds (iterable): URL gốc (luôn được cào, không áp dụng include/exclude)
+            title_selector (str): CSS selector cho tiêu đề
+            content_selector (str): CSS selector cho nội dung
+            batch_size (int): Số URL lấy từ frontier mỗi đợt (mặc định gấp 4 số worker)
+            **scrape_options: Tham số cho WebScraper.scrape_many (max_workers, delay...)
+
+        Yields:
+            tuple: (url, dữ liệu) như scrape_many, dữ liệu là None nếu thất bại
+        """
+        for url in seeds:
+            self._hosts.add(_site_host(url))
+            if self.seen.add(normalize_url(url)):
+                heapq.heappush(self._frontier, (0, next(self._counter), url, 0, 0))
+                self.stats['queued'] += 1
+
+        batch_size = batch_size or 4 * (scrape_options.get('max_workers') or REQUEST_CONFIG['max_workers'])
+        scraper = self.scraper
+        link_selector = scraper.link_selector
+        scraper.link_selector = self.pagination_selector
+        reset_host_state = True
+        try:
+            while self._frontier and self.stats['pages'] < self.max_pages:
+                count = min(batch_size, self.max_pages - self.stats['pages'])
+                batch = {}
+                while self._frontier and len(batch) < count:
+                    _, _, url, depth, page_no = heapq.heappop(self._frontier)
+                    batch[url] = (depth, page_no)
+
+                for url, data in scraper.scrape_many(list(batch), title_selector, content_selector,
+                                                     reset_host_state=reset_host_state, **scrape_options):
+                    self.stats['pages'] += 1
+                    if data is None:
+                        self.stats['failed'] += 1
+                        yield url, None
+                        continue
+
+                    depth, page_no = batch[url]
+                    links = data.pop('links', [])
+                    next_pages = data.pop('next_pages', [])
+                    if page_no < self.max_pagination:
+                        for link in next_pages:
+                            self.add(link, depth, page_no + 1)
+                    if depth < self.max_depth:
+                        for link in links:
+                            self.add(link, depth + 1)
+                    yield url, data
+
+                reset_host_state = False
+                if scraper.stop_flag:
+                    break
+        finally:
+            scraper.link_selector = link_selector
+            scraper.log_host_stats()
+            self.logger.info(
+                f"Đã cào {self.stats['pages']} trang ({self.stats['failed']} lỗi), "
+                f"còn {len(self._frontier)} URL trong hàng đợi, bỏ qua {self.stats['filtered']} liên kết"
+            )
@@ -0,0 +1,234 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from config import REQUEST_CONFIG, SITEMAP_CONFIG
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_lastmod(value):
+    """
+    Đọc lastmod theo định dạng W3C Datetime (2024, 2024-05, 2024-05-01, 2024-05-01T10:00:00+07:00)
+
+    Returns:
+        datetime: Thời điểm (có múi giờ, mặc định UTC), None nếu không đọc được
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if len(value) == 4:
+        value += '-01-01'
+    elif len(value) == 7:
+        value += '-01'
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def last_run(job_id='default', path=None):
+    """
+    Thời điểm bắt đầu lượt cào sitemap gần nhất của job
+
+    Returns:
+        datetime: None nếu job chưa chạy lần nào
+    """
+    path = path or SITEMAP_CONFIG['state_path']
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return parse_lastmod(json.load(f).get(job_id))
+
+
+def save_last_run(job_id, moment, path=None):
+    """Lưu thời điểm bắt đầu lượt cào để lượt sau chỉ lấy URL mới hơn"""
+    path = path or SITEMAP_CONFIG['state_path']
+    state = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    state[job_id] = moment.isoformat()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def _local_name(tag):
+    """Tên thẻ bỏ namespace: '{http://www.sitemaps.org/...}url' -> 'url'"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapReader:
+    """
+    Lấy URL từ sitemap.xml và sitemap index, kể cả file nén gzip
+
+    Sitemap được tải theo luồng vào file tạm (chỉ giữ trong RAM khi nhỏ) rồi
+    đọc dần bằng iterparse, mỗi phần tử <url> được xóa ngay sau khi đọc nên
+    sitemap 50 MB cũng chỉ tốn vài MB bộ nhớ. Sitemap index được đọc đệ quy;
+    khi có `since`, sitemap con và URL có lastmod cũ hơn bị bỏ qua.
+    """
+
+    def __init__(self, session, robots=None, max_depth=None):
+        self.session = session
+        self.robots = robots
+        self.max_depth = SITEMAP_CONFIG['max_depth'] if max_depth is None else max_depth
+        self.stats = dict.fromkeys(('sitemaps', 'urls', 'old', 'disallowed', 'errors'), 0)
+        # Lượt sau dùng thời điểm này làm `since`, để không bỏ sót trang sửa trong lúc đang cào
+        self.started = datetime.now(timezone.utc)
+        self.logger = logging.getLogger(__name__)
+
+    def discover(self, site_url):
+        """
+        Sitemap của trang: khai báo trong robots.txt, hoặc /sitemap.xml nếu không có
+
+        Returns:
+            list: URL các sitemap
+        """
+        if self.robots is not None:
+            sitemaps = self.robots.get(site_url).sitemaps
+            if sitemaps:
+                return sitemaps
+        return [urljoin(site_url, '/sitemap.xml')]
+
+    def urls(self, sources, since=None):
+        """
+        URL trong các sitemap, đã lọc theo robots.txt và lastmod
+
+        Args:
+            sources (iterable): URL sitemap, hoặc URL trang để tự tìm sitemap
+            since (datetime): Chỉ lấy URL có lastmod từ thời điểm này (URL không có lastmod luôn được lấy)
+
+        Yields:
+            str: URL trang
+        """
+        seen_sitemaps = set()
+        for source in sources:
+            sitemaps = [source] if self.is_sitemap(source) else self.discover(source)
+            for sitemap_url in sitemaps:
+                yield from self._read(sitemap_url, since, 0, seen_sitemaps)
+
+    def batches(self, sources, batch_size=None, since=None):
+        """
+        Chia URL trong sitemap thành từng đợt để cào mà không giữ hết trong bộ nhớ
+
+        Yields:
+            list: Tối đa batch_size URL
+        """
+        batch_size = batch_size or SITEMAP_CONFIG['batch_size']
+        batch = []
+        for url in self.urls(sources, since):
+            batch.append(url)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def is_sitemap(url):
+        """URL trỏ thẳng tới file sitemap (.xml, .xml.gz) thay vì trang web"""
+        path = urlsplit(url).path.lower()
+        return path.endswith(('.xml', '.xml.gz', '.gz'))
+
+    def _read(self, sitemap_url, since, depth, seen_sitemaps):
+        """Đọc một sitemap; sitemap index thì đọc tiếp các sitemap con"""
+        if sitemap_url in seen_sitemaps:
+            return
+        seen_sitemaps.add(sitemap_url)
+
+        children = []
+        try:
+            with self._download(sitemap_url) as spool:
+                self.stats['sitemaps'] += 1
+                for kind, loc, lastmod in self._entries(self._decompress(spool)):
+                    if since is not None and lastmod is not None and lastmod < since:
+                        self.stats['old'] += 1
+                        continue
+                    if kind == 'sitemap':
+                        children.append(loc)
+                    elif self.robots is not None and not self.robots.allowed(loc):
+                        self.stats['disallowed'] += 1
+                    else:
+                        self.stats['urls'] += 1
+                        yield loc
+        except (requests.RequestException, ElementTree.ParseError, OSError, EOFError) as e:
+            self.stats['errors'] += 1
+            self.logger.error(f"Lỗi khi đọc sitemap {sitemap_url}: {str(e)}")
+            return
+
+        if children and depth >= self.max_depth:
+            self.logger.warning(f"{sitemap_url}: bỏ qua {len(children)} sitemap con do vượt độ sâu {self.max_depth}")
+            return
+        for child in children:
+            yield from self._read(child, since, depth + 1, seen_sitemaps)
+
+    def _download(self, sitemap_url):
+        """
+        Tải sitemap theo từng phần vào file tạm
+
+        Returns:
+            SpooledTemporaryFile: Nội dung đã tải, vị trí đọc ở đầu file
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=SITEMAP_CONFIG['spool_bytes'])
+        timeout = (REQUEST_CONFIG['connect_timeout'], REQUEST_CONFIG['timeout'])
+        try:
+            with self.session.get(sitemap_url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                # iter_content đã giải Content-Encoding; file .gz gửi nguyên dạng nén thì giải ở dưới
+                for chunk in response.iter_content(chunk_size=65536):
+                    spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+
+        spool.seek(0)
+        return spool
+
+    @staticmethod
+    def _decompress(spool):
+        """Luồng đọc XML, giải nén nếu nội dung là gzip"""
+        magic = spool.read(2)
+        spool.seek(0)
+        if magic == GZIP_MAGIC:
+            return gzip.GzipFile(fileobj=spool, mode='rb')
+        return spool
+
+    def _entries(self, stream):
+        """
+        Đọc dần các phần tử <url> và <sitemap>
+
+        Yields:
+            tuple: (loại 'url' hoặc 'sitemap', loc, lastmod)
+        """
+        root = None
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = element
+                continue
+            if event != 'end':
+                continue
+
+            kind = _local_name(element.tag)
+            if kind not in ('url', 'sitemap'):
+                continue
+            loc = lastmod = None
+            for child in element:
+                name = _local_name(child.tag)
+                if name == 'loc':
+                    loc = (child.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = parse_lastmod(child.text)
+            # Giải phóng phần tử đã đọc để bộ nhớ không tăng theo kích thước sitemap
+            root.clear()
+            if loc:
+                yield kind, loc, lastmod
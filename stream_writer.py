@@ -0,0 +1,212 @@
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+
+from config import EXCEL_CONFIG
+from run_profiler import timed
+
+
+class RunStats:
+    """Thống kê cộng dồn cho sheet Thống kê và Cấu hình, không cần quét lại dữ liệu"""
+
+    def __init__(self):
+        self.total = 0
+        self.with_title = 0
+        self.content_chars = 0
+        self.image_count = 0
+        self.first = None
+
+    @classmethod
+    def from_records(cls, records):
+        stats = cls()
+        for record in records:
+            stats.add(record)
+        return stats
+
+    def add(self, record):
+        """Cộng dồn một bản ghi"""
+        if self.first is None:
+            self.first = record
+        self.total += 1
+        if record.get('title'):
+            self.with_title += 1
+        self.content_chars += len(record.get('content', '') or '')
+        self.image_count += len(record.get('images', []) or [])
+
+    def summary_rows(self, extra_stats=None):
+        """Các dòng (Thông tin, Giá trị) của sheet Thống kê"""
+        now = datetime.now()
+        rows = [
+            ('Tổng số URL đã cào', self.total),
+            ('Số URL thành công', self.with_title),
+            ('Số URL thất bại', self.total - self.with_title),
+            ('Ngày tạo file', now.strftime('%Y-%m-%d')),
+            ('Thời gian tạo', now.strftime('%H:%M:%S'))
+        ]
+        rows.extend((extra_stats or {}).items())
+        return rows
+
+    def config_rows(self):
+        """Các dòng (Thông số, Giá trị) của sheet Cấu hình, rỗng nếu chưa có bản ghi mẫu"""
+        if self.first is None:
+            return []
+
+        title = self.first.get('title', '')
+        return [
+            ('URL mẫu', self.first.get('url', '')),
+            ('Tiêu đề mẫu', title[:50] + '...' if len(title) > 50 else title),
+            ('Độ dài nội dung trung bình', f"{self.content_chars // self.total} ký tự"),
+            ('Số hình ảnh trung bình', f"{self.image_count // self.total} hình"),
+            ('Định dạng ngày', 'YYYY-MM-DD HH:MM:SS')
+        ]
+
+
+def _cell_value(value):
+    """Chuyển giá trị lồng nhau (list, dict) thành chuỗi giống cách pandas ghi ra file"""
+    if isinstance(value, (list, tuple, dict, set)):
+        return str(value)
+    return value
+
+
+class StreamingWriter:
+    """
+    Ghi bản ghi ra file theo từng dòng với bộ nhớ không đổi
+
+    Định dạng chọn theo đuôi file: .csv, .jsonl hoặc .xlsx. CSV và JSONL được
+    ghi ngay khi nhận bản ghi; Excel dùng chế độ write-only của openpyxl và
+    thêm sheet Thống kê, Cấu hình từ số liệu cộng dồn khi đóng file (tắt bằng
+    summary=False). Cột được lấy theo bản ghi đầu tiên.
+    """
+
+    FORMATS = ('csv', 'jsonl', 'xlsx')
+
+    def __init__(self, filename, fmt=None, columns=None, extra_stats=None, flush_every=100, summary=True,
+                 profiler=None):
+        self.filename = filename
+        self.fmt = fmt or os.path.splitext(filename)[1].lstrip('.').lower()
+        if self.fmt not in self.FORMATS:
+            raise ValueError(f"Định dạng không hỗ trợ: {self.fmt}")
+
+        self.columns = list(columns) if columns else None
+        self.extra_stats = extra_stats
+        self.flush_every = flush_every
+        self.summary = summary
+        self.profiler = profiler
+        self.stats = RunStats()
+        # Số dòng đã ghi, cả bản ghi (write) và dòng giá trị (write_row)
+        self.rows = 0
+        self.logger = logging.getLogger(__name__)
+
+        self._file = None
+        self._csv = None
+        self._workbook = None
+        self._sheet = None
+        self._closed = False
+
+        if self.fmt == 'xlsx':
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet(EXCEL_CONFIG['sheet_names']['data'])
+        else:
+            encoding = 'utf-8-sig' if self.fmt == 'csv' else 'utf-8'
+            self._file = open(filename, 'w', encoding=encoding, newline='')
+
+        if self.columns is not None:
+            self._write_header()
+
+    def write(self, record):
+        """Ghi một bản ghi"""
+        with timed(self.profiler, 'stream_write'):
+            self._write_record(record)
+
+    def _write_record(self, record):
+        if self.columns is None:
+            self.columns = list(record.keys())
+            self._write_header()
+
+        if self.fmt == 'jsonl':
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        else:
+            row = [_cell_value(record.get(col)) for col in self.columns]
+            if self.fmt == 'csv':
+                self._csv.writerow(row)
+            else:
+                self._sheet.append(row)
+
+        self.stats.add(record)
+        self._row_written()
+
+    def write_row(self, values):
+        """Ghi một dòng giá trị theo thứ tự cột, không tính vào sheet Thống kê"""
+        if self.columns is None:
+            raise ValueError("Cần khai báo columns để ghi theo dòng")
+
+        if self.fmt == 'jsonl':
+            self._file.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False, default=str) + '\n')
+        else:
+            row = [_cell_value(value) for value in values]
+            if self.fmt == 'csv':
+                self._csv.writerow(row)
+            else:
+                self._sheet.append(row)
+        self._row_written()
+
+    def _row_written(self):
+        self.rows += 1
+        if self._file is not None and self.rows % self.flush_every == 0:
+            self._file.flush()
+
+    def write_all(self, records):
+        """Ghi toàn bộ bản ghi từ một iterator, trả về số bản ghi đã ghi"""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def close(self, extra_stats=None):
+        """
+        Đóng file; với Excel thì thêm sheet thống kê và lưu workbook
+
+        Args:
+            extra_stats (dict): Dòng thống kê bổ sung, thay cho giá trị truyền lúc khởi tạo
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._workbook is not None and self.summary:
+            summary = self._workbook.create_sheet(EXCEL_CONFIG['sheet_names']['summary'])
+            summary.append(['Thông tin', 'Giá trị'])
+            for row in self.stats.summary_rows(extra_stats or self.extra_stats):
+                summary.append(list(row))
+
+            config_rows = self.stats.config_rows()
+            if config_rows:
+                config_sheet = self._workbook.create_sheet(EXCEL_CONFIG['sheet_names']['config'])
+                config_sheet.append(['Thông số', 'Giá trị'])
+                for row in config_rows:
+                    config_sheet.append(list(row))
+
+        if self._workbook is not None:
+            with timed(self.profiler, 'stream_save'):
+                self._workbook.save(self.filename)
+        else:
+            self._file.close()
+
+        self.logger.info(f"Đã ghi {self.rows} dòng vào file: {self.filename}")
+
+    def _write_header(self):
+        if self.fmt == 'csv':
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.columns)
+        elif self.fmt == 'xlsx':
+            self._sheet.append(self.columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,38 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def static_site(tmp_path):
+    """
+    Server HTTP tĩnh cục bộ phục vụ thư mục tạm
+
+    Returns:
+        tuple: (URL gốc không có '/' cuối, thư mục chứa các trang)
+    """
+    root = tmp_path / 'site'
+    root.mkdir()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', root
+    server.shutdown()
+    server.server_close()
+
+
+def listing_page(count, prefix='SP'):
+    """Trang danh sách với `count` sản phẩm có đủ tên và giá"""
+    items = ''.join(
+        f'<div class="product-box"><span class="product-name">{prefix} {i}</span>'
+        f'<span class="special-price">{i + 1}00.000đ</span></div>'
+        for i in range(count)
+    )
+    return f'<html><body>{items}</body></html>'
@@ -0,0 +1,139 @@
+import threading
+import urllib.request
+
+import pytest
+
+from browser_pool import BrowserPool
+
+
+class HttpDriver:
+    """Driver giả tải trang bằng urllib, đủ các thuộc tính BrowserPool dùng"""
+
+    created = []
+
+    def __init__(self):
+        self.page_source = ''
+        self._url = None
+        self.crashed = False
+        self.quit_called = False
+        self.pages = 0
+        HttpDriver.created.append(self)
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise ConnectionError("trình duyệt đã crash")
+        return self._url
+
+    def get(self, url):
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.page_source = response.read().decode('utf-8')
+        self._url = url
+        self.pages += 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pages(static_site):
+    HttpDriver.created = []
+    base, root = static_site
+    urls = []
+    for i in range(6):
+        (root / f'p{i}.html').write_text(f'<html><body>trang {i}</body></html>')
+        urls.append(f'{base}/p{i}.html')
+    return urls
+
+
+def load(driver, url):
+    driver.get(url)
+    return driver.page_source
+
+
+def test_map_loads_every_page_with_at_most_size_drivers(pages):
+    pool = BrowserPool(size=2, max_pages=100, driver_factory=HttpDriver)
+    results = {url: (html, error) for url, html, error in pool.map(pages, load)}
+    pool.close()
+
+    assert set(results) == set(pages)
+    for i, url in enumerate(pages):
+        html, error = results[url]
+        assert error is None
+        assert f'trang {i}' in html
+    assert 1 <= len(HttpDriver.created) <= 2
+    assert all(driver.quit_called for driver in HttpDriver.created)
+
+
+def test_drivers_are_created_lazily(pages):
+    pool = BrowserPool(size=3, max_pages=100, driver_factory=HttpDriver)
+    assert HttpDriver.created == []
+    with pool.lease() as driver:
+        driver.get(pages[0])
+    assert len(HttpDriver.created) == 1
+    pool.close()
+
+
+def test_driver_is_recycled_after_max_pages(pages):
+    pool = BrowserPool(size=1, max_pages=2, driver_factory=HttpDriver)
+    results = list(pool.map(pages[:5], load))
+    pool.close()
+
+    assert all(error is None for _, _, error in results)
+    assert len(HttpDriver.created) == 3
+    assert [driver.pages for driver in HttpDriver.created] == [2, 2, 1]
+    assert all(driver.quit_called for driver in HttpDriver.created)
+
+
+def test_crashed_driver_is_replaced(pages):
+    pool = BrowserPool(size=1, max_pages=100, driver_factory=HttpDriver)
+
+    def crash_on_first(driver, url):
+        if url == pages[0]:
+            driver.crashed = True
+            raise RuntimeError("tab crash")
+        return load(driver, url)
+
+    results = {url: (html, error) for url, html, error in pool.map(pages[:3], crash_on_first)}
+    pool.close()
+
+    assert isinstance(results[pages[0]][1], RuntimeError)
+    assert 'trang 1' in results[pages[1]][0]
+    first, second = HttpDriver.created
+    assert first.crashed and first.quit_called
+    assert second.pages == 2
+
+
+def test_failure_on_live_driver_keeps_it(pages):
+    pool = BrowserPool(size=1, max_pages=100, driver_factory=HttpDriver)
+    with pytest.raises(ValueError):
+        with pool.lease() as driver:
+            driver.get(pages[0])
+            raise ValueError("lỗi trích xuất")
+    with pool.lease() as driver:
+        assert driver is HttpDriver.created[0]
+    pool.close()
+
+
+def test_map_stops_taking_urls_when_stop_event_is_set(pages):
+    pool = BrowserPool(size=1, max_pages=100, driver_factory=HttpDriver)
+    stop_event = threading.Event()
+
+    def stop_after_first(driver, url):
+        stop_event.set()
+        return load(driver, url)
+
+    results = list(pool.map(pages, stop_after_first, stop_event))
+    pool.close()
+    assert len(results) == 1
+
+
+def test_lease_after_close_raises(pages):
+    pool = BrowserPool(size=1, max_pages=100, driver_factory=HttpDriver)
+    with pool.lease() as driver:
+        driver.get(pages[0])
+    pool.close()
+    assert HttpDriver.created[0].quit_called
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
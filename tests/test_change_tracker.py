@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import scrape_cli
+from change_tracker import CHANGED, NEW, REMOVED, ChangeTracker
+from conftest import listing_page
+
+
+def rows(url, *items):
+    return [(url, name, price, 'ok') for name, price in items]
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = ChangeTracker(str(tmp_path / 'state.sqlite'))
+    yield tracker
+    tracker.close()
+
+
+def test_update_page_reports_new_changed_and_removed(tracker):
+    url = 'https://shop.vn/a'
+    tracker.update_page(url, 'b1', 'r1', rows(url, ('A', '1'), ('B', '2')))
+    tracker.changes.clear()
+    changes = tracker.update_page(url, 'b2', 'r2', rows(url, ('A', '5'), ('C', '3')))
+    assert [(change, row[1]) for change, row, _ in changes] == [(CHANGED, 'A'), (NEW, 'C'), (REMOVED, 'B')]
+
+
+def test_remove_missing_reports_pages_no_longer_listed(tracker):
+    tracker.update_page('https://shop.vn/a', 'b', 'r', rows('https://shop.vn/a', ('A', '1')))
+    tracker.update_page('https://shop.vn/b', 'b', 'r', rows('https://shop.vn/b', ('B', '1'), ('B2', '2')))
+    tracker.changes.clear()
+
+    changes = tracker.remove_missing(['https://shop.vn/a?utm_source=x'])
+    assert [(change, row[1]) for change, row, _ in changes] == [(REMOVED, 'B'), (REMOVED, 'B2')]
+    assert tracker.stats['pages_removed'] == 1
+    assert tracker.page_state('https://shop.vn/b') is None
+    assert tracker.page_state('https://shop.vn/a') is not None
+    # Gọi lại không báo trùng
+    assert tracker.remove_missing(['https://shop.vn/a']) == []
+
+
+def test_cli_prune_missing(static_site, tmp_path):
+    base, root = static_site
+    for name in ('a', 'b'):
+        (root / f'{name}.html').write_text(listing_page(2, prefix=name.upper()))
+    urls = tmp_path / 'urls.txt'
+    state, changes = str(tmp_path / 'state.sqlite'), tmp_path / 'changes.jsonl'
+    options = ['-o', str(tmp_path / 'out.jsonl'), '--listing', '.product-box', '--state', state,
+               '--changes', str(changes), '--ignore-robots', '-q']
+
+    urls.write_text(f'{base}/a.html\n{base}/b.html\n')
+    assert scrape_cli.main([str(urls)] + options) == 0
+
+    urls.write_text(f'{base}/a.html\n')
+    assert scrape_cli.main([str(urls)] + options) == 0
+    assert changes.read_text() == ''
+
+    assert scrape_cli.main([str(urls)] + options + ['--prune-missing']) == 0
+    removed = [json.loads(line) for line in changes.read_text().splitlines()]
+    assert [(row['change'], row['name']) for row in removed] == [(REMOVED, 'B 0'), (REMOVED, 'B 1')]
+
+
+def test_cli_rejects_listing_with_crawl(tmp_path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text('https://shop.vn/\n')
+    with pytest.raises(SystemExit) as exc:
+        scrape_cli.main([str(urls), '-o', str(tmp_path / 'out.jsonl'), '--listing', '.product-box', '--crawl'])
+    assert exc.value.code == 2
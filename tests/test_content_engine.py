@@ -0,0 +1,52 @@
+import pytest
+
+from content_engine import ContentExtractor
+from extraction_plan import ExtractionPlan
+
+BACKENDS = ('html.parser', 'lxml', 'selectolax')
+PARAGRAPH = 'Đoạn văn chính của bài viết, đủ dài để được chấm điểm là nội dung.'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_selector_match_keeps_layout_blocks(backend):
+    """Khối khớp selector được lấy như get_text(strip=True), không bị lọc khối phụ"""
+    html = (f'<html><body><div class="post-content"><div class="row has-sidebar"><p>{PARAGRAPH}</p></div>'
+            f'<div class="share-buttons">Chia sẻ</div><script>x = 1</script></div></body></html>')
+    fields = ExtractionPlan('h1', '.post-content', backend).extract(html, 'http://example.test/')
+    assert fields['steps']['content'] == '.post-content'
+    assert fields['content'] == f'{PARAGRAPH}Chia sẻ'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_density_fallback_skips_boilerplate(backend):
+    html = (f'<html><body><article><div class="share-buttons"><p>{PARAGRAPH} chia sẻ</p></div>'
+            f'<div class="has-sidebar comments-open"><p>{PARAGRAPH}</p><p>{PARAGRAPH}</p></div>'
+            f'<div id="comments"><p>{PARAGRAPH} bình luận</p></div></article></body></html>')
+    fields = ExtractionPlan('h1', '.khong-co', backend).extract(html, 'http://example.test/')
+    assert fields['steps']['content'] == 'fallback:density'
+    assert fields['content'] == f'{PARAGRAPH} {PARAGRAPH}'
+
+
+@pytest.mark.parametrize('marker, boilerplate', [
+    ('comments', True), ('comment-item', True), ('share-buttons', True), ('related-news', True),
+    ('tin-lien-quan', True), ('has-sidebar', False), ('no-sidebar', False), ('comments-open', False),
+    ('tag-share', False), ('navigation-title', False),
+])
+def test_boilerplate_matches_whole_class_tokens(marker, boilerplate):
+    from bs4 import BeautifulSoup
+
+    node = BeautifulSoup(f'<div class="row {marker}"></div>', 'html.parser').div
+    assert ContentExtractor('html.parser')._is_boilerplate(node) is boilerplate
+
+
+@pytest.mark.parametrize('backend', BACKENDS + ('html5lib',))
+@pytest.mark.parametrize('content_engine', ('density', 'legacy'))
+def test_script_text_is_excluded_the_same_way_in_every_backend(backend, content_engine):
+    html = ('<html><head><title>Tiêu đề trang</title></head><body>'
+            '<h1>Tiêu đề<script>var x = 1;</script><style>.a {}</style></h1>'
+            f'<article><p>{PARAGRAPH}</p><script>track()</script><template>mẫu</template></article>'
+            '</body></html>')
+    plan = ExtractionPlan('h1', '.khong-co', backend, content_engine=content_engine)
+    fields = plan.extract(html, 'http://example.test/')
+    assert fields['title'] == 'Tiêu đề'
+    assert fields['content'] == PARAGRAPH
@@ -0,0 +1,125 @@
+import json
+import time
+
+import pytest
+
+import scrape_cli
+from crawl_journal import DONE, FAILED, PENDING, CrawlJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'journal.sqlite')
+
+
+def test_rerun_skips_done_and_retries_failed(path):
+    journal = CrawlJournal(path, 'a')
+    assert journal.submit(['https://x.com/1', 'https://x.com/2', 'https://x.com/1#top']) == [
+        'https://x.com/1', 'https://x.com/2'
+    ]
+    journal.mark_done('https://x.com/1', {'title': 'một'})
+    journal.mark_failed('https://x.com/2', 'timeout')
+    journal.close()
+
+    journal = CrawlJournal(path, 'a')
+    assert journal.submit(['https://x.com/1', 'https://x.com/2']) == ['https://x.com/2']
+    assert journal.counts() == {PENDING: 1, DONE: 1, FAILED: 0}
+    journal.close()
+
+
+def test_done_url_from_another_job_is_copied_into_new_job(path):
+    first = CrawlJournal(path, 'a')
+    first.submit(['https://x.com/1'])
+    first.mark_done('https://x.com/1', {'title': 'một'})
+
+    second = CrawlJournal(path, 'b')
+    assert second.submit(['https://x.com/1', 'https://x.com/2']) == ['https://x.com/2']
+    second.mark_done('https://x.com/2', {'title': 'hai'})
+
+    assert [r['title'] for r in second.results()] == ['một', 'hai']
+    assert second.counts() == {PENDING: 0, DONE: 2, FAILED: 0}
+    # Job cũ giữ nguyên kết quả và không nhận URL của job mới
+    assert [r['title'] for r in first.results()] == ['một']
+    first.close()
+    second.close()
+
+
+def test_failure_in_new_job_does_not_touch_old_job(path):
+    first = CrawlJournal(path, 'a')
+    first.submit(['https://x.com/1'])
+    first.mark_failed('https://x.com/1', 'timeout')
+
+    second = CrawlJournal(path, 'b')
+    assert second.submit(['https://x.com/1']) == ['https://x.com/1']
+    second.mark_done('https://x.com/1', {'title': 'một'})
+    assert first.counts() == {PENDING: 0, DONE: 0, FAILED: 1}
+    first.close()
+    second.close()
+
+
+def test_done_results_expire_after_ttl(path):
+    journal = CrawlJournal(path, 'a', done_ttl=60)
+    journal.submit(['https://x.com/1', 'https://x.com/2'])
+    journal.mark_done('https://x.com/1', {'title': 'cũ'})
+    journal.mark_done('https://x.com/2', {'title': 'mới'})
+    journal._conn.execute("UPDATE urls SET updated_at = ? WHERE key = ?", (time.time() - 120, 'https://x.com/1'))
+    journal._conn.commit()
+
+    assert journal.submit(['https://x.com/1', 'https://x.com/2']) == ['https://x.com/1']
+    other = CrawlJournal(path, 'b', done_ttl=60)
+    assert other.submit(['https://x.com/1', 'https://x.com/2']) == ['https://x.com/1']
+    journal.close()
+    other.close()
+
+
+def test_rescrape_ignores_done_state(path):
+    journal = CrawlJournal(path, 'a')
+    journal.submit(['https://x.com/1'])
+    journal.mark_done('https://x.com/1', {'title': 'một'})
+    journal.close()
+
+    journal = CrawlJournal(path, 'a', rescrape=True)
+    assert journal.submit(['https://x.com/1']) == ['https://x.com/1']
+    assert journal.counts() == {PENDING: 1, DONE: 0, FAILED: 0}
+    journal.close()
+
+
+def test_resume_returns_stored_results_of_done_urls(path):
+    first = CrawlJournal(path, 'a')
+    first.submit(['https://x.com/1', 'https://x.com/2'])
+    first.mark_done('https://x.com/1', {'title': 'một'})
+    first.mark_done('https://x.com/2', {'title': 'hai'})
+
+    todo, done = first.resume(['https://x.com/1', 'https://x.com/3'])
+    assert todo == ['https://x.com/3']
+    assert done == [('https://x.com/1', {'title': 'một'})]
+    # Job không dùng chung kết quả thì cào lại URL đã xong ở job khác
+    private = CrawlJournal(path, 'b', shared=False)
+    assert private.resume(['https://x.com/2']) == (['https://x.com/2'], [])
+    private.forget()
+    assert private.counts() == {PENDING: 0, DONE: 0, FAILED: 0}
+    first.close()
+    private.close()
+
+
+def test_cli_resume_writes_done_urls_to_output(static_site, tmp_path, path):
+    base, root = static_site
+    for name in ('p1', 'p2', 'p3'):
+        (root / f'{name}.html').write_text(f'<html><body><h1>Trang {name}</h1><p>Nội dung {name}</p></body></html>')
+    urls, output = tmp_path / 'urls.txt', tmp_path / 'out.jsonl'
+    options = ['-o', str(output), '--journal', path, '--ignore-robots', '-q']
+
+    urls.write_text(f'{base}/p1.html\n{base}/p2.html\n')
+    assert scrape_cli.main([str(urls)] + options) == 0
+    urls.write_text(f'{base}/p1.html\n{base}/p2.html\n{base}/p3.html\n')
+    assert scrape_cli.main([str(urls)] + options) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(row['url'] for row in rows) == [f'{base}/{name}.html' for name in ('p1', 'p2', 'p3')]
+
+
+def test_cli_rejects_journal_with_crawl(tmp_path, path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text('https://x.com/\n')
+    with pytest.raises(SystemExit) as exc:
+        scrape_cli.main([str(urls), '-o', str(tmp_path / 'out.jsonl'), '--crawl', '--journal', path])
+    assert exc.value.code == 2
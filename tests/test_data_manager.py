@@ -0,0 +1,52 @@
+import pytest
+
+import scrape_cli
+from data_manager import DataManager
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def record(i, **extra):
+    return dict(url=f'https://x.com/{i}', title=f'Bài {i}', content='Nội dung', date='', images=[],
+                timestamp='2024-05-01 10:00:00', **extra)
+
+
+def test_extra_fields_empty_in_first_batch_keep_declared_types(tmp_path):
+    info = {'url': 'https://x.com/a.png', 'status': 200, 'bytes': 512, 'width': 40, 'height': 30,
+            'content_type': 'image/png'}
+    records = [record(0, links=[], next_pages=[], image_info=[], note=None),
+               record(1, links=None, next_pages=None, image_info=None, note=None),
+               record(2, links=['https://x.com/b'], next_pages=['https://x.com/?p=2'], image_info=[info], note='ghi chú'),
+               record(3, links=[], next_pages=[], image_info=[], note={'a': 1})]
+    path = str(tmp_path / 'out.parquet')
+    dm = DataManager()
+    assert dm.save_to_parquet(iter(records), path, batch_size=2) == 4
+
+    schema = pq.read_schema(path)
+    assert schema.field('links').type == pa.list_(pa.string())
+    assert schema.field('image_info').type.value_type.field('width').type == pa.int64()
+    assert schema.field('note').type == pa.string()
+
+    rows = dm.load_from_parquet(path)
+    assert rows[2]['links'] == ['https://x.com/b']
+    assert rows[2]['image_info'] == [info]
+    assert rows[2]['note'] == 'ghi chú'
+    assert rows[3]['note'] == '{"a": 1}'
+
+
+def test_columns_first_seen_after_first_batch_are_dropped_with_warning(tmp_path, caplog):
+    records = [record(0), record(1), record(2, extra='x')]
+    path = str(tmp_path / 'out.parquet')
+    DataManager().save_to_parquet(records, path, batch_size=2)
+    assert 'extra' not in pq.read_schema(path).names
+    assert 'extra' in caplog.text
+
+
+def test_cli_parquet_without_records_exits_cleanly(static_site, tmp_path):
+    base, root = static_site
+    urls = tmp_path / 'urls.txt'
+    urls.write_text(f'{base}/khong-co.html\n')
+    output = tmp_path / 'out.parquet'
+    assert scrape_cli.main([str(urls), '-o', str(output), '--ignore-robots', '-q']) == 1
+    assert not output.exists()
@@ -0,0 +1,60 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from extract_pool import PendingExtraction
+from web_scraper import WebScraper
+
+NEWS = ('<html><head><title>Tin {i}</title></head><body><h1>Tiêu đề {i}</h1>'
+        '<article><p>Nội dung bài {i}, đủ dài để được coi là đoạn văn của bài viết.</p></article></body></html>')
+
+
+def test_pending_extraction_releases_host_slot():
+    """Trang chờ trích xuất không giữ lượt của host: các trang sau vẫn được tải"""
+    scraper = WebScraper(robots=False, image_probe=False)
+    futures = []
+
+    def scrape(url):
+        future = Future()
+        futures.append(future)
+        return PendingExtraction(future, lambda fields: dict(fields, url=url))
+
+    urls = [f'http://example.test/{i}' for i in range(3)]
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.extend(scraper._dispatch(urls, scrape, max_workers=1, per_host_concurrency=1,
+                                                        delay=0)),
+        daemon=True
+    )
+    worker.start()
+    deadline = time.monotonic() + 5
+    while len(futures) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Cả ba trang đã được tải trong khi chưa trang nào trích xuất xong
+    assert len(futures) == 3
+    for i, future in enumerate(futures):
+        future.set_result({'title': str(i)})
+    worker.join(timeout=5)
+    scraper.close()
+
+    assert not worker.is_alive()
+    assert sorted((url, data['title']) for url, data in results) == [(url, str(i)) for i, url in enumerate(urls)]
+
+
+def test_process_pool_matches_inline_extraction(static_site):
+    base, root = static_site
+    for i in range(4):
+        (root / f'{i}.html').write_text(NEWS.format(i=i), encoding='utf-8')
+    urls = [f'{base}/{i}.html' for i in range(4)]
+
+    records = {}
+    for processes in (0, 2):
+        scraper = WebScraper(extract_processes=processes, robots=False, image_probe=False)
+        records[processes] = {
+            url: (data['title'], data['content'])
+            for url, data in scraper.scrape_many(urls, 'h1', 'article', delay=0)
+        }
+        scraper.close()
+
+    assert records[2] == records[0]
+    assert records[0][urls[1]][0] == 'Tiêu đề 1'
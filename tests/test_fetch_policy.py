@@ -0,0 +1,87 @@
+import threading
+import time
+
+import requests
+
+from fetch_policy import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from web_scraper import WebScraper
+
+
+def test_breaker_opens_after_threshold_and_probes_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow('a') == 0
+    assert not breaker.record_failure('a')
+    assert breaker.record_failure('a')
+    assert 0 < breaker.allow('a') <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.allow('a') == 0
+    assert breaker._hosts['a']['state'] == HALF_OPEN
+    # Chỉ một request thử tại một thời điểm
+    assert breaker.allow('a') == float('inf')
+
+    breaker.record_success('a')
+    assert breaker._hosts['a']['state'] == CLOSED
+    assert breaker.allow('a') == 0
+
+
+def test_release_probe_allows_new_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure('a')
+    assert breaker.allow('a') == 0
+    assert breaker.allow('a') == float('inf')
+
+    breaker.release_probe('a')
+    assert breaker._hosts['a']['state'] == OPEN
+    assert breaker.allow('a') == 0
+
+
+def test_release_probe_keeps_closed_host_closed():
+    breaker = CircuitBreaker()
+    breaker.release_probe('a')
+    assert breaker._hosts['a']['state'] == CLOSED
+
+
+def test_dispatch_does_not_hang_when_probe_fails_without_outcome():
+    """Request thử kết thúc bằng lỗi trích xuất (không phải lỗi mạng) không được giữ host ở trạng thái nửa mở"""
+    scraper = WebScraper(robots=False, image_probe=False)
+    scraper.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    errors = iter([requests.ConnectionError('mất kết nối'), ValueError('lỗi parse')])
+
+    def scrape(url):
+        error = next(errors, None)
+        if error is not None:
+            raise error
+        return {'url': url}
+
+    urls = [f'http://example.test/{i}' for i in range(3)]
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.extend(scraper._dispatch(urls, scrape, delay=0, reset_host_state=False)),
+        daemon=True
+    )
+    worker.start()
+    worker.join(timeout=10)
+    scraper.stop_scraping()
+    scraper.close()
+
+    assert not worker.is_alive(), f"bộ điều phối bị treo, ngắt mạch: {scraper.breaker._hosts}"
+    assert sorted(url for url, _ in results) == urls
+    assert sum(1 for _, data in results if data) == 2
+
+
+def test_rejected_content_closes_half_open_breaker():
+    """Phản hồi bị bỏ qua (quá lớn, sai content-type) vẫn cho biết host còn sống"""
+    from transport import ContentRejected
+
+    scraper = WebScraper(robots=False, image_probe=False)
+    scraper.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    scraper.breaker.record_failure('example.test')
+    assert scraper.breaker.allow('example.test') == 0
+
+    def scrape(url):
+        raise ContentRejected('Bỏ qua nội dung kiểu application/pdf')
+
+    assert scraper._attempt('http://example.test/a.pdf', scrape) == (None, None)
+    assert scraper.breaker._hosts['example.test']['state'] == CLOSED
+    scraper.close()
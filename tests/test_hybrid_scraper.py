@@ -0,0 +1,129 @@
+import pytest
+
+import selenium_crawler
+from browser_pool import BrowserPool
+from change_tracker import ChangeTracker
+from conftest import listing_page
+from crawl_journal import DONE, CrawlJournal
+from hybrid_scraper import HybridScraper, RenderMemory
+from listing_plan import STATUS_OK
+from web_scraper import WebScraper
+
+SELECTORS = ('.product-box', '.product-name', '.special-price')
+JS_SHELL = '<html><body><div id="app"></div><script src="app.js"></script></body></html>'
+
+
+@pytest.fixture
+def site(static_site):
+    base, root = static_site
+    (root / 'robots.txt').write_text('User-agent: *\nDisallow: /private/\n')
+    (root / 'private').mkdir()
+    (root / 'static.html').write_text(listing_page(3))
+    (root / 'shell.html').write_text(JS_SHELL)
+    (root / 'private' / 'shell.html').write_text(JS_SHELL)
+    return base
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Thay lượt render bằng trình duyệt: ghi lại URL được render, trả về 4 sản phẩm"""
+    urls = []
+
+    def extract_products(driver, url, selector_item, selector_title, selector_price, **kwargs):
+        urls.append(url)
+        return [(url, f'R{i}', f'{i}đ', STATUS_OK) for i in range(4)]
+
+    monkeypatch.setattr(selenium_crawler, 'extract_products', extract_products)
+    return urls
+
+
+def make_hybrid(tmp_path, memory=None):
+    scraper = WebScraper(image_probe=False)
+    pool = BrowserPool(size=1, driver_factory=object)
+    memory = memory or RenderMemory(str(tmp_path / 'render_state.json'))
+    return HybridScraper(scraper, pool, memory), scraper, pool
+
+
+def run(hybrid, urls, **options):
+    return dict(hybrid.scrape_listings(urls, *SELECTORS, delay=0, **options))
+
+
+def test_only_incomplete_pages_are_rendered(site, rendered, tmp_path):
+    hybrid, scraper, pool = make_hybrid(tmp_path)
+    urls = [f'{site}/static.html', f'{site}/shell.html', f'{site}/missing.html', f'{site}/private/shell.html']
+    results = run(hybrid, urls)
+    pool.close()
+    scraper.close()
+
+    # 404 và URL bị robots.txt chặn không được mở bằng trình duyệt
+    assert rendered == [f'{site}/shell.html']
+    assert [row[1] for row in results[f'{site}/static.html']] == ['SP 0', 'SP 1', 'SP 2']
+    assert len(results[f'{site}/shell.html']) == 4
+    assert results[f'{site}/missing.html'] is None
+    assert results[f'{site}/private/shell.html'] is None
+    assert hybrid.stats['static'] == 1
+    assert hybrid.stats['incomplete'] == 1
+
+
+def test_direct_render_respects_robots_and_journal(site, rendered, tmp_path):
+    memory = RenderMemory(str(tmp_path / 'render_state.json'), learn_after=1)
+    for url in (f'{site}/shell.html', f'{site}/private/shell.html'):
+        memory.record_render(url, [(url, 'R', '1đ', STATUS_OK)], after_static=True)
+    hybrid, scraper, pool = make_hybrid(tmp_path, memory)
+    journal = CrawlJournal(str(tmp_path / 'journal.sqlite'), 'job')
+    results = run(hybrid, [f'{site}/shell.html', f'{site}/private/shell.html'], journal=journal)
+    pool.close()
+    scraper.close()
+
+    assert rendered == [f'{site}/shell.html']
+    assert hybrid.stats['direct'] == 1
+    assert results[f'{site}/private/shell.html'] is None
+    assert journal.counts() == {'pending': 0, 'done': 1, 'failed': 1}
+    journal.close()
+
+
+def test_render_after_static_marks_journal_done(site, rendered, tmp_path):
+    hybrid, scraper, pool = make_hybrid(tmp_path)
+    journal = CrawlJournal(str(tmp_path / 'journal.sqlite'), 'job')
+    run(hybrid, [f'{site}/shell.html'], journal=journal)
+    pool.close()
+    scraper.close()
+
+    assert journal.counts()[DONE] == 1
+    assert [row[1] for row in next(journal.results())] == ['R0', 'R1', 'R2', 'R3']
+    journal.close()
+
+
+def test_incomplete_static_rows_do_not_reach_tracker(site, rendered, tmp_path):
+    tracker = ChangeTracker(str(tmp_path / 'changes.sqlite'))
+    for _ in range(2):
+        tracker.changes.clear()
+        hybrid, scraper, pool = make_hybrid(tmp_path)
+        run(hybrid, [f'{site}/shell.html'], tracker=tracker)
+        pool.close()
+        scraper.close()
+    # Lượt sau không có thay đổi giả (sản phẩm bị xóa rồi lại thêm)
+    assert tracker.changes == []
+    tracker.close()
+
+
+def test_journal_is_submitted_once_and_resumed(site, rendered, tmp_path, monkeypatch):
+    hybrid, scraper, pool = make_hybrid(tmp_path)
+    journal = CrawlJournal(str(tmp_path / 'journal.sqlite'), 'job')
+    calls = []
+    resume = journal.resume
+    monkeypatch.setattr(journal, 'resume', lambda urls: calls.append(urls) or resume(urls))
+    urls = [f'{site}/static.html', f'{site}/shell.html', f'{site}/missing.html']
+    run(hybrid, urls, journal=journal)
+    assert len(calls) == 1
+    assert journal.counts() == {'pending': 0, 'done': 2, 'failed': 1}
+
+    # Lượt sau trả lại kết quả đã lưu, không tải hay render lại trang đã xong
+    rendered.clear()
+    results = run(hybrid, urls, journal=journal)
+    pool.close()
+    scraper.close()
+    assert rendered == []
+    assert [row[1] for row in results[f'{site}/static.html']] == ['SP 0', 'SP 1', 'SP 2']
+    assert results[f'{site}/missing.html'] is None
+    journal.close()
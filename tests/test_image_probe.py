@@ -0,0 +1,90 @@
+import struct
+import threading
+import time
+
+import requests
+
+from image_probe import ImageProbe
+from robots import RobotsCache
+from web_scraper import WebScraper
+
+
+def png(width, height):
+    """Phần đầu file PNG, đủ để đọc kích thước"""
+    return b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + struct.pack('>II', width, height) + b'\x00' * 200
+
+
+def make_site(root):
+    (root / 'robots.txt').write_text('User-agent: *\nDisallow: /private/\n')
+    (root / 'private').mkdir()
+    (root / 'big.png').write_bytes(png(300, 200))
+    (root / 'pixel.png').write_bytes(png(1, 1))
+    (root / 'private' / 'pixel.png').write_bytes(png(1, 1))
+
+
+def test_filter_respects_robots_of_image_host(static_site):
+    base, root = static_site
+    make_site(root)
+    probe = ImageProbe(robots=RobotsCache(requests.Session()))
+    urls = [f'{base}/big.png', f'{base}/pixel.png', f'{base}/private/pixel.png']
+    kept, infos = probe.filter(urls)
+    probe.close()
+
+    # Ảnh bị robots.txt chặn không được kiểm tra và được giữ như ảnh không xác định
+    assert kept == [f'{base}/big.png', f'{base}/private/pixel.png']
+    assert (infos[0]['width'], infos[0]['height']) == (300, 200)
+    assert infos[1]['status'] is None
+    assert probe.stats['skipped'] == 1
+    assert probe.stats['filtered'] == 1
+
+
+def test_probes_per_host_are_limited(monkeypatch):
+    probe = ImageProbe(per_host_concurrency=2, max_workers=8)
+    lock = threading.Lock()
+    active = {'now': 0, 'max': 0}
+
+    def request(url, info):
+        with lock:
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+        return dict(info, status=200)
+
+    monkeypatch.setattr(probe, '_request', request)
+    probe.filter([f'http://img.example.test/{i}.png' for i in range(8)])
+    probe.close()
+    assert active['max'] == 2
+
+
+def test_failing_image_host_is_skipped_after_breaker_opens(monkeypatch):
+    probe = ImageProbe(per_host_concurrency=1)
+    probe.breaker.failure_threshold = 2
+    calls = []
+
+    def request(url, info):
+        calls.append(url)
+        return info  # status None: không kết nối được
+
+    monkeypatch.setattr(probe, '_request', request)
+    kept, _ = probe.filter([f'http://down.example.test/{i}.png' for i in range(5)])
+    probe.close()
+    assert len(kept) == 5
+    assert len(calls) == 2
+    assert probe.stats['skipped'] == 3
+
+
+def test_scraper_probes_images_through_robots(static_site):
+    base, root = static_site
+    make_site(root)
+    (root / 'page.html').write_text(
+        f'<html><body><h1>Tiêu đề</h1><div class="content"><p>Nội dung</p>'
+        f'<img src="{base}/big.png"><img src="{base}/pixel.png"><img src="{base}/private/pixel.png">'
+        f'</div></body></html>'
+    )
+    scraper = WebScraper(image_probe=True)
+    [(_, record)] = list(scraper.scrape_many([f'{base}/page.html'], 'h1', '.content', delay=0))
+    scraper.close()
+    assert record['images'] == [f'{base}/big.png', f'{base}/private/pixel.png']
+    assert [info['status'] for info in record['image_info']] == [200, None]
@@ -0,0 +1,75 @@
+import pytest
+
+from record_store import RecordStore
+
+
+def record(url, title='Tiêu đề', content='Nội dung', timestamp='2024-05-01 10:00:00', **extra):
+    return dict(url=url, title=title, content=content, date='', images=['a.jpg'], timestamp=timestamp, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RecordStore(str(tmp_path / 'kho.sqlite'), batch_size=2) as store:
+        yield store
+
+
+def test_records_are_written_in_batches(store):
+    store.write(record('https://a.com/1'))
+    assert store._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 0
+    store.write(record('https://a.com/2'))
+    assert store._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 2
+    store.write(record('https://a.com/3'))
+    # count() ghi phần lô còn chờ trước khi đếm
+    assert store.count() == 3
+
+
+def test_missing_url_is_rejected_and_missing_fields_are_invalid(store):
+    store.write_all([
+        record(None),
+        record('https://a.com/1', title=''),
+        record('https://a.com/2', content=None),
+        record('https://a.com/3')
+    ])
+    assert store.stats['rejected'] == 1
+    assert store.stats['missing_title'] == 1
+    assert store.stats['missing_content'] == 1
+    assert store.count() == 3
+    assert store.count(valid_only=True) == 1
+
+
+def test_rescrape_replaces_row_and_keeps_first_seen(store):
+    store.write_all([record('https://www.a.com/1?utm_source=x', title='Cũ', timestamp='2024-05-01 10:00:00')])
+    store.write_all([record('https://www.a.com/1', title='Mới', timestamp='2024-05-02 10:00:00')])
+
+    rows = list(store.query(columns=['url', 'title', 'timestamp', 'first_seen']))
+    assert len(rows) == 1
+    assert rows[0]['title'] == 'Mới'
+    assert rows[0]['timestamp'] == '2024-05-02 10:00:00'
+    assert rows[0]['first_seen'] == '2024-05-01 10:00:00'
+    assert store.stats['inserted'] == 1
+    assert store.stats['updated'] == 1
+
+
+def test_query_filters_and_restores_extra_fields(store):
+    store.write_all([
+        record('https://www.a.com/1', timestamp='2024-05-01 10:00:00', links=['x']),
+        record('https://a.com/2', timestamp='2024-05-03 10:00:00'),
+        record('https://b.com/1', timestamp='2024-05-02 10:00:00')
+    ])
+    assert store.count(domain='www.a.com') == 2
+    assert store.count(domain=['a.com', 'b.com'], since='2024-05-02') == 2
+    assert store.count(until='2024-05-02') == 1
+    assert store.count(url_prefix='https://b.com/') == 1
+
+    rows = list(store.query(domain='a.com', order_by='timestamp', chunk_size=1))
+    assert [row['url'] for row in rows] == ['https://www.a.com/1', 'https://a.com/2']
+    assert rows[0]['images'] == ['a.jpg']
+    assert rows[0]['links'] == ['x']
+    assert 'links' not in rows[1]
+
+
+def test_query_rejects_unknown_columns(store):
+    with pytest.raises(ValueError):
+        list(store.query(columns=['url', 'password']))
+    with pytest.raises(ValueError):
+        list(store.query(order_by='extra; DROP TABLE records'))
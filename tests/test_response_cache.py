@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache.sqlite')
+
+
+def test_variants_of_same_url_are_separate_entries(path):
+    cache = ResponseCache(path, ttl=60)
+    cache.store('https://x.com/a', {'ETag': '"1"'}, {'title': 'h1'}, variant='lxml|h1')
+    cache.store('https://x.com/a', {'ETag': '"1"'}, {'title': 'h1', 'image_info': []}, variant='lxml|h1|image_info')
+
+    assert cache.lookup('https://x.com/a', 'lxml|h1')['record'] == {'title': 'h1'}
+    assert cache.lookup('https://x.com/a', 'lxml|h1|image_info')['record'] == {'title': 'h1', 'image_info': []}
+    assert cache.lookup('https://x.com/a', 'lxml|.title') is None
+    cache.close()
+
+
+def test_refresh_only_touches_its_variant(path):
+    cache = ResponseCache(path, ttl=60)
+    cache.store('https://x.com/a', {}, {'title': 'a'}, variant='v1')
+    cache.store('https://x.com/a', {}, {'title': 'b'}, variant='v2')
+    cache._conn.execute("UPDATE entries SET stored_at = ?", (time.time() - 120,))
+
+    cache.refresh('https://x.com/a', {'ETag': '"2"'}, variant='v1')
+    fresh, stale = cache.lookup('https://x.com/a', 'v1'), cache.lookup('https://x.com/a', 'v2')
+    assert fresh['fresh'] and fresh['etag'] == '"2"'
+    assert not stale['fresh'] and stale['etag'] is None
+    cache.close()
+
+
+def test_eviction_counts_every_variant(path):
+    cache = ResponseCache(path, max_bytes=60)
+    cache.store('https://x.com/a', {}, {'t': 'x' * 20}, variant='v1')
+    cache.store('https://x.com/a', {}, {'t': 'y' * 20}, variant='v2')
+    cache.store('https://x.com/b', {}, {'t': 'z' * 20}, variant='v1')
+    assert cache.stats['evictions'] == 1
+    assert cache.lookup('https://x.com/a', 'v1') is None
+    assert cache.lookup('https://x.com/b', 'v1') is not None
+    cache.close()
@@ -0,0 +1,98 @@
+import requests
+
+from robots import RobotsCache, RobotsRules
+
+BASE = 'https://example.com'
+
+
+def test_longest_match_wins():
+    rules = RobotsRules.parse(
+        'User-agent: *\n'
+        'Disallow: /shop/\n'
+        'Allow: /shop/public/\n'
+        'Disallow: /shop/public/draft\n'
+    )
+    assert not rules.allowed(f'{BASE}/shop/cart')
+    assert rules.allowed(f'{BASE}/shop/public/page')
+    assert not rules.allowed(f'{BASE}/shop/public/draft-1')
+    assert rules.allowed(f'{BASE}/blog/')
+
+
+def test_allow_wins_ties_regardless_of_order():
+    rules = RobotsRules.parse('User-agent: *\nDisallow: /page\nAllow: /page\n')
+    assert rules.allowed(f'{BASE}/page')
+    rules = RobotsRules.parse('User-agent: *\nAllow: /page\nDisallow: /page\n')
+    assert rules.allowed(f'{BASE}/page')
+
+
+def test_wildcard_and_end_anchor():
+    rules = RobotsRules.parse(
+        'User-agent: *\n'
+        'Disallow: /*.pdf$\n'
+        'Disallow: /*?sort=\n'
+    )
+    assert not rules.allowed(f'{BASE}/docs/a.pdf')
+    assert rules.allowed(f'{BASE}/docs/a.pdf.html')
+    assert not rules.allowed(f'{BASE}/list?sort=price')
+    assert rules.allowed(f'{BASE}/list?page=2')
+
+
+def test_specific_agent_group_replaces_star_group():
+    text = (
+        'User-agent: *\n'
+        'Disallow: /\n'
+        '\n'
+        'User-agent: web-scraping\n'
+        'Disallow: /admin/\n'
+        'Crawl-delay: 2\n'
+    )
+    rules = RobotsRules.parse(text, agent='web-scraping-gui')
+    assert rules.allowed(f'{BASE}/news')
+    assert not rules.allowed(f'{BASE}/admin/users')
+    assert rules.crawl_delay == 2.0
+
+    other = RobotsRules.parse(text, agent='another-bot')
+    assert not other.allowed(f'{BASE}/news')
+    assert other.crawl_delay is None
+
+
+def test_consecutive_user_agents_share_a_group_and_sitemaps_are_global():
+    rules = RobotsRules.parse(
+        'User-agent: a\n'
+        'User-agent: b\n'
+        'Disallow: /x  # chú thích\n'
+        'Sitemap: https://example.com/sitemap.xml\n',
+        agent='b'
+    )
+    assert not rules.allowed(f'{BASE}/x')
+    assert rules.sitemaps == ['https://example.com/sitemap.xml']
+
+
+def test_empty_disallow_and_robots_txt_are_always_allowed():
+    rules = RobotsRules.parse('User-agent: *\nDisallow:\n')
+    assert rules.allowed(f'{BASE}/anything')
+    rules = RobotsRules.parse('User-agent: *\nDisallow: /\n')
+    assert not rules.allowed(f'{BASE}/anything')
+    assert rules.allowed(f'{BASE}/robots.txt')
+
+
+def test_cache_treats_missing_robots_as_allow_all(static_site):
+    base, root = static_site
+    cache = RobotsCache(requests.Session())
+    assert cache.allowed(f'{base}/private/page.html')
+
+
+def test_cache_loads_rules_once_per_origin(static_site):
+    base, root = static_site
+    (root / 'robots.txt').write_text('User-agent: *\nDisallow: /private/\n')
+    cache = RobotsCache(requests.Session())
+    assert not cache.allowed(f'{base}/private/page.html')
+    assert cache.allowed(f'{base}/public.html')
+    rules = cache.cached(f'{base}/other.html')
+    assert rules is cache.get(f'{base}/private/page.html')
+
+
+def test_cache_disallows_host_that_cannot_be_reached():
+    cache = RobotsCache(requests.Session())
+    # Cổng 9 (discard) trên máy cục bộ không có server: lỗi kết nối
+    assert not cache.allowed('http://127.0.0.1:9/page')
@@ -0,0 +1,66 @@
+import json
+
+from config import DEFAULT_SELECTORS
+from extraction_plan import ExtractionPlan
+from selector_profiles import SelectorProfiles
+
+URL = 'https://tin.example.vn/bai-{}'
+
+
+def make_profiles(tmp_path, profile=None):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({'example.vn': profile or {'content': '.body, .detail', 'date': '.time, .date'}}))
+    return SelectorProfiles(str(path), learn_after=3, recheck_every=50), path
+
+
+def test_learned_selector_skips_failed_selectors(tmp_path):
+    profiles, _ = make_profiles(tmp_path)
+    for i in range(3):
+        profiles.record(URL.format(i), {'title': 'h1', 'content': '.detail', 'date': '.date'})
+    options = profiles.plan_options(URL.format(9), 'h1', '.body, .detail', '.time, .date')
+    assert options == {'title_selector': 'h1', 'content_selector': '.detail', 'date_selector': '.date'}
+
+
+def test_not_found_and_fallback_steps_are_not_learned(tmp_path):
+    """Vài trang không có ngày đăng hay chỉ lấy được nội dung bằng fallback không tắt selector đã cấu hình"""
+    profiles, _ = make_profiles(tmp_path)
+    for i in range(5):
+        profiles.record(URL.format(i), {'title': 'fallback:url', 'content': 'fallback:div', 'date': ''})
+    assert profiles.learned(URL.format(0)) == {}
+    options = profiles.plan_options(URL.format(9), 'h1', '.body, .detail', '.time, .date')
+    assert options == {'title_selector': 'h1', 'content_selector': '.body, .detail', 'date_selector': '.time, .date'}
+
+
+def test_default_selector_with_fallback_name_is_learned(tmp_path):
+    """Selector 'h1' và 'article' của DEFAULT_SELECTORS không bị coi là bước dự phòng cùng tên"""
+    profiles, _ = make_profiles(tmp_path, {'date': '.date'})
+    plan = ExtractionPlan(DEFAULT_SELECTORS['title'], DEFAULT_SELECTORS['content'])
+    html = '<html><body><h1>Tiêu đề</h1><article><p>Nội dung bài viết</p></article></body></html>'
+    for i in range(3):
+        steps = plan.extract(html, URL.format(i))['steps']
+        assert (steps['title'], steps['content']) == ('h1', 'article')
+        profiles.record(URL.format(i), steps)
+    assert profiles.learned(URL.format(0)) == {'title': 'h1', 'content': 'article'}
+    assert profiles.stats['relearned'] == 0
+
+
+def test_not_found_unlearns_selector(tmp_path):
+    profiles, _ = make_profiles(tmp_path)
+    for i in range(3):
+        profiles.record(URL.format(i), {'date': '.date'})
+    profiles.record(URL.format(3), {'date': ''})
+    assert 'date' not in profiles.learned(URL.format(0))
+    assert profiles.stats['relearned'] == 1
+
+
+def test_save_writes_learned_selectors_and_ignores_stale_fallbacks(tmp_path):
+    profiles, path = make_profiles(tmp_path, {'content': '.body, .detail', 'learned': {'date': '', 'content': 'fallback:div'}})
+    assert profiles.learned(URL.format(0)) == {}
+    for i in range(3):
+        profiles.record(URL.format(i), {'content': '.detail'})
+    profiles.save()
+
+    data = json.loads(path.read_text())
+    assert data['example.vn']['learned'] == {'content': '.detail'}
+    assert [p.name for p in tmp_path.iterdir()] == ['profiles.json']
+    assert SelectorProfiles(str(path)).learned(URL.format(0)) == {'content': '.detail'}
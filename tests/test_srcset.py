@@ -0,0 +1,34 @@
+import pytest
+
+from extraction_plan import best_srcset_url, srcset_candidates
+
+
+def test_candidates_split_on_commas_between_entries():
+    assert list(srcset_candidates('a.jpg 480w, b.jpg 800w,c.jpg')) == [
+        ('a.jpg', '480w'), ('b.jpg', '800w'), ('c.jpg', '')
+    ]
+
+
+def test_candidates_keep_commas_inside_urls():
+    srcset = 'https://cdn.example.com/w_100,h_100/a.jpg 1x, https://cdn.example.com/w_200,h_200/a.jpg 2x'
+    assert list(srcset_candidates(srcset)) == [
+        ('https://cdn.example.com/w_100,h_100/a.jpg', '1x'),
+        ('https://cdn.example.com/w_200,h_200/a.jpg', '2x')
+    ]
+
+
+def test_candidate_url_ending_with_comma_has_no_descriptor():
+    assert list(srcset_candidates('a.jpg,b.jpg 2x')) == [('a.jpg,b.jpg', '2x')]
+    assert list(srcset_candidates('a.jpg, b.jpg 2x')) == [('a.jpg', ''), ('b.jpg', '2x')]
+
+
+@pytest.mark.parametrize('srcset, expected', [
+    ('a.jpg 480w, b.jpg 800w, c.jpg 640w', 'b.jpg'),
+    ('a.jpg, b.jpg 2x, c.jpg 1.5x', 'b.jpg'),
+    ('data:image/gif;base64,R0lGOD 2000w, real.jpg 300w', 'real.jpg'),
+    ('only.jpg', 'only.jpg'),
+    ('', ''),
+    (None, '')
+])
+def test_best_srcset_url_picks_largest_candidate(srcset, expected):
+    assert best_srcset_url(srcset) == expected
@@ -0,0 +1,15 @@
+import json
+
+from stream_writer import StreamingWriter
+
+
+def test_rows_written_by_write_row_are_counted(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    with StreamingWriter(str(path), columns=('url', 'title'), flush_every=2) as writer:
+        writer.write_row(('https://x.com/1', 'Một'))
+        writer.write_row(('https://x.com/2', 'Hai'))
+        writer.write({'url': 'https://x.com/3', 'title': 'Ba'})
+    assert writer.rows == 3
+    # Dòng ghi bằng write_row không tính vào sheet Thống kê
+    assert writer.stats.total == 1
+    assert [json.loads(line)['title'] for line in path.read_text(encoding='utf-8').splitlines()] == ['Một', 'Hai', 'Ba']
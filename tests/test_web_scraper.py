@@ -0,0 +1,107 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import web_scraper
+from extract_pool import PendingExtraction
+from web_scraper import WebScraper
+
+
+class _DripHandler(BaseHTTPRequestHandler):
+    """/fast trả trang ngay; /slow gửi từng mẩu nhỏ trong vài giây"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        chunks = 1 if self.path.startswith('/fast') else 40
+        try:
+            for _ in range(chunks):
+                body = b'<p>' + b'x' * 64 + b'</p>'
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(body), body))
+                self.wfile.flush()
+                if chunks > 1:
+                    time.sleep(0.1)
+            self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def drip_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _DripHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_closing_dispatch_stops_in_flight_requests(drip_server):
+    scraper = WebScraper(robots=False)
+    urls = [f'{drip_server}/fast'] + [f'{drip_server}/slow{i}' for i in range(3)]
+    results = scraper.scrape_many(urls, 'h1', 'p', max_workers=4, per_host_concurrency=4, delay=0)
+
+    url, _ = next(results)
+    assert url.endswith('/fast')
+    started = time.monotonic()
+    results.close()
+    # Các trang chậm cần khoảng 4 giây để tải xong
+    assert time.monotonic() - started < 2
+    assert scraper.stop_flag
+    scraper.close()
+
+
+def test_completed_dispatch_does_not_set_stop_flag(drip_server):
+    scraper = WebScraper(robots=False)
+    results = list(scraper.scrape_many([f'{drip_server}/fast'], 'h1', 'p', delay=0))
+    assert [url for url, _ in results] == [f'{drip_server}/fast']
+    assert not scraper.stop_flag
+    scraper.close()
+
+
+def test_stop_before_dispatch_is_not_cleared(drip_server):
+    scraper = WebScraper(robots=False)
+    scraper.stop_scraping()
+    assert list(scraper.scrape_many([f'{drip_server}/fast'], 'h1', 'p', delay=0)) == []
+    scraper.stop_event.clear()
+    assert len(list(scraper.scrape_many([f'{drip_server}/fast'], 'h1', 'p', delay=0))) == 1
+    scraper.close()
+
+
+def test_finishing_tasks_count_against_max_workers(monkeypatch):
+    """Bước kiểm tra ảnh chiếm thread của pool: request tải trang không phải xếp hàng chờ sau nó"""
+    waits = []
+
+    class RecordingExecutor(web_scraper.ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            if getattr(fn, '__name__', '') != '_attempt':
+                return super().submit(fn, *args)
+            submitted = time.monotonic()
+
+            def attempt(*args):
+                waits.append(time.monotonic() - submitted)
+                return fn(*args)
+            return super().submit(attempt, *args)
+
+    monkeypatch.setattr(web_scraper, 'ThreadPoolExecutor', RecordingExecutor)
+
+    def finish(fields):
+        time.sleep(0.3)
+        return fields
+
+    scraper = WebScraper(robots=False, image_probe=False)
+    urls = [f'http://x.test/{i}' for i in range(6)]
+    results = list(scraper._dispatch(urls, lambda url: PendingExtraction.ready({'url': url}, finish),
+                                     max_workers=2, per_host_concurrency=6, delay=0))
+    scraper.close()
+    assert sorted(url for url, _ in results) == urls
+    assert max(waits) < 0.2
@@ -0,0 +1,111 @@
+import logging
+import socket
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config import REQUEST_CONFIG, TRANSPORT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Bật TCP keep-alive để kết nối rảnh trong pool không bị firewall/NAT cắt ngầm
+SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+_http2_enabled = False
+
+
+class ContentRejected(Exception):
+    """Phản hồi bị bỏ qua vì content-type không phù hợp hoặc nội dung quá lớn"""
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTPAdapter bật TCP keep-alive, không tự thử lại (việc thử lại do WebScraper quyết định)"""
+
+    def __init__(self, pool_connections, pool_maxsize):
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+def enable_http2():
+    """
+    Bật HTTP/2 cho HTTPS nếu urllib3 hỗ trợ và đã cài h2
+
+    urllib3 (>= 2.3) chỉ hỗ trợ HTTP/2 ở mức thử nghiệm và áp dụng cho toàn
+    tiến trình; request vẫn dùng HTTP/1.1 nếu server không hỗ trợ.
+
+    Returns:
+        bool: True nếu đã bật
+    """
+    global _http2_enabled
+    if _http2_enabled:
+        return True
+    try:
+        import h2  # noqa: F401
+        from urllib3.http2 import inject_into_urllib3
+    except ImportError:
+        logger.warning("HTTP/2 cần urllib3 >= 2.3 và gói h2 (pip install h2), tiếp tục dùng HTTP/1.1")
+        return False
+    inject_into_urllib3()
+    _http2_enabled = True
+    return True
+
+
+def default_pool_maxsize():
+    """Số kết nối giữ lại cho mỗi host theo cấu hình"""
+    return TRANSPORT_CONFIG['pool_maxsize'] or REQUEST_CONFIG['per_host_concurrency']
+
+
+def mount_adapters(session, pool_maxsize=None):
+    """Gắn adapter với pool `pool_maxsize` kết nối cho mỗi host vào session"""
+    pool_maxsize = pool_maxsize or default_pool_maxsize()
+    adapter = TransportAdapter(TRANSPORT_CONFIG['pool_connections'], pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return pool_maxsize
+
+
+def create_session(pool_maxsize=None):
+    """
+    Tạo requests.Session dùng chung cho một WebScraper
+
+    Pool mỗi host giữ đủ kết nối cho số request đồng thời tới host đó, nên
+    kết nối được dùng lại thay vì mở mới rồi bỏ. Accept-Encoding gồm các kiểu
+    nén urllib3 giải được: gzip, deflate, br (nếu cài brotli) và zstd (nếu cài
+    zstandard).
+    """
+    if TRANSPORT_CONFIG['http2']:
+        enable_http2()
+
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': REQUEST_CONFIG['user_agent'],
+        'Accept-Encoding': ACCEPT_ENCODING
+    })
+    mount_adapters(session, pool_maxsize)
+    return session
+
+
+def check_response(response, max_body_bytes=None, allowed_content_types=None):
+    """
+    Kiểm tra header trước khi tải nội dung
+
+    Raises:
+        ContentRejected: content-type không được phép hoặc Content-Length vượt giới hạn
+    """
+    if allowed_content_types is None:
+        allowed_content_types = TRANSPORT_CONFIG['allowed_content_types']
+    if allowed_content_types:
+        content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type and content_type not in allowed_content_types:
+            raise ContentRejected(f"Bỏ qua nội dung kiểu {content_type}")
+
+    if max_body_bytes is None:
+        max_body_bytes = TRANSPORT_CONFIG['max_body_bytes']
+    length = response.headers.get('Content-Length')
+    if max_body_bytes and length and length.isdigit() and int(length) > max_body_bytes:
+        raise ContentRejected(f"Nội dung {int(length)} byte vượt giới hạn {max_body_bytes} byte")
@@ -0,0 +1,50 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Tham số theo dõi quảng cáo/phân tích, không làm thay đổi nội dung trang
+TRACKING_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'igshid', 'ref_src', 'zarsrc', 'zanpid'
+}
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url, drop_tracking=True):
+    """
+    Chuẩn hóa URL để dùng làm khóa so sánh
+
+    Chữ thường cho scheme và host, bỏ port mặc định, bỏ fragment, bỏ tham số
+    theo dõi (utm_*, fbclid, gclid...) và sắp xếp tham số query.
+
+    Args:
+        url (str): URL cần chuẩn hóa
+        drop_tracking (bool): Bỏ các tham số theo dõi
+
+    Returns:
+        str: URL đã chuẩn hóa
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username
+        if parts.password:
+            userinfo += f":{parts.password}"
+        host = f"{userinfo}@{host}"
+
+    path = parts.path or '/'
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if drop_tracking:
+        params = [(name, value) for name, value in params if not is_tracking_param(name)]
+    query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, host, path, query, ''))
@@ -1,29 +1,293 @@
 import requests
-from bs4 import BeautifulSoup
 import time
-import re
-from urllib.parse import urljoin, urlparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from urllib.parse import urlparse
 import logging
 
+from config import IMAGE_PROBE_CONFIG, REQUEST_CONFIG, PARSER_CONFIG, ROBOTS_CONFIG, TRANSPORT_CONFIG
+from extract_pool import ExtractionPool, PendingExtraction
+from extraction_plan import ExtractionPlan
+from listing_plan import ListingPlan, fingerprint
+from image_probe import ImageProbe
+from fetch_policy import (CircuitBreaker, HostStats, RETRY_STATUSES, THROTTLE_STATUSES,
+                          backoff_delay, parse_retry_after)
+from rate_limiter import HostRateLimiter
+from robots import RobotsCache
+from run_profiler import timed
+from transport import ContentRejected, check_response, create_session, default_pool_maxsize, mount_adapters
+
+# Thời gian chờ tối đa của bộ điều phối khi không có request nào đang chạy (giây)
+IDLE_POLL_SECONDS = 0.5
+
+
 class WebScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.stop_flag = False
+    def __init__(self, parser_backend=None, cache=None, profiler=None, extract_processes=None, robots=None,
+                 image_probe=None, profiles=None):
+        self.session = create_session()
+        self._pool_maxsize = default_pool_maxsize()
+        self.stop_event = threading.Event()
+        self.parser_backend = parser_backend or PARSER_CONFIG['backend']
+        self._plans = {}
+        self._listing_plans = {}
+        self.cache = cache
+        self.profiler = profiler
+        self.breaker = CircuitBreaker()
+        self.host_stats = HostStats()
+        
+        # robots.txt theo ROBOTS_CONFIG; truyền robots=False để bỏ qua
+        if robots is None and ROBOTS_CONFIG['enabled']:
+            robots = RobotsCache(self.session)
+        self.robots = robots or None
+        
+        # Kiểm tra kích thước ảnh theo IMAGE_PROBE_CONFIG; image_probe=True để bật, False để tắt
+        if image_probe is True or (image_probe is None and IMAGE_PROBE_CONFIG['enabled']):
+            image_probe = ImageProbe(robots=self.robots)
+        self.image_probe = image_probe or None
+        
+        # Selector theo tên miền (SelectorProfiles); None thì mọi trang dùng selector truyền vào
+        self.profiles = profiles
+        
+        # Trích xuất trong pool tiến trình thay vì trong thread tải trang (0 = không dùng)
+        self.extract_processes = PARSER_CONFIG['processes'] if extract_processes is None else extract_processes
+        self._extract_pool = None
+        self._extract_pool_lock = threading.Lock()
+        
+        # Khác None thì bản ghi có thêm links và next_pages (dùng khi cào theo liên kết)
+        self.link_selector = None
         
         # Cấu hình logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def stop_flag(self):
+        return self.stop_event.is_set()
+    
     def stop_scraping(self):
         """Dừng quá trình scraping"""
-        self.stop_flag = True
+        self.stop_event.set()
+    
+    def close(self):
+        """Đóng pool tiến trình trích xuất, pool kiểm tra ảnh (nếu có) và session"""
+        if self._extract_pool is not None:
+            self._extract_pool.close()
+            self._extract_pool = None
+        if self.image_probe is not None:
+            self.image_probe.close()
+        self.session.close()
+    
+    def scrape_many(self, urls, title_selector, content_selector,
+                    max_workers=None, per_host_concurrency=None, delay=None, journal=None,
+                    reset_host_state=True):
+        """
+        Cào dữ liệu từ nhiều URL song song, giới hạn theo từng host
+        
+        URL lỗi tạm thời được đưa lại hàng đợi và thử lại sau thời gian backoff
+        (hoặc Retry-After), không giữ worker trong lúc chờ. Host lỗi liên tục bị
+        ngắt mạch; thống kê lỗi theo host nằm trong self.host_stats.
+        
+        Args:
+            urls (iterable): Danh sách URL cần cào dữ liệu
+            title_selector (str): CSS selector cho tiêu đề
+            content_selector (str): CSS selector cho nội dung
+            max_workers (int): Số request đồng thời tối đa (mặc định theo REQUEST_CONFIG)
+            per_host_concurrency (int): Số request đồng thời tối đa cho mỗi host
+            delay (float): Khoảng cách tối thiểu giữa hai request tới cùng host (giây)
+            journal (CrawlJournal): Nhật ký cào; URL đã xong không bị cào lại mà
+                được trả về với kết quả đã lưu, trạng thái từng URL được ghi
+                ngay khi có kết quả
+            reset_host_state (bool): Xóa trạng thái ngắt mạch và thống kê host
+                của lần gọi trước (False khi cào nhiều đợt trong cùng một lượt)
+            
+        Yields:
+            tuple: (url, dữ liệu) theo thứ tự hoàn thành, dữ liệu là None nếu thất bại
+        """
+        scrape = partial(self._scrape, title_selector=title_selector, content_selector=content_selector)
+        return self._dispatch(urls, scrape, max_workers, per_host_concurrency, delay, journal, reset_host_state)
+    
+    def scrape_listings(self, urls, selector_item, selector_title, selector_price, tracker=None, **options):
+        """
+        Lấy danh sách sản phẩm từ HTML tĩnh của nhiều trang song song
+        
+        Cùng kết quả với crawl_with_selenium cho trang render sẵn phía server.
+        Nếu có tracker, trang có nội dung không đổi so với lượt trước được trả
+        lại bản ghi cũ mà không parse, trang chỉ đổi ngoài vùng sản phẩm thì
+        không trích xuất lại; các thay đổi nằm trong tracker.changes.
+        
+        Args:
+            tracker (ChangeTracker): Trạng thái của lượt cào trước
+            **options: Tham số như scrape_many (max_workers, delay, journal...)
+            
+        Yields:
+            tuple: (url, danh sách tuple (url, tên, giá, trạng thái)) theo thứ
+                tự hoàn thành, None nếu thất bại
+        """
+        selectors = (selector_item, selector_title, selector_price)
+        scrape = partial(self._scrape_listing, selectors=selectors, tracker=tracker)
+        return self._dispatch(urls, scrape, **options)
+    
+    def _dispatch(self, urls, scrape, max_workers=None, per_host_concurrency=None, delay=None,
+                  journal=None, reset_host_state=True):
+        """
+        Bộ điều phối của scrape_many: gọi scrape(url) song song trong thread pool
+        với giới hạn theo host, thử lại và ngắt mạch
+        
+        Khi scrape trả về PendingExtraction (trích xuất trong pool tiến trình,
+        hoặc còn chờ kiểm tra ảnh), lượt của host và worker được trả lại ngay;
+        bản ghi được trả về khi trích xuất và kiểm tra ảnh xong, nên số trang
+        trích xuất song song không bị giới hạn bởi max_workers hay
+        per_host_concurrency. Bước kiểm tra ảnh chạy trong thread pool và được
+        tính vào max_workers cùng các request tải trang.
+        
+        Yields:
+            tuple: (url, kết quả của scrape) theo thứ tự hoàn thành, None nếu thất bại
+        """
+        max_workers = max_workers or REQUEST_CONFIG['max_workers']
+        limiter = HostRateLimiter(per_host_concurrency, delay)
+        if limiter.per_host_concurrency > self._pool_maxsize:
+            # Pool mỗi host phải đủ kết nối cho số request đồng thời tới host đó
+            self._pool_maxsize = mount_adapters(self.session, limiter.per_host_concurrency)
+        if reset_host_state:
+            self.breaker = CircuitBreaker()
+            self.host_stats = HostStats()
+        
+        if journal is not None:
+            # URL đã xong ở lượt trước: trả lại kết quả đã lưu thay vì cào lại
+            urls, finished = journal.resume(urls)
+            for url, data in finished:
+                yield url, data
+        
+        # Gom URL theo host để không worker nào phải chờ host đang bận;
+        # mỗi phần tử là (url, số lần đã thử)
+        pending = OrderedDict()
+        for url in urls:
+            pending.setdefault(urlparse(url).netloc, deque()).append((url, 0))
+        
+        in_flight = {}
+        # Trang đã tải, đang trích xuất trong pool tiến trình (không giữ lượt host
+        # hay worker): future trích xuất -> (url, PendingExtraction), và future
+        # của bước tạo bản ghi sau khi trích xuất -> url
+        extracting = {}
+        finishing = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while (pending or in_flight or extracting or finishing) and not self.stop_flag:
+                wait_time = None
+                for host in list(pending):
+                    # Host chết: trả lỗi ngay cho các URL còn lại thay vì giữ worker
+                    if self.breaker.is_dead(host):
+                        self.logger.error(f"Bỏ qua {len(pending[host])} URL của {host} do host lỗi liên tục")
+                        for url, _ in pending.pop(host):
+                            self.host_stats.count(host, 'skipped')
+                            if journal is not None:
+                                journal.mark_failed(url, 'circuit open')
+                            yield url, None
+                        continue
+                    
+                    # Gửi tới host đến khi hết lượt đồng thời hoặc hết URL; tạm dừng tải
+                    # khi hàng đợi trích xuất đã đầy. Bước tạo bản ghi (kiểm tra ảnh) dùng
+                    # chung thread pool nên được tính vào max_workers, để request tải trang
+                    # không phải xếp hàng chờ thread trong khi giữ lượt của host
+                    while (host in pending and len(in_flight) + len(finishing) < max_workers
+                           and not self._extraction_full()):
+                        # Khi robots.txt đã có trong cache: áp dụng Crawl-delay trước request đầu
+                        # tiên, URL bị chặn được trả lỗi mà không giữ lượt của host
+                        url = pending[host][0][0]
+                        rules = self.robots.cached(url) if self.robots is not None else None
+                        if rules is not None and rules.crawl_delay:
+                            limiter.set_min_delay(host, min(rules.crawl_delay, ROBOTS_CONFIG['max_crawl_delay']))
+                        if rules is not None and not rules.allowed(url):
+                            pending[host].popleft()
+                            if not pending[host]:
+                                del pending[host]
+                            self.host_stats.count(host, 'disallowed')
+                            if journal is not None:
+                                journal.mark_failed(url, 'robots.txt')
+                            yield url, None
+                            continue
+                        
+                        host_wait = limiter.try_acquire(host)
+                        if not host_wait:
+                            host_wait = self.breaker.allow(host)
+                            if host_wait:
+                                limiter.release(host)
+                        if host_wait:
+                            if host_wait != float('inf'):
+                                wait_time = host_wait if wait_time is None else min(wait_time, host_wait)
+                            break
+                        
+                        url, attempt = pending[host].popleft()
+                        if not pending[host]:
+                            del pending[host]
+                        future = executor.submit(self._attempt, url, scrape, attempt, limiter)
+                        in_flight[future] = (url, host, attempt)
+                
+                waiting = [*in_flight, *extracting, *finishing]
+                if not waiting:
+                    # Không chờ vô hạn khi không có request nào đang chạy để đánh thức vòng lặp
+                    self.stop_event.wait(wait_time if wait_time is not None else IDLE_POLL_SECONDS)
+                    continue
+                
+                done, _ = wait(waiting, timeout=wait_time, return_when=FIRST_COMPLETED)
+                completed = []
+                for future in done:
+                    if future in extracting:
+                        # Bước tạo bản ghi (kiểm tra ảnh, cache) chạy trong thread pool
+                        url, extraction = extracting.pop(future)
+                        finishing[executor.submit(self._finish_extraction, url, extraction)] = url
+                        continue
+                    if future in finishing:
+                        completed.append((finishing.pop(future), future.result()))
+                        continue
+                    
+                    url, host, attempt = in_flight.pop(future)
+                    limiter.release(host)
+                    data, retry_in = future.result()
+                    if retry_in is not None and not self.stop_flag:
+                        # Đưa lại vào hàng đợi của host, host nghỉ trong thời gian backoff
+                        limiter.defer(host, retry_in)
+                        pending.setdefault(host, deque()).appendleft((url, attempt + 1))
+                        continue
+                    if isinstance(data, PendingExtraction):
+                        extracting[data.future] = (url, data)
+                        continue
+                    completed.append((url, data))
+                
+                for url, data in completed:
+                    if self.profiler is not None and not self.stop_flag:
+                        self.profiler.page_done(url, data is not None)
+                    if journal is not None and not self.stop_flag:
+                        if data:
+                            journal.mark_done(url, data)
+                        else:
+                            journal.mark_failed(url)
+                    yield url, data
+        finally:
+            if in_flight or extracting or finishing:
+                # Bên gọi ngừng đọc kết quả (break, Ctrl-C) khi còn request đang chạy: báo dừng
+                # để chúng thoát ngay thay vì chờ tải xong hoặc hết timeout
+                self.stop_event.set()
+            # Hủy các URL chưa bắt đầu, các request đang chạy tự dừng khi thấy stop_flag
+            executor.shutdown(wait=True, cancel_futures=True)
+            if reset_host_state:
+                self.log_host_stats()
+    
+    def _extraction_full(self):
+        """Pool tiến trình trích xuất đã có đủ max_pending trang đang chờ"""
+        pool = self._extract_pool
+        return pool is not None and pool.full()
+    
+    def log_host_stats(self):
+        """Ghi thống kê lỗi theo host vào log"""
+        for name, value in self.host_stats.summary_rows().items():
+            self.logger.warning(f"{name}: {value}")
     
     def scrape_url(self, url, title_selector, content_selector):
         """
-        Cào dữ liệu từ một URL cụ thể
+        Cào dữ liệu từ một URL cụ thể, thử lại theo REQUEST_CONFIG['max_retries']
         
         Args:
             url (str): URL cần cào dữ liệu
@@ -33,180 +297,306 @@ class WebScraper:
         Returns:
             dict: Dữ liệu đã cào được hoặc None nếu thất bại
         """
+        host = urlparse(url).netloc
+        scrape = partial(self._scrape, title_selector=title_selector, content_selector=content_selector)
+        attempt = 0
+        record = None
+        while not self.stop_flag:
+            wait_time = self.breaker.allow(host)
+            if wait_time:
+                self.logger.error(f"Bỏ qua {url}: host {host} đang bị ngắt mạch")
+                self.host_stats.count(host, 'skipped')
+                break
+            
+            record, retry_in = self._attempt(url, scrape, attempt)
+            if retry_in is None:
+                break
+            attempt += 1
+            self.stop_event.wait(retry_in)
+        
+        if isinstance(record, PendingExtraction):
+            record = self._finish_extraction(url, record)
+        if self.profiler is not None and not self.stop_flag:
+            self.profiler.page_done(url, record is not None)
+        return record
+    
+    def _attempt(self, url, scrape, attempt=0, limiter=None):
+        """
+        Thử cào một URL một lần và cập nhật ngắt mạch, delay và thống kê của host
+        
+        Args:
+            scrape (callable): Hàm scrape(url) tải và trích xuất, ném lỗi nếu request thất bại
+            attempt (int): Số lần đã thử trước đó
+            limiter (HostRateLimiter): Bộ giới hạn tốc độ cần điều chỉnh theo phản hồi
+            
+        Returns:
+            tuple: (dữ liệu hoặc None, số giây chờ trước khi thử lại hoặc None nếu không thử lại)
+        """
+        # Mọi nhánh kết thúc đều phải ghi kết quả vào ngắt mạch hoặc trả lại lượt
+        # thử (release_probe), nếu không host nửa mở sẽ không bao giờ được gửi tiếp
+        host = urlparse(url).netloc
         if self.stop_flag:
-            return None
+            self.breaker.release_probe(host)
+            return None, None
+        
+        if self.robots is not None:
+            rules = self.robots.get(url)
+            if limiter is not None and rules.crawl_delay:
+                limiter.set_min_delay(host, min(rules.crawl_delay, ROBOTS_CONFIG['max_crawl_delay']))
+            if not rules.allowed(url):
+                self.host_stats.count(host, 'disallowed')
+                self.logger.info(f"{url}: bị chặn bởi robots.txt")
+                self.breaker.release_probe(host)
+                return None, None
         
         try:
-            self.logger.info(f"Đang cào dữ liệu từ: {url}")
-            
-            # Gửi request
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Lấy tiêu đề
-            title = self._extract_title(soup, title_selector, url)
-            
-            # Lấy nội dung
-            content = self._extract_content(soup, content_selector)
+            record = scrape(url)
+        except requests.RequestException as e:
+            response = getattr(e, 'response', None)
+            status = response.status_code if response is not None else None
+            self.host_stats.count(host, 'failures', e)
             
-            # Lấy ngày đăng (nếu có)
-            date = self._extract_date(soup)
+            retry_after = None
+            if status in THROTTLE_STATUSES:
+                self.host_stats.count(host, 'throttled')
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if limiter is not None:
+                    limiter.throttle(host)
             
-            # Lấy URL hình ảnh (nếu có)
-            images = self._extract_images(soup, url)
+            # Host không phản hồi hoặc lỗi phía server thì tính vào ngắt mạch;
+            # 4xx nghĩa là host vẫn sống
+            if status is None or status >= 500:
+                if self.breaker.record_failure(host):
+                    self.host_stats.count(host, 'circuit_opens')
+                    self.logger.warning(f"Ngắt mạch host {host} sau nhiều lần lỗi liên tiếp")
+            else:
+                self.breaker.record_success(host)
             
-            return {
-                'url': url,
-                'title': title,
-                'content': content,
-                'date': date,
-                'images': images,
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            retryable = status in RETRY_STATUSES if status is not None else isinstance(
+                e, (requests.ConnectionError, requests.Timeout)
+            )
+            if retryable and attempt < REQUEST_CONFIG['max_retries']:
+                retry_in = retry_after if retry_after is not None else backoff_delay(attempt)
+                if retry_in <= REQUEST_CONFIG['backoff_max']:
+                    self.host_stats.count(host, 'retries')
+                    self.logger.warning(
+                        f"Lỗi request cho {url}: {str(e)}, thử lại sau {retry_in:.1f} giây "
+                        f"(lần {attempt + 1}/{REQUEST_CONFIG['max_retries']})"
+                    )
+                    return None, retry_in
             
-        except requests.RequestException as e:
             self.logger.error(f"Lỗi request cho {url}: {str(e)}")
-            return None
+            return None, None
+        except ContentRejected as e:
+            # Host đã phản hồi, chỉ nội dung không dùng được
+            self.logger.warning(f"{url}: {str(e)}")
+            self.breaker.record_success(host)
+            if limiter is not None:
+                limiter.relax(host)
+            return None, None
         except Exception as e:
+            self.host_stats.count(host, 'failures', e)
             self.logger.error(f"Lỗi khi cào dữ liệu từ {url}: {str(e)}")
+            self.breaker.release_probe(host)
+            return None, None
+        
+        self.breaker.record_success(host)
+        if limiter is not None:
+            limiter.relax(host)
+        return record, None
+    
+    def _scrape(self, url, title_selector, content_selector):
+        """Tải và trích xuất một URL, ném lỗi nếu request thất bại"""
+        self.logger.info(f"Đang cào dữ liệu từ: {url}")
+        
+        # Selector của profile khớp tên miền, nếu có
+        date_selector = None
+        if self.profiles is not None:
+            title_selector, content_selector, date_selector = self.profiles.selectors(
+                url, title_selector, content_selector
+            )
+        
+        # Dùng lại bản ghi trong cache nếu còn mới
+        variant = f"{self.parser_backend}|{title_selector}|{content_selector}"
+        if date_selector is not None:
+            variant += f"|{date_selector}"
+        if self.link_selector is not None:
+            variant += f"|{self.link_selector}"
+        if self.image_probe is not None:
+            variant += "|image_info"
+        cached = self.cache.lookup(url, variant) if self.cache else None
+        if cached and cached['fresh']:
+            self.cache.count('hits')
+            return dict(cached['record'], url=url)
+        
+        # Gửi request, kèm header điều kiện nếu đã có bản ghi cũ
+        headers = self.cache.conditional_headers(cached) if cached else None
+        response, html = self._fetch(url, headers)
+        if html is None:
             return None
+        
+        if cached and response.status_code == 304:
+            self.cache.refresh(url, response.headers, variant)
+            self.cache.count('revalidations')
+            return dict(cached['record'], url=url)
+        
+        # Parse HTML và trích xuất mọi trường trong một lần duyệt; với profile thì bỏ qua
+        # các bước đã thất bại ở những trang trước của cùng host
+        if self.profiles is not None:
+            options = self.profiles.plan_options(url, title_selector, content_selector, date_selector)
+        else:
+            options = {'title_selector': title_selector, 'content_selector': content_selector}
+        finish = partial(self._build_record, url, response.headers, variant)
+        if self.extract_processes:
+            # Trích xuất trong pool tiến trình: không chờ kết quả ở thread tải trang
+            return PendingExtraction(self._submit_extract(html, url, **options), finish)
+        fields = self._extract(html, url, **options)
+        if self.image_probe is not None:
+            # Kiểm tra ảnh sau khi bộ điều phối đã trả lượt của host, không giữ lượt trong lúc chờ
+            return PendingExtraction.ready(fields, finish)
+        return finish(fields)
     
-    def _extract_title(self, soup, selector, url):
-        """Trích xuất tiêu đề từ trang web"""
-        title = ""
-        
-        # Thử với CSS selector được cung cấp
-        if selector:
-            selectors = [s.strip() for s in selector.split(',')]
-            for sel in selectors:
-                elements = soup.select(sel)
-                if elements:
-                    title = elements[0].get_text(strip=True)
-                    break
-        
-        # Nếu không tìm thấy, thử các selector mặc định
-        if not title:
-            # Thử với thẻ title
-            title_tag = soup.find('title')
-            if title_tag:
-                title = title_tag.get_text(strip=True)
-            
-            # Thử với h1
-            if not title:
-                h1_tag = soup.find('h1')
-                if h1_tag:
-                    title = h1_tag.get_text(strip=True)
-            
-            # Thử với meta title
-            if not title:
-                meta_title = soup.find('meta', property='og:title')
-                if meta_title:
-                    title = meta_title.get('content', '')
-        
-        # Nếu vẫn không có, lấy từ URL
-        if not title:
-            parsed_url = urlparse(url)
-            title = parsed_url.netloc
-        
-        return title
-    
-    def _extract_content(self, soup, selector):
-        """Trích xuất nội dung từ trang web"""
-        content = ""
-        
-        # Thử với CSS selector được cung cấp
-        if selector:
-            selectors = [s.strip() for s in selector.split(',')]
-            for sel in selectors:
-                elements = soup.select(sel)
-                if elements:
-                    # Lấy tất cả text từ các element
-                    for element in elements:
-                        text = element.get_text(strip=True)
-                        if text:
-                            content += text + " "
-                    break
-        
-        # Nếu không tìm thấy, thử các selector mặc định
-        if not content:
-            # Thử với thẻ article
-            article = soup.find('article')
-            if article:
-                content = article.get_text(strip=True)
+    def _build_record(self, url, headers, variant, fields):
+        """Tạo bản ghi từ kết quả trích xuất, kiểm tra ảnh và lưu cache"""
+        if self.profiles is not None:
+            self.profiles.record(url, fields['steps'])
+        
+        record = {
+            'url': url,
+            'title': fields['title'],
+            'content': fields['content'],
+            'date': fields['date'],
+            'images': fields['images'],
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if 'links' in fields:
+            record['links'] = fields['links']
+            record['next_pages'] = fields['next_pages']
+        if self.image_probe is not None:
+            with timed(self.profiler, 'probe_images', url):
+                record['images'], record['image_info'] = self.image_probe.filter(record['images'])
+        
+        if self.cache:
+            self.cache.count('misses')
+            self.cache.store(url, headers, record, variant)
+        
+        return record
+    
+    def _scrape_listing(self, url, selectors, tracker=None):
+        """
+        Tải một trang danh sách, bỏ qua trích xuất nếu nội dung không đổi
+        
+        Returns:
+            list: Các tuple (url, tên, giá, trạng thái); [] nếu trang tải được
+                nhưng không có sản phẩm nào, None nếu bị dừng giữa chừng
+        """
+        response, body = self._fetch(url)
+        if body is None:
+            return None
+        
+        if self.profiles is not None:
+            selectors = self.profiles.listing_selectors(url, *selectors)
+        plan = self._listing_plans.get(selectors)
+        if plan is None:
+            plan = self._listing_plans[selectors] = ListingPlan(*selectors, backend=self.parser_backend)
+        
+        state = None
+        if tracker is not None:
+            body_hash = fingerprint(body)
+            state = tracker.page_state(url)
+            if state and state['body_hash'] == body_hash:
+                return tracker.keep_page(url)
+        
+        with timed(self.profiler, 'parse', url):
+            items = plan.items(plan.parse(body))
+        if tracker is not None:
+            region_hash = plan.region_fingerprint(items)
+            if state and state['region_hash'] == region_hash:
+                return tracker.keep_page(url, body_hash)
+        
+        with timed(self.profiler, 'extract_items', url):
+            rows = plan.extract_items(items, url)
+        if tracker is not None:
+            tracker.update_page(url, body_hash, region_hash, rows)
+        return rows
+    
+    def _extract(self, html, url, title_selector, content_selector, date_selector=None, content_engine=None):
+        """Trích xuất trong thread hiện tại, hoặc trong pool tiến trình (chờ kết quả) nếu được bật"""
+        if self.extract_processes == 0:
+            plan = self._get_plan(title_selector, content_selector, date_selector, content_engine)
+            return plan.extract(html, url, self.profiler)
+        return self._submit_extract(html, url, title_selector, content_selector, date_selector,
+                                    content_engine).result()
+    
+    def _submit_extract(self, html, url, title_selector, content_selector, date_selector=None, content_engine=None):
+        """Gửi trang sang pool tiến trình trích xuất, trả về future"""
+        with self._extract_pool_lock:
+            if self._extract_pool is None:
+                self._extract_pool = ExtractionPool(self.extract_processes)
+        future = self._extract_pool.submit(html, url, title_selector, content_selector, self.parser_backend,
+                                           self.link_selector, date_selector, content_engine)
+        if self.profiler is not None:
+            # Thời gian từ lúc gửi tới khi có kết quả, gồm cả thời gian chờ trong hàng đợi
+            started = time.perf_counter()
+            future.add_done_callback(
+                lambda _: self.profiler.record('extract', time.perf_counter() - started, url)
+            )
+        return future
+    
+    def _finish_extraction(self, url, pending):
+        """Chờ trang trích xuất xong trong pool tiến trình và tạo bản ghi, None nếu lỗi"""
+        try:
+            return pending.result()
+        except Exception as e:
+            self.host_stats.count(urlparse(url).netloc, 'failures', e)
+            self.logger.error(f"Lỗi khi trích xuất dữ liệu từ {url}: {str(e)}")
+            return None
+    
+    def _get_plan(self, title_selector, content_selector, date_selector=None, content_engine=None):
+        """Lấy plan trích xuất đã biên dịch cho bộ selector, tạo mới nếu chưa có"""
+        key = (title_selector, content_selector, self.link_selector, date_selector, content_engine)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = ExtractionPlan(title_selector, content_selector, self.parser_backend, self.link_selector,
+                                  content_engine=content_engine, date_selector=date_selector)
+            self._plans[key] = plan
+        return plan
+    
+    def _fetch(self, url, headers=None):
+        """
+        Tải nội dung trang theo từng phần
+        
+        Returns:
+            tuple: (response, nội dung), nội dung là None nếu bị dừng giữa chừng
+        
+        Raises:
+            ContentRejected: Content-type không được phép hoặc nội dung quá lớn
+        """
+        self.host_stats.count(urlparse(url).netloc, 'requests')
+        timeout = (REQUEST_CONFIG['connect_timeout'], REQUEST_CONFIG['timeout'])
+        with timed(self.profiler, 'connect', url):
+            response = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        
+        with response:
+            response.raise_for_status()
+            check_response(response)
             
-            # Thử với thẻ main
-            elif soup.find('main'):
-                content = soup.find('main').get_text(strip=True)
+            # Ngừng tải ngay khi vượt giới hạn, kể cả khi server không gửi Content-Length
+            max_body_bytes = TRANSPORT_CONFIG['max_body_bytes']
+            received = 0
+            chunks = []
+            with timed(self.profiler, 'transfer', url):
+                for chunk in response.iter_content(chunk_size=65536):
+                    if self.stop_flag:
+                        return response, None
+                    received += len(chunk)
+                    if max_body_bytes and received > max_body_bytes:
+                        raise ContentRejected(f"Nội dung vượt giới hạn {max_body_bytes} byte, ngừng tải")
+                    chunks.append(chunk)
             
-            # Thử với div có class content
-            else:
-                content_divs = soup.find_all('div', class_=re.compile(r'content|post|article', re.I))
-                for div in content_divs:
-                    text = div.get_text(strip=True)
-                    if len(text) > len(content):
-                        content = text
-        
-        # Làm sạch nội dung
-        content = self._clean_text(content)
-        
-        return content
-    
-    def _extract_date(self, soup):
-        """Trích xuất ngày đăng từ trang web"""
-        date = ""
-        
-        # Thử với meta tags
-        date_selectors = [
-            'meta[property="article:published_time"]',
-            'meta[name="publish_date"]',
-            'meta[name="date"]',
-            'time[datetime]',
-            '.date',
-            '.published',
-            '.post-date'
-        ]
-        
-        for selector in date_selectors:
-            element = soup.select_one(selector)
-            if element:
-                if element.name == 'meta':
-                    date = element.get('content', '')
-                else:
-                    date = element.get('datetime', '') or element.get_text(strip=True)
-                if date:
-                    break
-        
-        return date
-    
-    def _extract_images(self, soup, base_url):
-        """Trích xuất URL hình ảnh từ trang web"""
-        images = []
-        
-        # Tìm tất cả thẻ img
-        img_tags = soup.find_all('img')
-        
-        for img in img_tags:
-            src = img.get('src') or img.get('data-src')
-            if src:
-                # Chuyển đổi URL tương đối thành tuyệt đối
-                absolute_url = urljoin(base_url, src)
-                images.append(absolute_url)
-        
-        return images[:5]  # Chỉ lấy 5 hình ảnh đầu tiên
-    
-    def _clean_text(self, text):
-        """Làm sạch text"""
-        if not text:
-            return ""
-        
-        # Loại bỏ ký tự xuống dòng thừa
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Loại bỏ khoảng trắng đầu cuối
-        text = text.strip()
-        
-        return text 
\ No newline at end of file
+            body = b''.join(chunks)
+            if self.profiler is not None:
+                # Số byte thực nhận qua mạng (trước khi giải nén) nếu urllib3 cho biết
+                raw_tell = getattr(response.raw, 'tell', None)
+                self.profiler.add_bytes(url, raw_tell() if raw_tell else len(body))
+            return response, body